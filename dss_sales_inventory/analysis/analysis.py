@@ -11,12 +11,13 @@ def run_analysis(features_data: dict, correlation_id: str) -> None:
     """
     Generate descriptive statistics and diagnostic plots from featured data,
     and save summary and plots to reporting/outputs.
+    The featured frames are only read, never modified.
     """
     if features_data is None or 'sales' not in features_data or 'inventory' not in features_data:
         raise ValueError("Invalid or missing features_data")
 
-    sales_df = features_data['sales'].copy()
-    inventory_df = features_data['inventory'].copy()
+    sales_df = features_data['sales']
+    inventory_df = features_data['inventory']
 
     rows_in_sales = len(sales_df)
     rows_in_inventory = len(inventory_df)
@@ -3,6 +3,9 @@ import logging
 import numpy as np
 import pandas as pd
 
+from features.features import load_inventory_features
+from data_model.inventory_snapshot import snapshot_available, load_inventory_snapshot
+
 # ---------------------------------------------------------------------
 # Logging
 # ---------------------------------------------------------------------
@@ -27,9 +30,12 @@ INVENTORY_STATUS_VIEW = os.path.join(
 )
 
 INVENTORY_FEATURES = os.path.join(
-    PROJECT_ROOT, "data", "processed", "inventory_features.csv"
+    PROJECT_ROOT, "data", "processed", "inventory_features"
 )
 
+# Star schema (fact_inventory_snapshot); inventory_features (month partitions) is the fallback
+ANALYTICS_DB = os.path.join(PROJECT_ROOT, "analysis", "analytics.db")
+
 FORECAST_RESULTS = os.path.join(
     PROJECT_ROOT, "analysis", "forecast", "forecast_results.csv"
 )
@@ -186,7 +192,10 @@ def run_kpi_layer(data: dict, correlation_id: str = None) -> dict:
     # ---------------------------------------------------------
     # 1. Validation: Check Files
     # ---------------------------------------------------------
-    required_files = [INVENTORY_STATUS_VIEW, INVENTORY_FEATURES, FORECAST_RESULTS, RISK_RESULTS]
+    use_snapshot = snapshot_available(ANALYTICS_DB)
+    required_files = [INVENTORY_STATUS_VIEW, FORECAST_RESULTS, RISK_RESULTS]
+    if not use_snapshot:
+        required_files.append(INVENTORY_FEATURES)
     for f in required_files:
         if not os.path.exists(f):
             raise FileNotFoundError(f"[KPI layer] Missing file: {f}")
@@ -195,7 +204,11 @@ def run_kpi_layer(data: dict, correlation_id: str = None) -> dict:
     # 2. Load & Normalize Columns
     # ---------------------------------------------------------
     inv_view = pd.read_csv(INVENTORY_STATUS_VIEW)
-    inv_feat = pd.read_csv(INVENTORY_FEATURES)
+    if use_snapshot:
+        # First snapshot per product (what the dedup below keeps), via indexed SQL
+        inv_feat = load_inventory_snapshot(ANALYTICS_DB, per_product="first")
+    else:
+        inv_feat = load_inventory_features(INVENTORY_FEATURES)
     forecast = pd.read_csv(FORECAST_RESULTS)
     risk = pd.read_csv(RISK_RESULTS)
 
@@ -16,6 +16,7 @@ Aligned with DSS v3.0:
 from __future__ import annotations
 
 import os
+import sys
 import uuid
 import logging
 from typing import Dict, Tuple
@@ -42,16 +43,26 @@ if not LOGGER.handlers:
 
 BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
 
+# Project root on sys.path so shared modules resolve when run as a script
+if BASE_DIR not in sys.path:
+    sys.path.insert(0, BASE_DIR)
+
+from features.feature_store import FeatureStore, CURRENT_FILE  # noqa: E402
+from data_model.inventory_snapshot import snapshot_available, load_inventory_snapshot  # noqa: E402
+
 # UPDATED: Path changed to analysis/forecast/ per new structure
 FORECAST_PATH = os.path.join(
     BASE_DIR, "analysis", "forecast", "forecast_results.csv"
 )
 
-# REMAINS: Path stays in data/processed/ as requested
-FEATURES_PATH = os.path.join(
-    BASE_DIR, "data", "processed", "inventory_features.csv"
+# REMAINS: Path stays in data/processed/ as requested (latest product-indexed snapshot)
+FEATURE_STORE_PATH = os.path.join(
+    BASE_DIR, "data", "processed", "feature_store"
 )
 
+# Star schema (fact_inventory_snapshot); FEATURE_STORE_PATH is the fallback
+ANALYTICS_DB = os.path.join(BASE_DIR, "analysis", "analytics.db")
+
 # REMAINS: Outputs stay in analysis/risk/
 OUTPUT_DIR = os.path.join(BASE_DIR, "analysis", "risk")
 OUTPUT_CSV = os.path.join(OUTPUT_DIR, "product_risk_scores.csv")
@@ -311,11 +322,18 @@ def run_risk_simulation(
     if not os.path.exists(FORECAST_PATH):
         raise FileNotFoundError(FORECAST_PATH)
 
-    if not os.path.exists(FEATURES_PATH):
-        raise FileNotFoundError(FEATURES_PATH)
+    use_snapshot = snapshot_available(ANALYTICS_DB)
+    if not use_snapshot and not os.path.exists(os.path.join(FEATURE_STORE_PATH, CURRENT_FILE)):
+        raise FileNotFoundError(FEATURE_STORE_PATH)
 
     forecast_df = pd.read_csv(FORECAST_PATH)
-    features_df = pd.read_csv(FEATURES_PATH)
+    if use_snapshot:
+        # Only the first row per product is used below: fetch just those via indexed SQL
+        features_df = load_inventory_snapshot(ANALYTICS_DB, per_product="first")
+        feature_store = FeatureStore(features_df)
+    else:
+        # Latest saved snapshot: already sorted with product offsets, nothing to re-sort
+        feature_store = FeatureStore.load(store_dir=FEATURE_STORE_PATH)
 
     # ---- Required columns from your real forecast output
     required_cols = {"product_id", "forecast_quantity"}
@@ -324,13 +342,12 @@ def run_risk_simulation(
             f"forecast_results.csv must contain columns {required_cols}"
         )
 
+    # Product-indexed features (feature_store): O(1) slice per product instead of a full scan
     results = []
 
     for product_id, f_group in forecast_df.groupby("product_id"):
 
-        product_features = features_df[
-            features_df["product_id"] == product_id
-        ]
+        product_features = feature_store.get_product(product_id)
 
         if product_features.empty:
             _log(
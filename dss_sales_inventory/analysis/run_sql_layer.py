@@ -1,6 +1,24 @@
-import sqlite3
+import io
+import sys
+import json
+import hashlib
 import pandas as pd
 from pathlib import Path
+from datetime import datetime
+
+# Project root on sys.path so shared modules resolve when run as a script
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from features.features import (  # noqa: E402
+    load_sales_features,
+    load_inventory_features,
+    feature_partition_files,
+    SALES_FEATURES_DIR,
+    INVENTORY_FEATURES_DIR,
+)
+from data_model.backends import get_backend, backend_name  # noqa: E402
 
 BASE = Path(r"C:\Data_Analysis\dss_sales_inventory")
 
@@ -8,22 +26,194 @@ DATA = BASE / "data" / "processed"
 ADVANCED_SQL_FILE = BASE / "analysis" / "sql" / "advanced_analysis.sql"
 VIEWS_SQL_FILE = BASE / "analysis" / "sql" / "views.sql"
 DB_FILE = BASE / "analysis" / "analytics.db"
+DUCKDB_FILE = BASE / "analysis" / "analytics.duckdb"  # DSS_ANALYTICS_BACKEND=duckdb
 
 OUTPUT_DIR = BASE / "reporting" / "outputs"
 
+# Fingerprints (size, mtime, SHA-256) of the source files each table was loaded from
+META_TABLE = "_sql_layer_meta"
+
+# Sources per SQL-layer table: "files" (the first one is the CSV) or a month-partitioned
+# feature "dataset" (its statistics file, partition files and sparse measures). "append": the
+# table holds the CSV row for row, so a CSV that only grew (the loaded file is a byte prefix
+# of the new one, as with incremental cleaning) is loaded by its new rows instead of being replaced.
+SQL_LAYER_SOURCES = {
+    "sales_clean": {"files": ["sales_cleaned.csv"], "append": True},
+    "sales_features": {"dataset": SALES_FEATURES_DIR, "append": False},
+    "inventory_features": {"dataset": INVENTORY_FEATURES_DIR, "append": False},
+}
+HASH_BLOCK_BYTES = 1 << 20
+
+
+def read_source_table(table):
+    """DataFrame of an SQL-layer table, built from its source files."""
+    if table == "sales_clean":
+        return pd.read_csv(DATA / "sales_cleaned.csv")
+    if table == "sales_features":
+        sales_features = load_sales_features(str(DATA / SALES_FEATURES_DIR))
+        # The SQL layer works at (product_id, date) grain: regional daily sales are summed
+        if "region" in sales_features.columns:
+            sales_features = sales_features.groupby(["product_id", "date"], as_index=False)[
+                ["daily_quantity_sold", "daily_revenue"]
+            ].sum()
+        return iso_dates(sales_features)
+    if table == "inventory_features":
+        return iso_dates(load_inventory_features(str(DATA / INVENTORY_FEATURES_DIR)))
+    raise ValueError(f"Unknown SQL-layer table '{table}'.")
+
+
+def iso_dates(frame):
+    """Dates as YYYY-MM-DD text, the format of the cleaned CSVs the views join against."""
+    return frame.assign(date=pd.to_datetime(frame["date"]).dt.strftime("%Y-%m-%d"))
+
+
+def source_files(source):
+    """Source files of an SQL_LAYER_SOURCES entry, relative to DATA."""
+    if "dataset" not in source:
+        return source["files"]
+    dataset_dir = DATA / source["dataset"]
+    return feature_partition_files(str(dataset_dir)) if dataset_dir.exists() else []
+
 
-def load_tables(conn):
-    """تحميل الجداول من CSV إلى قاعدة البيانات"""
-    sales_clean = pd.read_csv(DATA / "sales_cleaned.csv")
-    sales_features = pd.read_csv(DATA / "sales_features.csv")
-    inventory_features = pd.read_csv(DATA / "inventory_features.csv")
+def hash_file(path, prefix_bytes=None):
+    """
+    SHA-256 of the file in one pass; with prefix_bytes also the digest of its first
+    prefix_bytes bytes. Returns (digest, prefix_digest or None).
+    """
+    digest, prefix_digest = hashlib.sha256(), None
+    with open(path, "rb") as f:
+        if prefix_bytes is not None:
+            remaining = prefix_bytes
+            while remaining > 0:
+                block = f.read(min(HASH_BLOCK_BYTES, remaining))
+                if not block:
+                    break
+                digest.update(block)
+                remaining -= len(block)
+            prefix_digest = digest.hexdigest()
+        for block in iter(lambda: f.read(HASH_BLOCK_BYTES), b""):
+            digest.update(block)
+    return digest.hexdigest(), prefix_digest
+
+
+def source_fingerprint(files, stored=None):
+    """
+    [{"file", "size", "mtime_ns", "sha256"}] of the existing source files. Files whose size and
+    mtime match the stored fingerprint keep its digest (not re-read).
+    """
+    stored_by_file = {entry["file"]: entry for entry in stored or []}
+    fingerprint = []
+    for name in files:
+        path = DATA / name
+        if not path.exists():
+            continue
+        stat = path.stat()
+        entry = {"file": name, "size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+        previous = stored_by_file.get(name)
+        if previous and (previous["size"], previous["mtime_ns"]) == (entry["size"], entry["mtime_ns"]):
+            entry["sha256"] = previous["sha256"]
+        else:
+            entry["sha256"] = hash_file(path)[0]
+        fingerprint.append(entry)
+    return fingerprint
+
+
+def appended_rows(name, stored_entry):
+    """
+    Rows added to CSV `name` since it was fingerprinted as stored_entry, or None when the
+    loaded bytes are no longer a prefix of the file (rewritten, not appended).
+    """
+    path = DATA / name
+    loaded_bytes = stored_entry["size"]
+    if loaded_bytes == 0 or path.stat().st_size <= loaded_bytes:
+        return None
+    if hash_file(path, prefix_bytes=loaded_bytes)[1] != stored_entry["sha256"]:
+        return None
+    with open(path, "rb") as f:
+        f.seek(loaded_bytes - 1)
+        tail = f.read()
+    # The loaded file must have ended on a complete row
+    if not tail.startswith(b"\n"):
+        return None
+    columns = pd.read_csv(path, nrows=0).columns
+    return pd.read_csv(io.BytesIO(tail[1:]), header=None, names=columns)
+
+
+def content_key(fingerprint):
+    """The parts of a fingerprint that identify the file contents (mtime only short-cuts hashing)."""
+    return [(entry["file"], entry["size"], entry["sha256"]) for entry in fingerprint]
+
+
+def read_meta(db):
+    db.execute(
+        f"CREATE TABLE IF NOT EXISTS {META_TABLE} ("
+        "table_name TEXT PRIMARY KEY, fingerprint TEXT, row_count BIGINT, loaded_at TEXT)"
+    )
+    meta = db.query(f"SELECT table_name, fingerprint, row_count FROM {META_TABLE}")
+    return {row.table_name: (json.loads(row.fingerprint), int(row.row_count)) for row in meta.itertuples()}
+
+
+def write_meta(db, table, fingerprint, row_count):
+    db.execute(f"DELETE FROM {META_TABLE} WHERE table_name = ?", [table])
+    db.execute(
+        f"INSERT INTO {META_TABLE} (table_name, fingerprint, row_count, loaded_at) VALUES (?, ?, ?, ?)",
+        [table, json.dumps(fingerprint), int(row_count), datetime.now().isoformat(timespec="seconds")]
+    )
+
+
+def load_tables(db, force=False):
+    """
+    تحميل الجداول من CSV إلى قاعدة البيانات
+
+    Each table records the fingerprint of its source files in _sql_layer_meta. A table whose
+    sources are unchanged is not reloaded; an "append" table whose CSV only grew gets the new
+    rows and anything else is replaced, in both cases in the same transaction as its new
+    fingerprint (a failed load rolls both back).
+    force=True replaces every table. Returns table -> "unchanged" / "appended" / "replaced".
+    """
+    meta = read_meta(db)
+    existing = db.table_names()
+    actions = {}
+    for table, source in SQL_LAYER_SOURCES.items():
+        stored, stored_rows = meta.get(table, (None, 0))
+        loaded = stored is not None and table in existing and not force
+        fingerprint = source_fingerprint(source_files(source), stored if loaded else None)
+
+        if loaded and content_key(fingerprint) == content_key(stored):
+            if fingerprint != stored:
+                # Rewritten with the same bytes: keep the new mtimes so the next run skips hashing
+                write_meta(db, table, fingerprint, stored_rows)
+                db.commit()
+            actions[table] = "unchanged"
+            continue
+
+        new_rows = None
+        if loaded and source["append"] and len(stored) == len(fingerprint) == 1:
+            new_rows = appended_rows(source["files"][0], stored[0])
+
+        db.execute("BEGIN TRANSACTION")
+        try:
+            if new_rows is not None:
+                db.insert_frame(table, new_rows)
+                row_count = stored_rows + len(new_rows)
+                actions[table] = "appended"
+            else:
+                frame = read_source_table(table)
+                db.write_frame(table, frame)
+                row_count = len(frame)
+                actions[table] = "replaced"
+            write_meta(db, table, fingerprint, row_count)
+        except Exception:
+            # Neither the rows nor the fingerprint of a failed load are kept
+            db.rollback()
+            raise
+        db.commit()
 
-    sales_clean.to_sql("sales_clean", conn, if_exists="replace", index=False)
-    sales_features.to_sql("sales_features", conn, if_exists="replace", index=False)
-    inventory_features.to_sql("inventory_features", conn, if_exists="replace", index=False)
+    print("SQL layer tables: " + ", ".join(f"{table} {action}" for table, action in actions.items()))
+    return actions
 
 
-def run_sql_file(conn, sql_file):
+def run_sql_file(db, sql_file):
     """
     تنفيذ SQL من ملف محدد.
     - استعلامات SELECT تعيد DataFrame
@@ -39,10 +229,10 @@ def run_sql_file(conn, sql_file):
         q_upper = q.upper()
         try:
             if q_upper.startswith("SELECT"):
-                df = pd.read_sql_query(q, conn)
+                df = db.query(q)
                 results.append(df)
             else:
-                conn.execute(q)
+                db.execute(q)
                 results.append(None)  # للحفاظ على ترتيب النتائج
         except Exception as e:
             print(f"SQL execution error:\n{q}\nError: {e}")
@@ -51,14 +241,14 @@ def run_sql_file(conn, sql_file):
     return results
 
 
-def export_views_as_csv(conn, view_names, output_dir):
+def export_views_as_csv(db, view_names, output_dir):
     """
     بعد إنشاء الـ Views، ننفذ SELECT * FROM view_name لكل View
     لنصدر CSV لكل واحدة
     """
     for view_name in view_names:
         try:
-            df = pd.read_sql_query(f"SELECT * FROM {view_name}", conn)
+            df = db.query(f"SELECT * FROM {view_name}")
             df.to_csv(output_dir / f"{view_name}.csv", index=False)
         except Exception as e:
             print(f"Error exporting view {view_name}: {e}")
@@ -66,17 +256,18 @@ def export_views_as_csv(conn, view_names, output_dir):
 
 
 def main():
-    conn = sqlite3.connect(DB_FILE)
+    backend = backend_name()
+    db = get_backend(backend, path=DUCKDB_FILE if backend == "duckdb" else DB_FILE)
 
     # تحميل الجداول (أضفنا sales_cleaned)
-    load_tables(conn)
+    load_tables(db)
 
     OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
 
     # -----------------------------
     # تشغيل advanced_analysis.sql
     # -----------------------------
-    results = run_sql_file(conn, ADVANCED_SQL_FILE)
+    results = run_sql_file(db, ADVANCED_SQL_FILE)
 
     # التصدير حسب ترتيب SELECT فقط
     if results[0] is not None:
@@ -89,7 +280,7 @@ def main():
     # -----------------------------
     # تشغيل views.sql (الذي يحتوي الآن على الـ View الجديد)
     # -----------------------------
-    run_sql_file(conn, VIEWS_SQL_FILE)
+    run_sql_file(db, VIEWS_SQL_FILE)
 
     # تصدير كل View كـ CSV منفصل (أضفنا daily_product_sales_view)
     view_names = [
@@ -98,9 +289,9 @@ def main():
         "inventory_status_view",
         "daily_product_sales_view"
     ]
-    export_views_as_csv(conn, view_names, OUTPUT_DIR)
+    export_views_as_csv(db, view_names, OUTPUT_DIR)
 
-    conn.close()
+    db.close()
     print("SQL analytics layer executed successfully.")
     print(f"Outputs saved in: {OUTPUT_DIR}")
 
@@ -5,6 +5,9 @@ import pandas as pd
 from datetime import datetime
 from typing import Dict, List
 
+from features.feature_store import FeatureStore, CURRENT_FILE
+from data_model.inventory_snapshot import snapshot_available, load_inventory_snapshot
+
 # ------------------------------------------------------------------
 # استخدام نفس dss_logger الموحد من المشروع
 # ------------------------------------------------------------------
@@ -17,7 +20,8 @@ CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
 PROJECT_ROOT = os.path.abspath(os.path.join(CURRENT_DIR, "..", ".."))
 
 FORECAST_INPUT = os.path.join(PROJECT_ROOT, "reporting", "outputs", "forecast_results.csv")
-INVENTORY_INPUT = os.path.join(PROJECT_ROOT, "data", "processed", "inventory_features.csv")
+FEATURE_STORE_INPUT = os.path.join(PROJECT_ROOT, "data", "processed", "feature_store")
+ANALYTICS_DB = os.path.join(PROJECT_ROOT, "analysis", "analytics.db")  # fact_inventory_snapshot
 
 EXCEL_OUTPUT = os.path.join(PROJECT_ROOT, "analysis", "scenarios", "scenarios_comparison.xlsx")
 MD_OUTPUT = os.path.join(PROJECT_ROOT, "analysis", "scenarios", "scenario_insights.md")
@@ -140,13 +144,19 @@ def run_scenario_analysis(correlation_id: str) -> None:
         log_message(f"Forecast file not found: {FORECAST_INPUT}", "ERROR", correlation_id)
         return
     
-    if not os.path.exists(INVENTORY_INPUT):
-        log_message(f"Inventory file not found: {INVENTORY_INPUT}", "ERROR", correlation_id)
+    use_snapshot = snapshot_available(ANALYTICS_DB)
+    if not use_snapshot and not os.path.exists(os.path.join(FEATURE_STORE_INPUT, CURRENT_FILE)):
+        log_message(f"Feature store not found: {FEATURE_STORE_INPUT}", "ERROR", correlation_id)
         return
     
     try:
         forecast_df = pd.read_csv(FORECAST_INPUT)
-        inventory_df = pd.read_csv(INVENTORY_INPUT)
+        if use_snapshot:
+            # Only the first stock position per product is used below
+            inventory_store = FeatureStore(load_inventory_snapshot(ANALYTICS_DB, per_product="first"))
+        else:
+            # Latest saved snapshot, already sorted and indexed by product
+            inventory_store = FeatureStore.load(store_dir=FEATURE_STORE_INPUT)
     except Exception as e:
         log_message(f"Error reading input files: {str(e)}", "ERROR", correlation_id)
         return
@@ -176,20 +186,19 @@ def run_scenario_analysis(correlation_id: str) -> None:
     ]
     
     all_results = []
+
+    # Product-indexed lookups (one row per product in weekly_forecast; sorted slices for inventory)
+    weekly_forecast = weekly_forecast.set_index("product_id")
     
-    for product_id in weekly_forecast["product_id"].unique():
-        product_row = weekly_forecast[weekly_forecast["product_id"] == product_id]
-        if product_row.empty:
-            continue
-        
+    for product_id, product_row in weekly_forecast.iterrows():
         weekly_quantities = [
-            product_row["forecast_week_1"].iloc[0],
-            product_row["forecast_week_2"].iloc[0],
-            product_row["forecast_week_3"].iloc[0],
-            product_row["forecast_week_4"].iloc[0]
+            product_row["forecast_week_1"],
+            product_row["forecast_week_2"],
+            product_row["forecast_week_3"],
+            product_row["forecast_week_4"]
         ]
         
-        inv_row = inventory_df[inventory_df["product_id"] == product_id]
+        inv_row = inventory_store.get_product(product_id)
         current_stock = inv_row["stock_on_hand"].iloc[0] if not inv_row.empty and "stock_on_hand" in inv_row.columns else 1000  # fallback
         
         product_data = {
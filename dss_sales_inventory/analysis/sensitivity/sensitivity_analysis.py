@@ -73,10 +73,12 @@ def load_and_enrich_data(data_dict: dict, logger) -> pd.DataFrame:
     """
     Automatically detects and merges all available pipeline source files.
     Aligns data on 'product_id'.
+    Returns a new frame; with copy-on-write the pipeline's scenarios frame is
+    shared until a column is modified, and is never modified itself.
     """
     # 1. Initialize Base Data (Scenarios)
     if "scenarios" in data_dict and isinstance(data_dict["scenarios"], pd.DataFrame):
-        df = data_dict["scenarios"].copy()
+        df = data_dict["scenarios"].copy(deep=False)
         logger.info(f"Loaded {len(df)} base rows from pipeline memory.")
     elif os.path.exists(SENSITIVITY_CONFIG["paths"]["sources"]["scenarios"]):
         df = pd.read_excel(SENSITIVITY_CONFIG["paths"]["sources"]["scenarios"])
@@ -1,4 +1,5 @@
 import os
+import sys
 import pandas as pd
 import matplotlib
 matplotlib.use('Agg')  # اجعل الرسم بدون واجهة رسومية
@@ -8,6 +9,14 @@ from pathlib import Path
 import argparse
 import itertools
 
+# Project root on sys.path so shared modules resolve when run as a script
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from features.feature_store import FeatureStore, CURRENT_FILE  # noqa: E402
+from features.features import ROLLING_FEATURE_CONFIG  # noqa: E402
+
 # ========================
 # Helper Functions
 # ========================
@@ -21,20 +30,17 @@ def load_csv_safely(path: Path) -> pd.DataFrame:
         print(f"Warning: {path.name} is empty.")
     return df
 
-def find_value_column(df: pd.DataFrame) -> str:
-    """Select primary numeric column for trend analysis."""
-    numeric_cols = df.select_dtypes(include=['float64', 'int64']).columns.tolist()
-    priority = ['avg_daily_sales', 'total_revenue']
-    for col in priority:
-        if col in numeric_cols:
-            return col
-    if numeric_cols:
-        return numeric_cols[0]
-    raise ValueError("No suitable numeric column found for analysis.")
-
 def calculate_rolling_mean(df: pd.DataFrame, value_col: str, window: int) -> pd.DataFrame:
-    """Calculate rolling mean per product_id."""
+    """
+    Rolling mean per product_id. Reads the precomputed demand_mean_{window}d feature when it
+    covers value_col (see features.ROLLING_FEATURE_CONFIG); other windows / columns, or
+    feature tables written before the rolling features, are rolled here.
+    """
     df = df.copy()
+    precomputed = f"demand_mean_{window}d"
+    if value_col == ROLLING_FEATURE_CONFIG['measure'] and precomputed in df.columns:
+        df['rolling_mean'] = df[precomputed]
+        return df
     df['rolling_mean'] = df.groupby('product_id')[value_col].transform(
         lambda x: x.rolling(window=window, min_periods=1).mean()
     )
@@ -81,7 +87,7 @@ def generate_insight(product_id: int, trend: str, demand_df: pd.DataFrame, inven
 def main(root_dir: str, rolling_window: int = 7, max_sample_products: int = 10):
     ROOT = Path(root_dir)
 
-    PRODUCT_PERF_VIEW = ROOT / 'reporting' / 'outputs' / 'product_performance_view.csv'
+    FEATURE_STORE = ROOT / 'data' / 'processed' / 'feature_store'
     DEMAND_PRESSURE_VIEW = ROOT / 'reporting' / 'outputs' / 'demand_pressure_view.csv'
     INVENTORY_STATUS_VIEW = ROOT / 'reporting' / 'outputs' / 'inventory_status_view.csv'
 
@@ -94,21 +100,20 @@ def main(root_dir: str, rolling_window: int = 7, max_sample_products: int = 10):
     PLOTS_DIR.mkdir(parents=True, exist_ok=True)
     REPORT_PATH.parent.mkdir(parents=True, exist_ok=True)
 
-    # Load DataFrames
-    perf_df = load_csv_safely(PRODUCT_PERF_VIEW)
+    # Load DataFrames: daily demand per product (with its rolling features) and the report views
+    if not (FEATURE_STORE / CURRENT_FILE).exists():
+        raise FileNotFoundError(f"Required feature store not found: {FEATURE_STORE}")
+    perf_store = FeatureStore.load(store_dir=str(FEATURE_STORE))
     demand_df = load_csv_safely(DEMAND_PRESSURE_VIEW)
     inventory_df = load_csv_safely(INVENTORY_STATUS_VIEW)
 
-    value_col = find_value_column(perf_df)
+    value_col = ROLLING_FEATURE_CONFIG['measure']
     print(f"Using '{value_col}' as primary metric for analysis.")
 
-    # إنشاء تواريخ وهمية إذا لم يكن موجود
-    if 'date' not in perf_df.columns:
-        perf_df['date'] = pd.to_datetime('2025-01-01') + pd.to_timedelta(
-            perf_df.groupby('product_id').cumcount(), unit='D'
-        )
-    perf_df = perf_df.sort_values(['product_id', 'date']).reset_index(drop=True)
-    perf_df = calculate_rolling_mean(perf_df, value_col, rolling_window)
+    # The latest snapshot is already sorted by (product_id, date) with product offsets;
+    # the rolling mean keeps row order, so the offsets still index the product blocks
+    perf_df = calculate_rolling_mean(perf_store.frame, value_col, rolling_window)
+    perf_store.frame = perf_df
 
     trends = {"up": 0, "down": 0, "stable": 0}
     colors = ['#1f77b4', '#ff7f0e', '#2ca02c', '#d62728', '#9467bd', '#8c564b', '#e377c2', '#7f7f7f', '#bcbd22', '#17becf']
@@ -118,8 +123,8 @@ def main(root_dir: str, rolling_window: int = 7, max_sample_products: int = 10):
         "# Time Series Trend Insights Report\n\n",
         f"**Analysis Date:** {pd.Timestamp('now').strftime('%Y-%m-%d')}\n",
         f"**Metric:** {value_col}\n",
-        f"**Rolling Window:** {rolling_window} periods\n\n",
-        "> **Note:** Synthetic dates used if no native date column. Trends via linear regression slope.\n\n"
+        f"**Rolling Window:** {rolling_window} days\n\n",
+        "> **Note:** Daily demand per product from inventory_features; rolling means are the precomputed demand windows. Trends via linear regression slope.\n\n"
     ]
 
     # ========================
@@ -128,14 +133,13 @@ def main(root_dir: str, rolling_window: int = 7, max_sample_products: int = 10):
     plt.figure(figsize=(14, 8))
     color_cycle = itertools.cycle(colors)
     marker_cycle = itertools.cycle(markers)
-    for pid in perf_df['product_id'].unique():
-        data = perf_df[perf_df['product_id'] == pid]
+    for pid, data in perf_store.iter_products():
         color = next(color_cycle)
         marker = next(marker_cycle)
         plt.plot(data['date'], data[value_col], color=color, alpha=0.6)
         plt.plot(data['date'], data['rolling_mean'], color=color, linestyle='--', alpha=0.5)
     plt.title(f"Combined Trends - All Products by {value_col}")
-    plt.xlabel("Date (Synthetic Index)")
+    plt.xlabel("Date")
     plt.ylabel(value_col)
     plt.grid(True, alpha=0.3)
     plt.tight_layout()
@@ -158,7 +162,7 @@ def main(root_dir: str, rolling_window: int = 7, max_sample_products: int = 10):
     color_cycle = itertools.cycle(colors)
     marker_cycle = itertools.cycle(markers)
     for i, pid in enumerate(top_products):
-        product_data = perf_df[perf_df['product_id'] == pid].copy()
+        product_data = perf_store.get_product(pid)
         if product_data.empty:
             continue
 
@@ -195,12 +199,12 @@ def main(root_dir: str, rolling_window: int = 7, max_sample_products: int = 10):
         marker = markers[i % len(markers)]
 
         plt.figure(figsize=(12, 7))
-        plt.plot(product_data['date'], product_data[value_col], label='Observed Values', color=color, marker=marker, markersize=8, linestyle='-')
-        plt.plot(product_data['date'], product_data['rolling_mean'], label=f'{rolling_window}-Period Rolling Mean', color=color, linestyle='--', linewidth=2.5, alpha=0.8)
+        plt.plot(product_data['date'], product_data[value_col], label='Observed Values', color=color, marker=marker, markersize=3, linestyle='-')
+        plt.plot(product_data['date'], product_data['rolling_mean'], label=f'{rolling_window}-Day Rolling Mean', color=color, linestyle='--', linewidth=2.5, alpha=0.8)
         plt.text(0.02, 0.98, f'Trend: {trend.upper()}', transform=plt.gca().transAxes, fontsize=14, fontweight='bold', verticalalignment='top', bbox=dict(facecolor='white', alpha=0.8, edgecolor=color))
         plt.annotate(f'Last: {last_value:.2f}', xy=(product_data['date'].iloc[-1], last_value), xytext=(10, 10), textcoords='offset points', fontsize=10, bbox=dict(facecolor='white', alpha=0.7))
         plt.title(f"Product {pid} — {value_col} Trend ({trend.upper()})")
-        plt.xlabel("Date (Synthetic Index)")
+        plt.xlabel("Date")
         plt.ylabel(value_col)
         plt.legend()
         plt.grid(True, alpha=0.3)
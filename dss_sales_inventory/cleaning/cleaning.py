@@ -1,15 +1,98 @@
 # dss_sales_inventory/cleaning/cleaning.py
 import os
+import shutil
+import tempfile
 import pandas as pd
 import logging
 
+from ingestion.ingestion import normalize_region
+from cleaning.key_index import (
+    SALES_KEY_FILE,
+    INVENTORY_KEY_FILE,
+    encode_sales_keys,
+    encode_inventory_keys,
+    load_key_index,
+    find_seen_keys,
+    find_indexed_products,
+    rebuild_key_index,
+    append_keys,
+)
+from cleaning.partitions import (
+    STATS_FILE,
+    iter_month_partitions,
+    write_partition,
+    write_partition_stats,
+)
+
 # Logger configuration (assumed configured at project level)
 dss_logger = logging.getLogger('dss_logger')
 
-def run_cleaning(data: dict, correlation_id: str) -> dict:
+# Critical columns that may never be null
+CRITICAL_SALES_COLS = ['sale_id', 'product_id', 'date', 'quantity', 'unit_price']
+CRITICAL_INVENTORY_COLS = ['product_id', 'date', 'stock_on_hand', 'reorder_point', 'lead_time_days', 'unit_cost']
+
+PROCESSED_DIR = r"C:\Data_Analysis\dss_sales_inventory\data\processed"
+
+
+def _standardize_frame(df: pd.DataFrame, critical_cols: list, name: str) -> pd.DataFrame:
+    """
+    Convert the date column, reject critical nulls and fill missing revenue.
+    Returns a new frame; the input is left untouched.
+    """
+    # ======================
+    # Convert 'date' columns
+    # ======================
+    try:
+        df = df.assign(date=pd.to_datetime(df['date']))
+    except Exception as e:
+        raise ValueError(f"Date conversion failed: {e}")
+
+    # ======================
+    # Handle critical nulls
+    # ======================
+    if df[critical_cols].isnull().any().any():
+        raise ValueError(f"Critical nulls found in {name} data")
+
+    # Fill missing revenue with quantity * unit_price if revenue column exists
+    if 'revenue' in df.columns:
+        df = df.assign(revenue=df['revenue'].fillna(df['quantity'] * df['unit_price']))
+
+    # Sales region (raw CSVs read here directly may predate the region column)
+    if name == 'sales':
+        df = normalize_region(df)
+
+    return df
+
+
+def _append_columns(path: str, df: pd.DataFrame) -> list:
+    """
+    Column order to append `df` to the cleaned CSV at `path`: the file's existing header, so
+    appended rows line up with it (None when there is no file yet). A batch whose columns differ
+    from the header (e.g. a region column the file predates) is refused; a full run rewrites
+    the file with the new columns.
+    """
+    if not os.path.exists(path) or os.path.getsize(path) == 0:
+        return None
+    header = list(pd.read_csv(path, nrows=0).columns)
+    if set(header) != set(df.columns):
+        raise ValueError(
+            f"Cannot append to {path}: batch columns {sorted(df.columns)} do not match the file header "
+            f"{header}. Run a full cleaning to rewrite it."
+        )
+    return header
+
+
+def run_cleaning(data: dict, correlation_id: str, incremental: bool = False) -> dict:
     """
     Clean and validate raw sales and inventory DataFrames, convert types, handle critical nulls,
     remove duplicates, perform referential and time series validation, and save cleaned CSVs.
+    The input frames are never mutated (see the copy-on-write note in pipeline.py).
+
+    Dedup keys (sale_id and (product_id, date)) are kept in a persistent sorted key index
+    under data/processed/key_index. A full run rebuilds the index from the cleaned output.
+    With incremental=True the input is treated as a new batch: rows whose keys were loaded
+    by a previous run are dropped, the batch is appended to the cleaned CSVs (in the column
+    order of their existing header) and its keys are merged into the index.
     """
     if data is None or 'sales' not in data or 'inventory' not in data or data['sales'] is None or data['inventory'] is None:
         error_msg = "Invalid or missing data from ingestion stage"
@@ -28,33 +111,12 @@ def run_cleaning(data: dict, correlation_id: str) -> dict:
         extra={"run_id": correlation_id, "stage": "CLEANING", "function": "run_cleaning", "rows_in": rows_in_total, "rows_out": None, "status": "STARTED"}
     )
 
-    # Extract DataFrames
-    sales_df = data['sales'].copy()
-    inventory_df = data['inventory'].copy()
+    # Extract DataFrames (read-only: every step below derives a new frame)
+    sales_df = data['sales']
+    inventory_df = data['inventory']
 
-    # ======================
-    # Convert 'date' columns
-    # ======================
-    try:
-        sales_df['date'] = pd.to_datetime(sales_df['date'])
-        inventory_df['date'] = pd.to_datetime(inventory_df['date'])
-    except Exception as e:
-        raise ValueError(f"Date conversion failed: {e}")
-
-    # ======================
-    # Handle critical nulls
-    # ======================
-    critical_sales_cols = ['sale_id', 'product_id', 'date', 'quantity', 'unit_price']
-    critical_inventory_cols = ['product_id', 'date', 'stock_on_hand', 'reorder_point', 'lead_time_days', 'unit_cost']
-
-    if sales_df[critical_sales_cols].isnull().any().any():
-        raise ValueError("Critical nulls found in sales data")
-    if inventory_df[critical_inventory_cols].isnull().any().any():
-        raise ValueError("Critical nulls found in inventory data")
-
-    # Fill missing revenue with quantity * unit_price if revenue column exists
-    if 'revenue' in sales_df.columns:
-        sales_df['revenue'] = sales_df['revenue'].fillna(sales_df['quantity'] * sales_df['unit_price'])
+    sales_df = _standardize_frame(sales_df, CRITICAL_SALES_COLS, 'sales')
+    inventory_df = _standardize_frame(inventory_df, CRITICAL_INVENTORY_COLS, 'inventory')
 
     # ======================
     # Remove duplicates
@@ -62,6 +124,28 @@ def run_cleaning(data: dict, correlation_id: str) -> dict:
     sales_df = sales_df.drop_duplicates(subset=['sale_id'])
     inventory_df = inventory_df.drop_duplicates(subset=['product_id', 'date'])
 
+    processed_dir = PROCESSED_DIR
+    key_index_dir = os.path.join(processed_dir, "key_index")
+    sales_key_path = os.path.join(key_index_dir, SALES_KEY_FILE)
+    inventory_key_path = os.path.join(key_index_dir, INVENTORY_KEY_FILE)
+
+    sales_keys = encode_sales_keys(sales_df)
+    inventory_keys = encode_inventory_keys(inventory_df)
+
+    # Drop rows already loaded by previous batches
+    if incremental:
+        seen_sales = find_seen_keys(sales_keys, load_key_index(sales_key_path))
+        seen_inventory = find_seen_keys(inventory_keys, load_key_index(inventory_key_path))
+        if seen_sales.any() or seen_inventory.any():
+            dss_logger.warning(
+                f"Dropped {int(seen_sales.sum())} sales and {int(seen_inventory.sum())} inventory rows already loaded by previous batches",
+                extra={"run_id": correlation_id, "stage": "CLEANING", "function": "run_cleaning", "rows_in": rows_in_total, "rows_out": None, "status": "WARNING"}
+            )
+        sales_df = sales_df[~seen_sales]
+        inventory_df = inventory_df[~seen_inventory]
+        sales_keys = sales_keys[~seen_sales]
+        inventory_keys = inventory_keys[~seen_inventory]
+
     # ======================
     # Time series validation
     # ======================
@@ -82,6 +166,11 @@ def run_cleaning(data: dict, correlation_id: str) -> dict:
     active_products = sales_products
 
     missing_in_inventory = sales_products - inventory_products
+    if incremental and missing_in_inventory:
+        # Inventory for these products may have been loaded by a previous batch
+        candidates = sorted(missing_in_inventory)
+        indexed = find_indexed_products(candidates, load_key_index(inventory_key_path))
+        missing_in_inventory = {pid for pid, known in zip(candidates, indexed) if not known}
     if missing_in_inventory:
         raise ValueError(f"Products in sales missing in inventory: {missing_in_inventory}")
 
@@ -91,13 +180,28 @@ def run_cleaning(data: dict, correlation_id: str) -> dict:
     # ======================
     # Save cleaned CSVs
     # ======================
-    processed_dir = r"C:\Data_Analysis\dss_sales_inventory\data\processed"
     os.makedirs(processed_dir, exist_ok=True)
     sales_cleaned_path = os.path.join(processed_dir, "sales_cleaned.csv")
     inventory_cleaned_path = os.path.join(processed_dir, "inventory_cleaned.csv")
 
-    sales_df.to_csv(sales_cleaned_path, index=False)
-    inventory_df.to_csv(inventory_cleaned_path, index=False)
+    if incremental:
+        # Both headers are checked before anything is written
+        appends = [
+            (frame, path, _append_columns(path, frame))
+            for frame, path in [(sales_df, sales_cleaned_path), (inventory_df, inventory_cleaned_path)]
+        ]
+        for frame, path, header in appends:
+            if header is None:
+                frame.to_csv(path, index=False)
+            else:
+                frame[header].to_csv(path, mode='a', header=False, index=False)
+        append_keys(sales_key_path, sales_keys)
+        append_keys(inventory_key_path, inventory_keys)
+    else:
+        sales_df.to_csv(sales_cleaned_path, index=False)
+        inventory_df.to_csv(inventory_cleaned_path, index=False)
+        rebuild_key_index(sales_key_path, sales_keys)
+        rebuild_key_index(inventory_key_path, inventory_keys)
 
     # Compute rows_out for logging
     rows_out_sales = len(sales_df)
@@ -110,3 +214,120 @@ def run_cleaning(data: dict, correlation_id: str) -> dict:
     )
 
     return {'sales': sales_df, 'inventory': inventory_df}
+
+
+def _check_partition_gaps(df: pd.DataFrame, name: str, last_dates: pd.Series) -> pd.Series:
+    """
+    Vectorized gap check for one month partition. `last_dates` carries the latest date per
+    product from earlier partitions so gaps across partition boundaries are detected too.
+    Returns the updated latest date per product.
+    """
+    ordered = df[['product_id', 'date']].sort_values(['product_id', 'date'])
+    prev_dates = ordered.groupby('product_id')['date'].shift()
+    carried = last_dates.reindex(ordered['product_id'].to_numpy()).to_numpy()
+    prev_dates = prev_dates.fillna(pd.Series(carried, index=ordered.index))
+
+    gaps = (ordered['date'] - prev_dates).dt.days > 30
+    if gaps.any():
+        product_id = ordered.loc[gaps, 'product_id'].iloc[0]
+        raise ValueError(f"Gap >30 days for product_id {product_id} in {name}")
+
+    return ordered.groupby('product_id')['date'].max().combine_first(last_dates)
+
+
+def run_partitioned_cleaning(data: dict, correlation_id: str, chunksize: int = 500_000) -> dict:
+    """
+    Out-of-core variant of run_cleaning that works one calendar month at a time.
+
+    `data['sales']` / `data['inventory']` may be DataFrames or paths to raw CSVs; CSV sources
+    are streamed in chunks and staged per month, so the full history is never held in memory.
+    Each month is cleaned with the same rules as run_cleaning. Duplicates across months are
+    caught through a key index (first occurrence in date order wins) and gaps across month
+    boundaries through the last date carried per product. The index lives in the dataset
+    directory (<dataset>/_key_index) and is rebuilt with it; the key index of the cleaned
+    CSVs used by run_cleaning(incremental=True) is not touched.
+
+    Output layout (columnar when pyarrow is installed, CSV otherwise):
+        data/processed/sales_cleaned/year=2024/month=07/part-0.parquet
+        data/processed/sales_cleaned/_partition_stats.json
+        data/processed/sales_cleaned/_key_index/sales_keys.npy
+    The statistics file records rows, date range and numeric min/max per partition so
+    downstream readers can prune partitions by date (see cleaning.partitions.read_partitions).
+    """
+    if data is None or data.get('sales') is None or data.get('inventory') is None:
+        error_msg = "Invalid or missing data from ingestion stage"
+        dss_logger.error(
+            error_msg,
+            extra={"run_id": correlation_id, "stage": "CLEANING", "function": "run_partitioned_cleaning", "rows_in": 0, "rows_out": 0, "status": "FAILED"}
+        )
+        raise ValueError(error_msg)
+
+    dss_logger.info(
+        "Partitioned cleaning started",
+        extra={"run_id": correlation_id, "stage": "CLEANING", "function": "run_partitioned_cleaning", "rows_in": None, "rows_out": None, "status": "STARTED"}
+    )
+
+    datasets = [
+        ('sales', CRITICAL_SALES_COLS, ['sale_id'], encode_sales_keys, SALES_KEY_FILE),
+        ('inventory', CRITICAL_INVENTORY_COLS, ['product_id', 'date'], encode_inventory_keys, INVENTORY_KEY_FILE),
+    ]
+
+    # Only a previous partitioned output (or an empty directory) is ever replaced
+    for name, *_ in datasets:
+        dataset_dir = os.path.join(PROCESSED_DIR, f"{name}_cleaned")
+        if os.path.isdir(dataset_dir) and os.listdir(dataset_dir) and not os.path.exists(os.path.join(dataset_dir, STATS_FILE)):
+            raise ValueError(f"Refusing to replace {dataset_dir}: not a partitioned dataset ({STATS_FILE} missing)")
+
+    result = {}
+    products = {}
+    rows_in_total = 0
+    rows_out_total = 0
+
+    for name, critical_cols, dedup_cols, encode_keys, key_file in datasets:
+        dataset_dir = os.path.join(PROCESSED_DIR, f"{name}_cleaned")
+        if os.path.exists(dataset_dir):
+            shutil.rmtree(dataset_dir)
+        os.makedirs(dataset_dir)
+
+        # Fresh run: the dataset's own key index is rebuilt partition by partition
+        key_path = os.path.join(dataset_dir, "_key_index", key_file)
+
+        stats = []
+        last_dates = pd.Series(dtype='datetime64[ns]')
+        products[name] = set()
+
+        with tempfile.TemporaryDirectory() as staging_dir:
+            for period, frame in iter_month_partitions(data[name], chunksize=chunksize, staging_dir=staging_dir):
+                rows_in_total += len(frame)
+
+                frame = _standardize_frame(frame, critical_cols, name)
+                frame = frame.drop_duplicates(subset=dedup_cols)
+
+                keys = encode_keys(frame)
+                seen = find_seen_keys(keys, load_key_index(key_path))
+                frame = frame[~seen]
+
+                last_dates = _check_partition_gaps(frame, name, last_dates)
+                products[name].update(frame['product_id'].unique())
+
+                stats.append(write_partition(frame, dataset_dir, period))
+                append_keys(key_path, keys[~seen])
+                rows_out_total += len(frame)
+
+        write_partition_stats(dataset_dir, stats)
+        result[name] = dataset_dir
+        result[f"{name}_partitions"] = stats
+
+    # ======================
+    # Referential integrity
+    # ======================
+    missing_in_inventory = products['sales'] - products['inventory']
+    if missing_in_inventory:
+        raise ValueError(f"Products in sales missing in inventory: {missing_in_inventory}")
+
+    dss_logger.info(
+        f"Partitioned cleaning completed successfully ({len(result['sales_partitions'])} sales and {len(result['inventory_partitions'])} inventory partitions)",
+        extra={"run_id": correlation_id, "stage": "CLEANING", "function": "run_partitioned_cleaning", "rows_in": rows_in_total, "rows_out": rows_out_total, "status": "SUCCESS"}
+    )
+
+    return result
@@ -0,0 +1,115 @@
+# dss_sales_inventory/cleaning/key_index.py
+import os
+import numpy as np
+import pandas as pd
+import logging
+
+# Logger configuration (assumed configured at project level)
+dss_logger = logging.getLogger('dss_logger')
+
+# Key index files (one sorted int64 array per dataset, stored as .npy)
+SALES_KEY_FILE = "sales_keys.npy"
+INVENTORY_KEY_FILE = "inventory_keys.npy"
+
+# Number of existing keys rewritten per step when merging new keys into an index
+MERGE_BLOCK_SIZE = 1 << 20
+
+# Offset applied to day numbers so dates before 1970 still pack into the low 32 bits
+_DAY_OFFSET = 1 << 31
+
+
+def encode_sales_keys(sales_df: pd.DataFrame) -> np.ndarray:
+    """Return the sales dedup keys (sale_id) as an int64 array."""
+    return sales_df['sale_id'].to_numpy(dtype='int64')
+
+
+def encode_inventory_keys(inventory_df: pd.DataFrame) -> np.ndarray:
+    """
+    Pack the inventory dedup key (product_id, date) into a single int64:
+    product_id in the high 32 bits, day number in the low 32 bits.
+    """
+    product_ids = inventory_df['product_id'].to_numpy(dtype='int64')
+    days = pd.to_datetime(inventory_df['date']).to_numpy(dtype='datetime64[D]').astype('int64')
+    return (product_ids << 32) + (days + _DAY_OFFSET)
+
+
+def load_key_index(path: str) -> np.ndarray:
+    """
+    Open a persisted key index read-only. The array is memory-mapped so lookups
+    only touch the pages visited by the binary search. Missing index -> empty array.
+    """
+    if not os.path.exists(path):
+        return np.empty(0, dtype='int64')
+    return np.load(path, mmap_mode='r')
+
+
+def find_seen_keys(keys: np.ndarray, index: np.ndarray) -> np.ndarray:
+    """Boolean mask of `keys` already present in the sorted `index` (O(batch log N))."""
+    if len(index) == 0 or len(keys) == 0:
+        return np.zeros(len(keys), dtype=bool)
+    pos = np.searchsorted(index, keys)
+    pos = np.minimum(pos, len(index) - 1)
+    return np.asarray(index[pos] == keys)
+
+
+def find_indexed_products(product_ids, index: np.ndarray) -> np.ndarray:
+    """Boolean mask of product_ids that own at least one key in a sorted inventory key index."""
+    product_ids = np.asarray(product_ids, dtype='int64')
+    if len(index) == 0 or len(product_ids) == 0:
+        return np.zeros(len(product_ids), dtype=bool)
+    lo = np.searchsorted(index, product_ids << 32)
+    # Last key of the product (not the next product's first, which overflows at 2**31 - 1)
+    hi = np.searchsorted(index, (product_ids << 32) + 0xFFFFFFFF, side='right')
+    return hi > lo
+
+
+def rebuild_key_index(path: str, keys: np.ndarray) -> int:
+    """Replace the index at `path` with the sorted unique `keys`. Returns the index size."""
+    sorted_keys = np.unique(np.asarray(keys, dtype='int64'))
+    _atomic_save(path, sorted_keys)
+    return len(sorted_keys)
+
+
+def append_keys(path: str, new_keys: np.ndarray) -> int:
+    """
+    Merge `new_keys` (not yet present in the index) into the index at `path`.
+
+    The existing index is streamed block by block into a new memory-mapped file,
+    so memory stays bounded by MERGE_BLOCK_SIZE regardless of history size.
+    Returns the new index size.
+    """
+    new_sorted = np.unique(np.asarray(new_keys, dtype='int64'))
+    index = load_key_index(path)
+
+    if len(index) == 0:
+        _atomic_save(path, new_sorted)
+        return len(new_sorted)
+    if len(new_sorted) == 0:
+        return len(index)
+
+    # Final position of each new key = its insertion point + number of new keys before it
+    insert_pos = np.searchsorted(index, new_sorted)
+    total = len(index) + len(new_sorted)
+
+    tmp_path = path + ".tmp"
+    merged = np.lib.format.open_memmap(tmp_path, mode='w+', dtype='int64', shape=(total,))
+    merged[insert_pos + np.arange(len(new_sorted))] = new_sorted
+
+    for start in range(0, len(index), MERGE_BLOCK_SIZE):
+        stop = min(start + MERGE_BLOCK_SIZE, len(index))
+        old_pos = np.arange(start, stop)
+        shift = np.searchsorted(insert_pos, old_pos, side='right')
+        merged[old_pos + shift] = index[start:stop]
+
+    merged.flush()
+    del merged, index
+    os.replace(tmp_path, path)
+    return total
+
+
+def _atomic_save(path: str, keys: np.ndarray) -> None:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'wb') as f:
+        np.save(f, keys)
+    os.replace(tmp_path, path)
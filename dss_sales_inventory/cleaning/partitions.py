@@ -0,0 +1,149 @@
+# dss_sales_inventory/cleaning/partitions.py
+import os
+import json
+import pandas as pd
+import logging
+
+# Logger configuration (assumed configured at project level)
+dss_logger = logging.getLogger('dss_logger')
+
+# Columnar output needs pyarrow; fall back to CSV partitions without it
+try:
+    import pyarrow  # noqa: F401
+    PARTITION_FORMAT = "parquet"
+except ImportError:
+    PARTITION_FORMAT = "csv"
+
+STATS_FILE = "_partition_stats.json"
+
+
+def partition_name(period: pd.Period) -> str:
+    """Partition key as recorded in the statistics file, e.g. year=2024/month=07."""
+    return f"year={period.year}/month={period.month:02d}"
+
+
+def partition_path(dataset_dir: str, period: pd.Period) -> str:
+    """Hive-style partition directory, e.g. <dataset_dir>/year=2024/month=07."""
+    return os.path.join(dataset_dir, *partition_name(period).split("/"))
+
+
+def iter_month_partitions(source, chunksize: int = 500_000, staging_dir: str = None):
+    """
+    Yield (period, DataFrame) for each calendar month of `source` in ascending order.
+
+    `source` is either a DataFrame or a path to a CSV file. CSV sources are streamed
+    in chunks and spilled to one staging file per month under `staging_dir`, so only
+    one chunk or one month is held in memory at a time.
+    """
+    if isinstance(source, pd.DataFrame):
+        months = pd.to_datetime(source['date']).dt.to_period('M')
+        for period, frame in source.groupby(months, sort=True):
+            yield period, frame
+        return
+
+    if staging_dir is None:
+        raise ValueError("staging_dir is required when partitioning a CSV source")
+    os.makedirs(staging_dir, exist_ok=True)
+
+    staged = {}
+    for chunk in pd.read_csv(source, chunksize=chunksize):
+        months = pd.to_datetime(chunk['date']).dt.to_period('M')
+        for period, frame in chunk.groupby(months):
+            path = os.path.join(staging_dir, f"{period}.csv")
+            frame.to_csv(path, mode='a', header=period not in staged, index=False)
+            staged[period] = path
+
+    for period in sorted(staged):
+        yield period, pd.read_csv(staged[period])
+        os.remove(staged[period])
+
+
+def write_partition(df: pd.DataFrame, dataset_dir: str, period: pd.Period) -> dict:
+    """Write one month partition and return its statistics entry."""
+    part_dir = partition_path(dataset_dir, period)
+    os.makedirs(part_dir, exist_ok=True)
+
+    file_path = os.path.join(part_dir, f"part-0.{PARTITION_FORMAT}")
+    if PARTITION_FORMAT == "parquet":
+        df.to_parquet(file_path, index=False)
+    else:
+        df.to_csv(file_path, index=False)
+
+    columns = {}
+    for col in df.select_dtypes(include='number').columns:
+        columns[col] = {
+            "min": _json_scalar(df[col].min()),
+            "max": _json_scalar(df[col].max()),
+            "nulls": int(df[col].isnull().sum()),
+        }
+
+    return {
+        "partition": partition_name(period),
+        "path": os.path.relpath(file_path, dataset_dir).replace(os.sep, "/"),
+        "rows": int(len(df)),
+        "min_date": df['date'].min().strftime('%Y-%m-%d') if len(df) else None,
+        "max_date": df['date'].max().strftime('%Y-%m-%d') if len(df) else None,
+        "columns": columns,
+    }
+
+
+def write_partition_stats(dataset_dir: str, stats: list) -> str:
+    """Persist partition statistics next to the partitions."""
+    stats_path = os.path.join(dataset_dir, STATS_FILE)
+    with open(stats_path, 'w', encoding='utf-8') as f:
+        json.dump({"format": PARTITION_FORMAT, "partitions": stats}, f, indent=2)
+    return stats_path
+
+
+def load_partition_stats(dataset_dir: str) -> list:
+    stats_path = os.path.join(dataset_dir, STATS_FILE)
+    if not os.path.exists(stats_path):
+        raise FileNotFoundError(f"Partition statistics not found: {stats_path}")
+    with open(stats_path, 'r', encoding='utf-8') as f:
+        return json.load(f)["partitions"]
+
+
+def prune_partitions(dataset_dir: str, start_date=None, end_date=None) -> list:
+    """Return the statistics entries of partitions whose date range overlaps [start_date, end_date]."""
+    start = pd.Timestamp(start_date) if start_date is not None else None
+    end = pd.Timestamp(end_date) if end_date is not None else None
+
+    selected = []
+    for entry in load_partition_stats(dataset_dir):
+        if entry["rows"] == 0:
+            continue
+        if start is not None and pd.Timestamp(entry["max_date"]) < start:
+            continue
+        if end is not None and pd.Timestamp(entry["min_date"]) > end:
+            continue
+        selected.append(entry)
+    return selected
+
+
+def read_partition(dataset_dir: str, entry: dict) -> pd.DataFrame:
+    """Read the partition file of one statistics entry."""
+    file_path = os.path.join(dataset_dir, entry["path"])
+    if file_path.endswith(".parquet"):
+        return pd.read_parquet(file_path)
+    return pd.read_csv(file_path, parse_dates=['date'])
+
+
+def read_partitions(dataset_dir: str, start_date=None, end_date=None) -> pd.DataFrame:
+    """Read only the partitions overlapping the date range, then trim to the exact range."""
+    frames = [read_partition(dataset_dir, entry) for entry in prune_partitions(dataset_dir, start_date, end_date)]
+
+    if not frames:
+        return pd.DataFrame()
+
+    df = pd.concat(frames, ignore_index=True)
+    if start_date is not None:
+        df = df[df['date'] >= pd.Timestamp(start_date)]
+    if end_date is not None:
+        df = df[df['date'] <= pd.Timestamp(end_date)]
+    return df
+
+
+def _json_scalar(value):
+    if pd.isnull(value):
+        return None
+    return value.item() if hasattr(value, 'item') else value
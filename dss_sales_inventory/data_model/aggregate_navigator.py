@@ -0,0 +1,122 @@
+# dss_sales_inventory/data_model/aggregate_navigator.py
+"""
+Aggregate navigator for the star schema.
+
+The schema builder maintains summary tables next to fact_sales (see AGGREGATES and
+build_star_schema.refresh_aggregates). Queries are described by the dimensions they
+group by and the measures they need; route() picks the smallest table whose grain
+and stored columns can answer, falling back to fact_sales.
+
+Queries run on any analytics backend (data_model/backends.py).
+
+Example:
+    with get_backend(read_only=True) as db:
+        by_product = query(db, ['revenue', 'profit'], group_by=['product_id'])
+"""
+import pandas as pd
+
+FACT_TABLE = "fact_sales"
+
+# Dimensions available on fact_sales, as expressions over its columns.
+# year_month is derived from the YYYYMMDD smart key (20240712 / 100 -> 202407); the CAST keeps
+# it an integer on backends where '/' is float division (DuckDB).
+FACT_GRAIN = {
+    "product_id": "product_id",
+    "date_id": "date_id",
+    "region_id": "region_id",
+    "year_month": "CAST(date_id / 100 AS INTEGER)",
+}
+
+# Aggregate tables, smallest (expected row count) first.
+# grain: dimension -> expression over fact_sales; columns: stored column -> aggregate over fact_sales
+AGGREGATES = [
+    {
+        "table": "agg_product_totals",
+        "grain": {"product_id": "product_id"},
+        "columns": {
+            "fact_rows": "COUNT(*)",
+            "quantity": "SUM(quantity)",
+            "revenue": "SUM(revenue)",
+            "cost": "SUM(cost)",
+            "first_date_id": "MIN(date_id)",
+            "last_date_id": "MAX(date_id)",
+        },
+    },
+    {
+        "table": "agg_daily_sales",
+        "grain": {"date_id": "date_id"},
+        "columns": {
+            "fact_rows": "COUNT(*)",
+            "quantity": "SUM(quantity)",
+            "revenue": "SUM(revenue)",
+            "cost": "SUM(cost)",
+        },
+    },
+    {
+        "table": "agg_product_month",
+        "grain": {"product_id": "product_id", "year_month": FACT_GRAIN["year_month"]},
+        "columns": {
+            "fact_rows": "COUNT(*)",
+            "quantity": "SUM(quantity)",
+            "revenue": "SUM(revenue)",
+            "cost": "SUM(cost)",
+        },
+    },
+]
+
+# Measures: name -> (expression on fact_sales, roll-up expression on an aggregate, stored columns it needs)
+MEASURES = {
+    "fact_rows": ("COUNT(*)", "SUM(fact_rows)", ["fact_rows"]),
+    "quantity": ("SUM(quantity)", "SUM(quantity)", ["quantity"]),
+    "revenue": ("SUM(revenue)", "SUM(revenue)", ["revenue"]),
+    "cost": ("SUM(cost)", "SUM(cost)", ["cost"]),
+    "profit": ("SUM(revenue - cost)", "SUM(revenue) - SUM(cost)", ["revenue", "cost"]),
+    "first_date_id": ("MIN(date_id)", "MIN(first_date_id)", ["first_date_id"]),
+    "last_date_id": ("MAX(date_id)", "MAX(last_date_id)", ["last_date_id"]),
+}
+
+
+def route(measures, group_by=(), available=None) -> str:
+    """
+    Name of the smallest table that can answer `measures` grouped by `group_by`.
+    `available` limits the choice to tables that exist (all aggregates when None).
+    """
+    unknown = [m for m in measures if m not in MEASURES]
+    if unknown:
+        raise ValueError(f"Unknown measures: {unknown}")
+    unknown = [d for d in group_by if d not in FACT_GRAIN]
+    if unknown:
+        raise ValueError(f"Unknown dimensions: {unknown}")
+
+    for spec in AGGREGATES:
+        if available is not None and spec["table"] not in available:
+            continue
+        if not set(group_by) <= set(spec["grain"]):
+            continue
+        if all(col in spec["columns"] for m in measures for col in MEASURES[m][2]):
+            return spec["table"]
+    return FACT_TABLE
+
+
+def build_query(measures, group_by=(), available=None) -> str:
+    """SELECT statement for `measures` by `group_by`, routed to the smallest answering table."""
+    table = route(measures, group_by, available)
+    if table == FACT_TABLE:
+        dims = [f"{FACT_GRAIN[d]} AS {d}" for d in group_by]
+        group_exprs = [FACT_GRAIN[d] for d in group_by]
+        values = [f"{MEASURES[m][0]} AS {m}" for m in measures]
+    else:
+        dims = list(group_by)
+        group_exprs = list(group_by)
+        values = [f"{MEASURES[m][1]} AS {m}" for m in measures]
+
+    sql = f"SELECT {', '.join(dims + values)} FROM {table}"
+    if group_by:
+        sql += f" GROUP BY {', '.join(group_exprs)} ORDER BY {', '.join(group_exprs)}"
+    return sql
+
+
+def query(db, measures, group_by=()) -> pd.DataFrame:
+    """Run a routed aggregate query on a backend; tables missing from the database are skipped."""
+    sql = build_query(measures, group_by, available=db.table_names())
+    return db.query(sql)
@@ -0,0 +1,174 @@
+# dss_sales_inventory/data_model/backends.py
+"""
+Analytical database backends.
+
+The star schema is always built and validated in SQLite (analysis/analytics.db). The
+analytical readers (SQL layer, dashboards, decision brief) go through get_backend(), so
+their scan-and-aggregate queries can run on DuckDB instead: an embedded columnar engine
+on a local file (analysis/analytics.duckdb) that the builder mirrors from SQLite.
+
+Selection: ANALYTICS_BACKEND_CONFIG["backend"], overridable with the environment variable
+DSS_ANALYTICS_BACKEND=sqlite|duckdb. DuckDB is optional (pip install duckdb).
+
+Both backends accept the same SQL for the project's queries ('?' parameters, standard
+aggregates and window functions). One dialect difference matters here: DuckDB's '/' is
+float division on integers, so integer bucketing is written CAST(a / b AS INTEGER).
+"""
+import os
+import sqlite3
+import pandas as pd
+
+# DuckDB is optional; SQLite stays the default backend without it
+try:
+    import duckdb
+except ImportError:
+    duckdb = None
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+ANALYTICS_BACKEND_CONFIG = {
+    "backend": os.getenv("DSS_ANALYTICS_BACKEND", "sqlite"),
+    "paths": {
+        "sqlite": os.path.join(PROJECT_ROOT, "analysis", "analytics.db"),
+        "duckdb": os.path.join(PROJECT_ROOT, "analysis", "analytics.duckdb"),
+    },
+}
+
+
+# Declared column types per dtype kind for SQLiteBackend.write_frame (those of DataFrame.to_sql)
+SQLITE_TYPES = {"i": "INTEGER", "u": "INTEGER", "b": "INTEGER", "f": "REAL", "M": "TIMESTAMP"}
+
+
+class SQLiteBackend:
+    """sqlite3 connection behind the backend interface."""
+
+    name = "sqlite"
+
+    def __init__(self, path: str, read_only: bool = False):
+        self.path = str(path)
+        if read_only:
+            self.conn = sqlite3.connect(f"file:{self.path}?mode=ro", uri=True)
+        else:
+            self.conn = sqlite3.connect(self.path)
+
+    def query(self, sql: str, params=None) -> pd.DataFrame:
+        return pd.read_sql_query(sql, self.conn, params=params)
+
+    def execute(self, sql: str, params=None):
+        return self.conn.execute(sql, params or ())
+
+    def table_names(self) -> set:
+        rows = self.conn.execute("SELECT name FROM sqlite_master WHERE type IN ('table', 'view')").fetchall()
+        return {row[0] for row in rows}
+
+    def write_frame(self, table: str, df: pd.DataFrame) -> None:
+        """
+        Create or replace `table` with the contents of df. Written on this connection without
+        committing (DataFrame.to_sql commits), so a replace belongs to the caller's transaction.
+        """
+        columns = ", ".join(f'"{col}" {SQLITE_TYPES.get(df[col].dtype.kind, "TEXT")}' for col in df.columns)
+        self.conn.execute(f'DROP TABLE IF EXISTS "{table}"')
+        self.conn.execute(f'CREATE TABLE "{table}" ({columns})')
+        self.insert_frame(table, df)
+
+    def insert_frame(self, table: str, df: pd.DataFrame) -> None:
+        """Append df to the existing `table` (columns matched by name)."""
+        columns = list(df.columns)
+        self.conn.executemany(
+            f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})",
+            df.itertuples(index=False, name=None)
+        )
+
+    def commit(self) -> None:
+        self.conn.commit()
+
+    def rollback(self) -> None:
+        self.conn.rollback()
+
+    def close(self) -> None:
+        self.conn.commit()
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class DuckDBBackend:
+    """DuckDB connection (local file) behind the backend interface."""
+
+    name = "duckdb"
+
+    def __init__(self, path: str, read_only: bool = False):
+        if duckdb is None:
+            raise ImportError("The duckdb backend requires the duckdb package (pip install duckdb)")
+        self.path = str(path)
+        self.conn = duckdb.connect(self.path, read_only=read_only)
+
+    def query(self, sql: str, params=None) -> pd.DataFrame:
+        return self.conn.execute(sql, params or []).df()
+
+    def execute(self, sql: str, params=None):
+        return self.conn.execute(sql, params or [])
+
+    def table_names(self) -> set:
+        rows = self.conn.execute("SELECT table_name FROM information_schema.tables").fetchall()
+        return {row[0] for row in rows}
+
+    def write_frame(self, table: str, df: pd.DataFrame) -> None:
+        """Create or replace `table` with the contents of df (columnar scan of the frame, no row binding)."""
+        self.conn.register("_write_frame", df)
+        try:
+            self.conn.execute(f"CREATE OR REPLACE TABLE {table} AS SELECT * FROM _write_frame")
+        finally:
+            self.conn.unregister("_write_frame")
+
+    def insert_frame(self, table: str, df: pd.DataFrame) -> None:
+        """Append df to the existing `table` (columns matched by name)."""
+        columns = ", ".join(df.columns)
+        self.conn.register("_insert_frame", df)
+        try:
+            self.conn.execute(f"INSERT INTO {table} ({columns}) SELECT {columns} FROM _insert_frame")
+        finally:
+            self.conn.unregister("_insert_frame")
+
+    def commit(self) -> None:
+        self.conn.commit()
+
+    def rollback(self) -> None:
+        self.conn.rollback()
+
+    def close(self) -> None:
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+BACKENDS = {
+    "sqlite": SQLiteBackend,
+    "duckdb": DuckDBBackend,
+}
+
+
+def backend_name(name: str = None) -> str:
+    """Resolve and validate the configured backend name."""
+    name = (name or ANALYTICS_BACKEND_CONFIG["backend"]).lower()
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown analytics backend '{name}'. Expected one of {sorted(BACKENDS)}")
+    return name
+
+
+def backend_path(name: str = None) -> str:
+    return ANALYTICS_BACKEND_CONFIG["paths"][backend_name(name)]
+
+
+def get_backend(name: str = None, path: str = None, read_only: bool = False):
+    """Open the configured (or named) backend on its database file (or `path`)."""
+    name = backend_name(name)
+    return BACKENDS[name](path or ANALYTICS_BACKEND_CONFIG["paths"][name], read_only=read_only)
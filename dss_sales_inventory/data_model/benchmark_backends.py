@@ -0,0 +1,209 @@
+# dss_sales_inventory/data_model/benchmark_backends.py
+"""
+Benchmark for the analytics backends in data_model/backends.py.
+
+Builds a synthetic star schema (products x days fact_sales, calendar dim_date, dim_product,
+dim_region) with the project DDL, loads it into SQLite (the builder's bulk-load path) and
+into DuckDB, then times the dashboard / decision-brief queries on both. Each query is run
+--repeats times per backend and the median latency is reported; results from the two
+backends are checked against each other.
+
+Usage (from the project root):
+    python -m data_model.benchmark_backends --rows 10000000
+"""
+
+import os
+import time
+import logging
+import argparse
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+from data_model.backends import get_backend
+from data_model.build_star_schema import (
+    SQL_SCRIPT_PATH, CALENDAR_CONFIG, LOAD_ORDER, date_to_key, build_dim_date,
+    split_sql_statements, is_index_statement, duckdb_statements
+)
+
+
+# ========================
+# Queries under test
+# ========================
+
+# Same SQL as the dashboards / decision brief (fact_sales scans, no aggregate tables)
+DASHBOARD_QUERIES = {
+    # enhanced_dashboard.load_sales_time_series (90-day window)
+    'time_series_window': ("""
+        SELECT d.full_date AS date, f.product_id, r.region_name,
+               SUM(f.revenue) AS revenue, SUM(f.quantity) AS quantity, SUM(f.revenue - f.cost) AS profit
+        FROM fact_sales f
+        JOIN dim_date d ON f.date_id = d.date_id
+        JOIN dim_region r ON f.region_id = r.region_id
+        WHERE d.full_date BETWEEN ? AND ?
+        GROUP BY d.full_date, f.product_id, r.region_name
+        ORDER BY d.full_date, f.product_id
+    """, 'window'),
+    # decision_brief totals (fact_sales fallback of the aggregate navigator)
+    'total_financials': ("""
+        SELECT SUM(revenue) AS total_revenue, SUM(cost) AS total_cost, SUM(revenue - cost) AS total_profit
+        FROM fact_sales
+    """, None),
+    # decision_brief per-product financials
+    'product_financials': ("""
+        SELECT product_id, SUM(revenue) AS total_revenue, SUM(revenue - cost) AS total_profit
+        FROM fact_sales
+        GROUP BY product_id
+        ORDER BY product_id
+    """, None),
+    # Month-over-month revenue (enhanced_dashboard.calculate_mom_growth, pushed to SQL)
+    'monthly_revenue': ("""
+        SELECT d.year, d.month, SUM(f.revenue) AS revenue, SUM(f.quantity) AS quantity
+        FROM fact_sales f
+        JOIN dim_date d ON f.date_id = d.date_id
+        GROUP BY d.year, d.month
+        ORDER BY d.year, d.month
+    """, None),
+    # initial_dashboard margin view, aggregated in SQL
+    'product_margin': ("""
+        SELECT p.product_id, SUM(f.revenue - f.quantity * p.unit_cost) AS gross_margin
+        FROM fact_sales f
+        JOIN dim_product p ON f.product_key = p.product_key
+        GROUP BY p.product_id
+        ORDER BY p.product_id
+    """, None),
+}
+
+
+# ========================
+# Synthetic star schema
+# ========================
+
+def make_star_schema(rows: int, days: int, seed: int = 42) -> dict:
+    """Dense products x days fact_sales of ~`rows` rows plus its dimensions."""
+    rng = np.random.default_rng(seed)
+    products = max(1, rows // days)
+    dates = pd.date_range('2022-01-01', periods=days, freq='D')
+    n = products * days
+
+    unit_price = np.round(rng.uniform(5, 90, size=products), 2)
+    unit_cost = np.round(unit_price * rng.uniform(0.4, 0.8, size=products), 2)
+    # One SCD2 version per product, current over the whole calendar
+    dim_product = pd.DataFrame({
+        'product_key': np.arange(1, products + 1), 'product_id': np.arange(1, products + 1),
+        'unit_price': unit_price, 'unit_cost': unit_cost,
+        'valid_from': int(date_to_key(dates[:1])[0]), 'valid_to': 99991231, 'is_current': 1,
+    })
+
+    product_idx = np.repeat(np.arange(products), days)
+    quantity = rng.integers(0, 15, size=n)
+    fact_sales = pd.DataFrame({
+        'sales_id': np.arange(1, n + 1),
+        'product_id': product_idx + 1,
+        'date_id': np.tile(date_to_key(dates), products),
+        'region_id': 1,
+        'product_key': product_idx + 1,
+        'quantity': quantity,
+        'revenue': np.round(quantity * unit_price[product_idx], 2),
+        'cost': np.round(quantity * unit_cost[product_idx], 2),
+    })
+
+    calendar = dict(CALENDAR_CONFIG, start_date=None, end_date=None)
+    return {
+        'dim_region': pd.DataFrame([{'region_id': 1, 'region_name': 'ALL'}]),
+        'dim_date': build_dim_date(pd.DataFrame({'date': dates}), logging.getLogger(__name__), calendar),
+        'dim_product': dim_product,
+        'fact_sales': fact_sales,
+    }
+
+
+# ========================
+# Loading
+# ========================
+
+def load_backend(name: str, path: str, schema: dict) -> float:
+    """Create the project schema on `path` and load the frames; returns load seconds."""
+    with open(SQL_SCRIPT_PATH, 'r') as f:
+        script = f.read()
+
+    start = time.perf_counter()
+    with get_backend(name, path=path) as db:
+        if name == 'duckdb':
+            statements, index_statements = list(duckdb_statements(script)), []
+        else:
+            db.execute("PRAGMA synchronous = OFF")
+            db.execute("PRAGMA journal_mode = OFF")
+            all_statements = split_sql_statements(script)
+            index_statements = [s for s in all_statements if is_index_statement(s)]
+            statements = [s for s in all_statements if s not in index_statements]
+
+        for statement in statements:
+            db.execute(statement)
+        for table in LOAD_ORDER:
+            if table in schema:
+                db.insert_frame(table, schema[table])
+        for statement in index_statements:
+            db.execute(statement)
+        db.commit()
+    return time.perf_counter() - start
+
+
+# ========================
+# Benchmark
+# ========================
+
+def _median_seconds(db, sql, params, repeats):
+    timings, result = [], None
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = db.query(sql, params)
+        timings.append(time.perf_counter() - start)
+    return result, float(np.median(timings))
+
+
+def run_backend_benchmark(rows: int, days: int, repeats: int) -> pd.DataFrame:
+    schema = make_star_schema(rows, days)
+    fact_rows = len(schema['fact_sales'])
+    window_end = schema['dim_date']['full_date'].iloc[-1]
+    window_start = schema['dim_date']['full_date'].iloc[-90]
+    params = {'window': [window_start, window_end], None: None}
+
+    results = {}
+    report = []
+    with tempfile.TemporaryDirectory() as work_dir:
+        for name in ('sqlite', 'duckdb'):
+            path = os.path.join(work_dir, f"bench.{name}")
+            load_seconds = load_backend(name, path, schema)
+            report.append({'backend': name, 'query': '(load)', 'fact_rows': fact_rows,
+                           'median_ms': round(load_seconds * 1000, 1)})
+
+            with get_backend(name, path=path, read_only=True) as db:
+                for query_name, (sql, param_key) in DASHBOARD_QUERIES.items():
+                    result, seconds = _median_seconds(db, sql, params[param_key], repeats)
+                    results[(name, query_name)] = result
+                    report.append({'backend': name, 'query': query_name, 'fact_rows': fact_rows,
+                                   'median_ms': round(seconds * 1000, 1)})
+
+    # Regression check: both backends return the same result sets
+    for query_name in DASHBOARD_QUERIES:
+        pd.testing.assert_frame_equal(
+            results[('sqlite', query_name)], results[('duckdb', query_name)],
+            check_exact=False, check_dtype=False
+        )
+
+    report = pd.DataFrame(report)
+    wide = report.pivot(index='query', columns='backend', values='median_ms')
+    wide['speedup'] = (wide['sqlite'] / wide['duckdb']).round(1)
+    wide.insert(0, 'fact_rows', fact_rows)
+    return wide.reset_index()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark SQLite vs DuckDB on the dashboard queries")
+    parser.add_argument('--rows', type=int, default=10_000_000, help='Approximate fact_sales rows')
+    parser.add_argument('--days', type=int, default=1_000, help='Days in the synthetic calendar')
+    parser.add_argument('--repeats', type=int, default=5, help='Timed runs per query (median reported)')
+    args = parser.parse_args()
+
+    print(run_backend_benchmark(args.rows, args.days, args.repeats).to_string(index=False))
@@ -4,21 +4,58 @@ Description:
     - Implements strict Star Schema with unified surrogate key handling.
     - Performs pre-load validation and referential integrity checks.
     - Enforces Grain Protection: (Product x Date x Region).
+    - dim_region comes from the sales 'region' column (single region 'ALL' without one);
+      fact building and full-load staging run per region group in worker processes
+      (REGION_PARALLEL_CONFIG).
     - Includes explicit lookup completeness checks.
     - Updated to handle 'daily_quantity_sold' and 'daily_revenue' inputs.
+    - Bulk load: load-time PRAGMAs, chunked executemany in one transaction,
+      index builds deferred until the data is in, rows/sec reported.
+    - Full rebuilds load a shadow database (in memory by default) and publish it into
+      analytics.db with the sqlite3 backup API in one write transaction, so dashboard readers
+      never block or see empty tables (other objects in analytics.db, e.g. the SQL layer, are
+      carried over into the shadow first).
+    - VALIDATION_CONFIG["mode"] = "sql" moves validation into the load: set-based checks on
+      the loaded tables (full) or the upserted rows (incremental), same error report.
+    - Covering indexes are designed from the reporting queries; full rebuilds check their
+      plans (data_model/workload_queries.py) and log any regression.
+    - Optional month partitions of fact_sales (FACT_PARTITION_CONFIG): fact_sales_pYYYYMM
+      tables behind a UNION ALL fact_sales view; see data_model/fact_partitions.py.
+    - dim_date uses integer smart keys (YYYYMMDD); fact date_id is computed, not joined.
+    - dim_date is a contiguous calendar (CALENDAR_CONFIG) with week, month-boundary,
+      fiscal and holiday attributes.
+    - dim_product is a Type 2 SCD (product_key per version, valid_from / valid_to,
+      is_current); facts carry the product_key in effect on their date (as-of join), so
+      cost and margin use the unit_cost of the sale date.
+    - Incremental mode: new dim_date rows, appended dim_product versions and
+      fact_sales upserts on the grain key (only new/changed rows are written).
+    - Aggregate tables (agg_product_totals, agg_daily_sales, agg_product_month) are
+      rebuilt on full loads and refreshed for the touched keys on incremental loads;
+      readers route to them through data_model/aggregate_navigator.py.
+    - fact_inventory_snapshot: periodic snapshot of inventory_features at (product, date)
+      grain, read by the analytics layers through data_model/inventory_snapshot.py.
+    - With the DuckDB analytics backend selected (data_model/backends.py), the loaded
+      schema is mirrored into analysis/analytics.duckdb.
+    - Parquet export for BI consumers (PARQUET_EXPORT_CONFIG, data_model/parquet_export.py):
+      month-partitioned facts and one file per dimension / aggregate in analysis/star_parquet.
     
 Author: Data Engineer
 Version: 1.5
 """
 
 import os
+import re
 import sys
+import time
 import sqlite3
 import pandas as pd
 import uuid
 import logging
+import tempfile
 import numpy as np
 from datetime import datetime
+from itertools import repeat
+from concurrent.futures import ProcessPoolExecutor
 
 # ==============================================================================
 # CONFIGURATION & CONSTANTS
@@ -29,7 +66,121 @@ SQL_SCRIPT_PATH = os.path.join(PROJECT_ROOT, 'data_model', 'data_model.sql')
 ERD_OUTPUT_PATH = os.path.join(PROJECT_ROOT, 'data_model', 'erd_diagram')
 
 INPUT_SALES = os.path.join(PROJECT_ROOT, 'data', 'processed', 'sales_cleaned.csv')
-INPUT_INVENTORY = os.path.join(PROJECT_ROOT, 'data', 'processed', 'inventory_features.csv')
+INPUT_INVENTORY = os.path.join(PROJECT_ROOT, 'data', 'processed', 'inventory_features')
+
+# Project root on sys.path so shared modules resolve when run as a script
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from features.features import load_inventory_features  # noqa: E402
+from ingestion.ingestion import DEFAULT_REGION  # noqa: E402
+from data_model.aggregate_navigator import AGGREGATES  # noqa: E402
+from data_model.backends import backend_name, get_backend  # noqa: E402
+from data_model.fact_partitions import partition_months, partition_name, union_view_sql  # noqa: E402
+from data_model.parquet_export import EXPORT_DIR, export_star_schema, parquet_available  # noqa: E402
+from data_model.workload_queries import check_query_plans  # noqa: E402
+
+# Bulk-load settings (applied to the load connection only)
+BULK_LOAD_CONFIG = {
+    "chunk_rows": 50_000,        # rows per executemany call
+    "cache_size_kib": 262_144,   # page cache during the load (256 MiB)
+}
+# Incremental upserts write the live analytics.db: WAL with synchronous = NORMAL cannot corrupt
+# it on a crash or power loss (the last commits may roll back); synchronous = OFF is kept to
+# the private shadow and staging databases, which are discarded on failure
+LOAD_PRAGMAS = [
+    "PRAGMA journal_mode = WAL",
+    "PRAGMA synchronous = NORMAL",
+    f"PRAGMA cache_size = -{BULK_LOAD_CONFIG['cache_size_kib']}",
+    "PRAGMA temp_store = MEMORY",
+]
+
+# Full rebuilds load a shadow database and then swap it into analytics.db
+SHADOW_BUILD_CONFIG = {
+    "location": "memory",        # "memory" or "file" (temp file beside analytics.db, for builds larger than RAM)
+    "swap_timeout_s": 30,        # wait for the write lock / reader-free checkpoint on analytics.db
+}
+# The shadow is private and discarded on failure: no journal, no fsync
+SHADOW_PRAGMAS = [
+    "PRAGMA journal_mode = OFF",
+    "PRAGMA synchronous = OFF",
+    f"PRAGMA cache_size = -{BULK_LOAD_CONFIG['cache_size_kib']}",
+    "PRAGMA temp_store = MEMORY",
+]
+
+# Calendar dimension: contiguous date range, widened as needed to cover the data
+CALENDAR_CONFIG = {
+    "start_date": "2024-01-01",        # None -> first date in the data
+    "end_date": "2025-12-31",          # None -> last date in the data
+    "fiscal_year_start_month": 1,      # e.g. 7 -> fiscal year runs July-June (named by its end year)
+    # Holidays: "MM-DD" recurs every year, "YYYY-MM-DD" is a single date
+    "holidays": ["01-01", "05-01", "12-25", "12-26"],
+}
+
+# Per-region parallelism. Regions share no fact_sales rows, so contiguous groups of regions are
+# built in worker processes (build_fact_sales_by_region) and, on full rebuilds, written by the
+# same workers into staging databases that the loader copies with INSERT ... SELECT
+# (stage_region_facts): SQLite has a single writer, but the Python-side row binding is split
+# across cores.
+REGION_PARALLEL_CONFIG = {
+    "workers": None,             # None -> os.cpu_count(); 1 builds and loads in-process
+    "min_rows": 200_000,         # inputs below this stay in-process (not worth the process start-up)
+}
+# Staging databases are ATTACHed to the load connection (SQLite allows 10 by default)
+MAX_STAGE_DATABASES = 8
+
+# Type 2 dim_product (build_dim_product): a product version starts on the product's first day
+# and on any change of the source unit_cost (inventory). Sales carry a per-transaction price,
+# so unit_price is the realized average over a version rather than a versioned attribute: a
+# period's realized price moves with the sales mix and discounts, and versioning on it would
+# open versions from noise (and restate history when late sales shift a period's price).
+# price_tolerance opts in to price-drift versions anyway.
+PRODUCT_SCD2_CONFIG = {
+    "price_period": "M",           # pandas period over which realized unit prices are compared
+    "price_tolerance": None,       # None -> unit_cost changes only; e.g. 0.02 also versions on period price moves
+    "open_valid_to": 99991231,     # valid_to of current versions
+}
+
+# Measures carried from inventory_features into fact_inventory_snapshot; the demand means are
+# the precomputed rolling windows of features.ROLLING_FEATURE_CONFIG (read by the dashboards
+# and the time series layer instead of recomputing windows)
+SNAPSHOT_MEASURES = [
+    'stock_on_hand', 'reorder_point', 'lead_time_days',
+    'daily_quantity_sold', 'daily_revenue', 'stock_ratio',
+    'demand_mean_7d', 'demand_mean_14d', 'demand_mean_28d',
+]
+
+# Optional year-month partitioning of fact_sales (see data_model/fact_partitions.py).
+# Applied by full rebuilds; incremental loads follow the layout already in analytics.db.
+FACT_PARTITION_CONFIG = {
+    "enabled": False,
+    "open_months": None,         # N -> incremental loads may only write the latest N months
+}
+
+# Schema validation: "pandas" checks the DataFrames before the load (validate_schema); "sql" runs
+# the same checks set-based inside the load transaction (validate_schema_sql): over the loaded
+# tables on full rebuilds, over the upserted rows only on incremental loads.
+VALIDATION_CONFIG = {
+    "mode": "pandas",
+}
+
+# Columnar export of the loaded schema (optional pyarrow). Full rebuilds rewrite the export,
+# incremental loads the fact months they touched.
+PARQUET_EXPORT_CONFIG = {
+    "enabled": True,
+    "path": EXPORT_DIR,
+    "row_group_rows": 128_000,   # rows per row group (min/max statistics granularity)
+    "compression": "zstd",
+}
+
+# Foreign keys checked by validate_schema_sql: table -> {column: parent dimension}
+FOREIGN_KEYS = {
+    'fact_sales': {'product_key': 'dim_product', 'date_id': 'dim_date', 'region_id': 'dim_region'},
+    'fact_inventory_snapshot': {'product_key': 'dim_product', 'date_id': 'dim_date'},
+}
+
+# Load order: dimensions before the facts (foreign keys are enforced)
+LOAD_ORDER = ['dim_region', 'dim_date', 'dim_product', 'fact_sales', 'fact_inventory_snapshot']
 
 # ==============================================================================
 # LOGGING SETUP
@@ -57,7 +208,7 @@ def load_data(logger):
 
     try:
         sales_df = pd.read_csv(INPUT_SALES)
-        inv_df = pd.read_csv(INPUT_INVENTORY)
+        inv_df = load_inventory_features(INPUT_INVENTORY)
         
         # Enforce Date Type
         sales_df['date'] = pd.to_datetime(sales_df['date'])
@@ -74,91 +225,238 @@ def load_data(logger):
 # ==============================================================================
 # DIMENSION BUILDERS (Python-Managed Keys)
 # ==============================================================================
-def build_dim_region(logger):
-    """Creates the Dim_Region with explicit ID."""
+def build_dim_region(sales_df, logger):
+    """
+    Creates the Dim_Region with explicit IDs: one row per sales region, numbered in name
+    order. Feeds without a region column load the single region DEFAULT_REGION. Incremental
+    loads keep the IDs already stored (stable_region_ids).
+    """
     logger.info("Building Dim_Region.")
-    df = pd.DataFrame([{
-        'region_id': 1,
-        'region_name': 'ALL'
-    }])
+    names = sorted(sales_df['region'].dropna().unique()) if 'region' in sales_df.columns else []
+    if not names:
+        names = [DEFAULT_REGION]
+    df = pd.DataFrame({
+        'region_id': np.arange(1, len(names) + 1),
+        'region_name': names
+    })
+    logger.info(f"Dim_Region: {len(df)} regions.")
     return df
 
-def build_dim_date(sales_df, logger):
-    """Creates Dim_Date with Python-generated Surrogate Keys."""
-    logger.info("Building Dim_Date.")
+def date_to_key(dates):
+    """
+    Smart date key YYYYMMDD (e.g. 2024-07-12 -> 20240712), computed with integer
+    arithmetic on datetime64 values: no string formatting, no lookup table.
+    """
+    days = pd.to_datetime(dates).to_numpy(dtype='datetime64[D]')
+    months = days.astype('datetime64[M]')
+    year = months.astype('int64') // 12 + 1970
+    month = months.astype('int64') % 12 + 1
+    day = (days - months).astype('int64') + 1
+    return year * 10000 + month * 100 + day
+
+
+def holiday_flags(dates, holidays):
+    """1 where the date is a configured holiday ("MM-DD" recurring or "YYYY-MM-DD"), else 0."""
+    recurring = [h for h in holidays if len(h) == 5]
+    fixed = pd.to_datetime([h for h in holidays if len(h) != 5])
+    month_day = dates.dt.month * 100 + dates.dt.day
+    recurring_keys = [int(h[:2]) * 100 + int(h[3:]) for h in recurring]
+    return (month_day.isin(recurring_keys) | dates.isin(fixed)).astype('int64')
+
+
+DIM_DATE_COLUMNS = [
+    'date_id', 'full_date', 'day', 'month', 'quarter', 'year',
+    'day_of_week', 'is_weekend', 'iso_year', 'iso_week',
+    'is_month_start', 'is_month_end',
+    'fiscal_year', 'fiscal_quarter', 'fiscal_month', 'is_holiday',
+]
+
+
+def build_dim_date(sales_df, logger, config=None):
+    """
+    Creates Dim_Date as a contiguous calendar keyed by the smart date key (YYYYMMDD, see
+    date_to_key). The range comes from CALENDAR_CONFIG and is widened to cover every date in
+    the data, so days without sales still have a date_id and date-range queries are plain
+    range scans on dim_date. All attributes are computed vectorized over the date range.
+    """
+    config = config or CALENDAR_CONFIG
+    logger.info("Building Dim_Date (calendar).")
     
-    # 1. Extract Unique Dates
-    dates = sales_df['date'].dropna().unique()
-    dim_date = pd.DataFrame({'full_date_dt': dates})
-    dim_date = dim_date.sort_values('full_date_dt').reset_index(drop=True)
+    # 1. Calendar Range (configured range widened to the data)
+    data_dates = pd.to_datetime(sales_df['date'].dropna())
+    bounds_start = [pd.Timestamp(config['start_date'])] if config.get('start_date') else []
+    bounds_end = [pd.Timestamp(config['end_date'])] if config.get('end_date') else []
+    if not data_dates.empty:
+        bounds_start.append(data_dates.min())
+        bounds_end.append(data_dates.max())
+    if not bounds_start or not bounds_end:
+        raise ValueError("Calendar range is undefined: no dates in data and no configured start/end.")
+    dates = pd.Series(pd.date_range(min(bounds_start).normalize(), max(bounds_end).normalize(), freq='D'))
     
-    # 2. Generate Surrogate Key (Python Sequence)
-    # Starting at 1000 to clearly distinguish from simple counters
-    dim_date['date_id'] = range(1000, 1000 + len(dim_date))
+    # 2. Smart Key (YYYYMMDD)
+    dim_date = pd.DataFrame({'date_id': date_to_key(dates)})
     
     # 3. Format Attributes (Strict YYYY-MM-DD for SQLite)
-    dim_date['full_date'] = dim_date['full_date_dt'].dt.strftime('%Y-%m-%d')
-    dim_date['day'] = dim_date['full_date_dt'].dt.day
-    dim_date['month'] = dim_date['full_date_dt'].dt.month
-    dim_date['quarter'] = dim_date['full_date_dt'].dt.quarter
-    dim_date['year'] = dim_date['full_date_dt'].dt.year
+    dim_date['full_date'] = dates.dt.strftime('%Y-%m-%d')
+    dim_date['day'] = dates.dt.day
+    dim_date['month'] = dates.dt.month
+    dim_date['quarter'] = dates.dt.quarter
+    dim_date['year'] = dates.dt.year
+    
+    # 4. Week Attributes (ISO: Monday = 1)
+    iso = dates.dt.isocalendar()
+    dim_date['day_of_week'] = dates.dt.dayofweek + 1
+    dim_date['is_weekend'] = (dim_date['day_of_week'] >= 6).astype('int64')
+    dim_date['iso_year'] = iso['year'].astype('int64')
+    dim_date['iso_week'] = iso['week'].astype('int64')
+    
+    # 5. Month Boundaries
+    dim_date['is_month_start'] = dates.dt.is_month_start.astype('int64')
+    dim_date['is_month_end'] = dates.dt.is_month_end.astype('int64')
+    
+    # 6. Fiscal Period (fiscal year named by the calendar year it ends in)
+    start_month = int(config.get('fiscal_year_start_month', 1))
+    if not 1 <= start_month <= 12:
+        raise ValueError("fiscal_year_start_month must be between 1 and 12.")
+    fiscal_month = (dim_date['month'] - start_month) % 12 + 1
+    dim_date['fiscal_year'] = dim_date['year']
+    if start_month > 1:
+        dim_date['fiscal_year'] += (dim_date['month'] >= start_month).astype('int64')
+    dim_date['fiscal_quarter'] = (fiscal_month - 1) // 3 + 1
+    dim_date['fiscal_month'] = fiscal_month
+    
+    # 7. Holidays
+    dim_date['is_holiday'] = holiday_flags(dates, config.get('holidays', []))
     
     # Check for duplicates
     if dim_date['full_date'].duplicated().any():
         raise ValueError("Duplicate dates generated in Dim_Date.")
+    
+    logger.info(f"Dim_Date calendar: {dim_date['full_date'].iloc[0]} to {dim_date['full_date'].iloc[-1]} ({len(dim_date)} days).")
         
     # Return strict schema columns
-    return dim_date[['date_id', 'full_date', 'day', 'month', 'quarter', 'year']]
-
-def build_dim_product(sales_df, inv_df, logger):
-    """Creates Dim_Product. Validates uniqueness of Business Key."""
-    logger.info("Building Dim_Product.")
-    
-    # 1. Derive Attributes
-    # Calculate Unit Price from Sales (Daily Revenue / Daily Quantity)
-    # Use a copy to avoid SettingWithCopyWarning on the input dataframe
-    sales_temp = sales_df.copy()
-    
-    # Avoid division by zero
-    sales_temp['unit_price_calc'] = np.where(
-        sales_temp['daily_quantity_sold'] > 0,
-        sales_temp['daily_revenue'] / sales_temp['daily_quantity_sold'],
-        0
-    )
+    return dim_date[DIM_DATE_COLUMNS]
+
+def build_dim_product(sales_df, inv_df, logger, config=None):
+    """
+    Creates Dim_Product as a Type 2 SCD: one row per product version with valid_from /
+    valid_to (date_id keys, contiguous per product) and is_current.
+
+    Versions come from one vectorized change-detection pass over the daily observations
+    sorted by (product, date): changes of the source unit_cost from inventory and, only when
+    PRODUCT_SCD2_CONFIG["price_tolerance"] is set, moves of the realized price
+    (revenue / quantity) of the observation's period. unit_price of a version is the
+    realized average price over its days. product_key numbers the versions by
+    (product_id, valid_from); incremental loads remap it to the keys already stored
+    (stable_product_keys).
+    """
+    config = config or PRODUCT_SCD2_CONFIG
+    logger.info("Building Dim_Product (SCD2).")
+    
+    # 1. Daily Observations (one per product and date)
+    sales = pd.DataFrame({
+        'product_id': sales_df['product_id'].to_numpy(),
+        'date': pd.to_datetime(sales_df['date']).to_numpy(),
+        'quantity': sales_df['daily_quantity_sold'].to_numpy(),
+        'revenue': sales_df['daily_revenue'].to_numpy(),
+    })
+    obs = pd.DataFrame({
+        'product_id': inv_df['product_id'].to_numpy(),
+        'date': pd.to_datetime(inv_df['date']).to_numpy(),
+        'unit_cost': inv_df['unit_cost'].to_numpy(),
+    }).drop_duplicates(['product_id', 'date'], keep='last')
+    obs = obs.sort_values(['product_id', 'date'], kind='mergesort').reset_index(drop=True)
+    
+    # Realized price per product and period; periods without sales carry the neighbouring price
+    sales['period'] = sales['date'].dt.to_period(config['price_period'])
+    period_totals = sales.groupby(['product_id', 'period'])[['revenue', 'quantity']].sum()
+    period_price = (period_totals['revenue'] / period_totals['quantity'].where(period_totals['quantity'] > 0))
+    obs['period'] = obs['date'].dt.to_period(config['price_period'])
+    obs = obs.merge(period_price.rename('period_price').reset_index(), on=['product_id', 'period'], how='left')
+    obs['period_price'] = obs.groupby('product_id')['period_price'].ffill()
+    obs['period_price'] = obs.groupby('product_id')['period_price'].bfill()
+    
+    # 2. Change Detection: flag the first observation of every version
+    new_product = obs['product_id'].ne(obs['product_id'].shift())
+    cost_changed = obs['unit_cost'].ne(obs['unit_cost'].shift())
+    starts = new_product | cost_changed
+    if config['price_tolerance'] is not None:
+        price_moved = (obs['period_price'] / obs['period_price'].shift() - 1).abs().gt(config['price_tolerance'])
+        starts |= price_moved
+    
+    versions = obs.loc[starts, ['product_id', 'date', 'unit_cost', 'period_price']].reset_index(drop=True)
+    
+    # A product's first version also covers sales dated before its first inventory record
+    first_sale = sales.groupby('product_id')['date'].min()
+    first_version = versions['product_id'].ne(versions['product_id'].shift())
+    earlier_sale = versions['product_id'].map(first_sale)
+    versions.loc[first_version, 'date'] = np.minimum(versions['date'], earlier_sale.fillna(versions['date']))[first_version]
     
-    prices = sales_temp.groupby('product_id')['unit_price_calc'].mean().reset_index()
-    prices.rename(columns={'unit_price_calc': 'unit_price'}, inplace=True)
+    # 3. Validity: a version ends the day before the product's next version starts
+    next_start = versions.groupby('product_id')['date'].shift(-1)
+    versions['valid_from'] = date_to_key(versions['date'])
+    versions['valid_to'] = config['open_valid_to']
+    closed = next_start.notna()
+    versions.loc[closed, 'valid_to'] = date_to_key(next_start[closed] - pd.Timedelta(days=1))
+    versions['is_current'] = (~closed).astype('int64')
+    versions['product_key'] = np.arange(1, len(versions) + 1)
     
-    # Unit Cost from Inventory
-    costs = inv_df[['product_id', 'unit_cost']].drop_duplicates()
+    # 4. Realized price per version (as-of join of the sales rows onto their version)
+    sales['date_id'] = date_to_key(sales['date'])
+    sales = resolve_product_versions(sales, versions, logger)
+    version_totals = sales.groupby('product_key')[['revenue', 'quantity']].sum()
+    realized = version_totals['revenue'] / version_totals['quantity'].where(version_totals['quantity'] > 0)
+    versions['unit_price'] = versions['product_key'].map(realized).fillna(versions['period_price'])
     
-    # 2. Merge (Business Key = product_id)
-    dim_product = pd.merge(prices, costs, on='product_id', how='inner')
+    dim_product = versions[['product_key', 'product_id', 'unit_price', 'unit_cost', 'valid_from', 'valid_to', 'is_current']]
     
-    # 3. Validation: Unique Primary Key
-    if dim_product['product_id'].duplicated().any():
-        logger.error("Duplicate product_ids found in source data.")
-        raise ValueError("Dim_Product Primary Key Constraint Violated.")
+    # 5. Validation: Unique Version Key
+    if dim_product.duplicated(['product_id', 'valid_from']).any():
+        logger.error("Overlapping product versions found in source data.")
+        raise ValueError("Dim_Product Version Key Constraint Violated.")
         
     if dim_product.isnull().any().any():
         logger.warning("NULL values detected in Dim_Product. Filling with 0.")
         dim_product = dim_product.fillna(0.0)
-        
+    
+    logger.info(f"Dim_Product: {dim_product['product_id'].nunique()} products, {len(dim_product)} versions.")
     return dim_product
 
+def resolve_product_versions(df, dim_product, logger):
+    """
+    Adds product_key and unit_cost of the product version in effect on each row's date_id.
+    Sorted as-of join (merge_asof: latest valid_from <= date_id, by product_id) over the
+    whole frame instead of per-row lookups; df's row order is kept. Rows dated before a
+    product's first version, or of unknown products, get NaN.
+    """
+    versions = dim_product[['product_id', 'valid_from', 'product_key', 'unit_cost']].astype(
+        {'product_id': 'int64', 'valid_from': 'int64'}
+    ).sort_values('valid_from', kind='mergesort')
+    left = df.drop(columns=['product_key', 'unit_cost'], errors='ignore').astype(
+        {'product_id': 'int64', 'date_id': 'int64'}
+    )
+    left['_row'] = np.arange(len(left))
+    resolved = pd.merge_asof(
+        left.sort_values('date_id', kind='mergesort'), versions,
+        left_on='date_id', right_on='valid_from', by='product_id', direction='backward'
+    )
+    return resolved.sort_values('_row', kind='mergesort').drop(columns=['_row', 'valid_from']).reset_index(drop=True)
+
 # ==============================================================================
 # FACT TABLE BUILDER
 # ==============================================================================
-def build_fact_sales(sales_df, dim_date, dim_product, logger):
+def build_fact_sales(sales_df, dim_date, dim_product, dim_region, logger):
     """
     Builds Fact_Sales.
-    Grain: One row per Product per Date per Region.
+    Grain: One row per Product per Date per Region (rows in region, product, date order).
     """
     logger.info("Building Fact_Sales.")
     
     # 1. Aggregate Sales to Grain
     # Updated to use 'daily_quantity_sold' and 'daily_revenue'
-    fact = sales_df.groupby(['product_id', 'date']).agg({
+    if 'region' not in sales_df.columns:
+        sales_df = sales_df.assign(region=DEFAULT_REGION)
+    fact = sales_df.groupby(['region', 'product_id', 'date']).agg({
         'daily_quantity_sold': 'sum',
         'daily_revenue': 'sum'
     }).reset_index()
@@ -169,40 +467,31 @@ def build_fact_sales(sales_df, dim_date, dim_product, logger):
         'daily_revenue': 'revenue'
     }, inplace=True)
     
-    # 2. Add Region (Constant FK)
-    fact['region_id'] = 1
-    
-    # 3. Lookup Date FK (date_id)
-    # Prepare merge key
-    fact['date_str'] = fact['date'].dt.strftime('%Y-%m-%d')
+    # 2. Region FK: region_id looked up by region name
+    fact['region_id'] = fact['region'].map(dim_region.set_index('region_name')['region_id'])
+    if fact['region_id'].isnull().any():
+        logger.error("Data Integrity Error: Failed to resolve region_id for some sales records.")
+        raise ValueError("Region lookup failed for some fact rows.")
+    fact['region_id'] = fact['region_id'].astype('int64')
     
-    fact_merged = pd.merge(
-        fact,
-        dim_date[['full_date', 'date_id']],
-        left_on='date_str',
-        right_on='full_date',
-        how='left'
-    )
+    # 3. Date FK (date_id): smart key computed directly from the date
+    fact['date_id'] = date_to_key(fact['date'])
 
-    # CHECK 1: Date lookup completeness check
-    if fact_merged['date_id'].isnull().any():
+    # CHECK 1: Date key completeness check
+    if not fact['date_id'].isin(dim_date['date_id']).all():
         logger.error("Data Integrity Error: Failed to resolve date_id for some sales records.")
         raise ValueError("Date lookup failed for some fact rows.")
     
-    # 4. Lookup Product Cost (for Fact Calculation)
-    fact_final = pd.merge(
-        fact_merged,
-        dim_product[['product_id', 'unit_cost']],
-        on='product_id',
-        how='left'
-    )
+    # 4. Product Version (SCD2) and its Cost: as-of join on date_id
+    fact_final = resolve_product_versions(fact, dim_product, logger)
     
-    # CHECK 2: Product cost lookup completeness check
-    if fact_final['unit_cost'].isnull().any():
-        logger.error("Data Integrity Error: Missing unit_cost for some products.")
+    # CHECK 2: Product version lookup completeness check
+    if fact_final['product_key'].isnull().any() or fact_final['unit_cost'].isnull().any():
+        logger.error("Data Integrity Error: Missing product version / unit_cost for some sales records.")
         raise ValueError("Missing unit_cost for some products in fact table.")
+    fact_final['product_key'] = fact_final['product_key'].astype('int64')
     
-    # 5. Compute Metrics
+    # 5. Compute Metrics (cost at the unit_cost in effect on the sale date)
     fact_final['cost'] = fact_final['quantity'] * fact_final['unit_cost']
     
     # 6. Generate Fact Surrogate Key (Python Sequence)
@@ -210,22 +499,106 @@ def build_fact_sales(sales_df, dim_date, dim_product, logger):
     fact_final['sales_id'] = range(1, len(fact_final) + 1)
     
     # 7. Final Selection
-    output_cols = ['sales_id', 'product_id', 'date_id', 'region_id', 'quantity', 'revenue', 'cost']
+    output_cols = ['sales_id', 'product_id', 'date_id', 'region_id', 'product_key', 'quantity', 'revenue', 'cost']
     
     # Filter valid columns
-    df_output = fact_final[output_cols].copy()
+    df_output = fact_final[output_cols]
     
     return df_output
 
+def region_worker_count(rows, regions):
+    """Worker processes for a per-region build / stage of `rows` rows over `regions` regions."""
+    if rows < REGION_PARALLEL_CONFIG['min_rows']:
+        return 1
+    workers = REGION_PARALLEL_CONFIG['workers'] or os.cpu_count() or 1
+    return max(1, min(workers, regions, MAX_STAGE_DATABASES))
+
+
+def region_groups(region_sizes, workers):
+    """
+    Splits regions (Series name/id -> rows, in load order) into at most `workers` contiguous
+    groups of roughly equal row counts. Returns a list of region lists.
+
+    A region goes to the group its row midpoint falls in, so a region larger than one group's
+    share does not pull its neighbours into the same group.
+    """
+    sizes = region_sizes.to_numpy()
+    midpoints = sizes.cumsum() - sizes / 2
+    cut = np.floor(midpoints * workers / max(sizes.sum(), 1)).astype('int64')
+    groups = {}
+    for region, group in zip(region_sizes.index, np.clip(cut, 0, workers - 1)):
+        groups.setdefault(group, []).append(region)
+    return [groups[g] for g in sorted(groups)]
+
+
+def build_fact_sales_by_region(sales_df, dim_date, dim_product, dim_region, logger):
+    """
+    build_fact_sales over contiguous groups of regions in a process pool
+    (REGION_PARALLEL_CONFIG). The groups come back in region order, so the rows equal the
+    in-process build; sales_id is numbered over the concatenation.
+    """
+    if 'region' not in sales_df.columns:
+        return build_fact_sales(sales_df, dim_date, dim_product, dim_region, logger)
+    region_sizes = sales_df.groupby('region').size()
+    workers = region_worker_count(len(sales_df), len(region_sizes))
+    if workers <= 1:
+        return build_fact_sales(sales_df, dim_date, dim_product, dim_region, logger)
+
+    slices = [sales_df[sales_df['region'].isin(group)] for group in region_groups(region_sizes, workers)]
+    logger.info(f"Building Fact_Sales for {len(region_sizes)} regions in {len(slices)} worker processes.")
+    with ProcessPoolExecutor(max_workers=len(slices)) as pool:
+        facts = list(pool.map(
+            build_fact_sales, slices, repeat(dim_date), repeat(dim_product), repeat(dim_region), repeat(logger)
+        ))
+    fact = pd.concat(facts, ignore_index=True)
+    fact['sales_id'] = np.arange(1, len(fact) + 1)
+    return fact
+
+def build_fact_inventory_snapshot(inv_df, dim_date, dim_product, logger):
+    """
+    Builds Fact_Inventory_Snapshot from inventory_features.
+    Grain: One row per Product per Date (periodic snapshot of the stock position).
+    """
+    logger.info("Building Fact_Inventory_Snapshot.")
+    
+    # 1. Keys: smart date key computed directly from the date
+    snapshot = pd.DataFrame({
+        'product_id': inv_df['product_id'].to_numpy(),
+        'date_id': date_to_key(inv_df['date']),
+    })
+    
+    # 2. Measures (feature tables written before the rolling features leave the windows NULL)
+    missing = [col for col in SNAPSHOT_MEASURES if col not in inv_df.columns]
+    if missing:
+        logger.warning(f"inventory_features lacks {missing}; loaded as NULL (re-run the features stage).")
+    for col in SNAPSHOT_MEASURES:
+        snapshot[col] = inv_df[col].to_numpy() if col in inv_df.columns else np.nan
+    
+    # CHECK 1: Date key completeness check
+    if not snapshot['date_id'].isin(dim_date['date_id']).all():
+        logger.error("Data Integrity Error: Failed to resolve date_id for some inventory snapshots.")
+        raise ValueError("Date lookup failed for some inventory snapshot rows.")
+    
+    # CHECK 2: Product version completeness check (as-of join on date_id)
+    snapshot = resolve_product_versions(snapshot, dim_product, logger).drop(columns=['unit_cost'])
+    if snapshot['product_key'].isnull().any():
+        logger.error("Data Integrity Error: Inventory snapshots reference products missing from Dim_Product.")
+        raise ValueError("Unknown product_id in inventory snapshot rows.")
+    snapshot['product_key'] = snapshot['product_key'].astype('int64')
+    snapshot = snapshot[['product_id', 'date_id', 'product_key'] + SNAPSHOT_MEASURES]
+    
+    return snapshot.sort_values(['product_id', 'date_id'], kind='mergesort').reset_index(drop=True)
+
 # ==============================================================================
 # VALIDATION & QA
 # ==============================================================================
-def validate_schema(df_fact, df_product, df_date, df_region, logger):
+def validate_schema(df_fact, df_product, df_date, df_region, logger, df_snapshot=None):
     """
     Comprehensive QA:
     1. Referential Integrity (FKs exist in Dims)
     2. Data Hygiene (No negatives, no nulls)
     3. Grain Protection (No duplicates on analytical keys)
+    df_snapshot (fact_inventory_snapshot) gets the same grain / hygiene checks when given.
     """
     logger.info("Performing Schema Validation.")
     errors = []
@@ -238,9 +611,9 @@ def validate_schema(df_fact, df_product, df_date, df_region, logger):
         errors.append("Fact Table Grain Violation: Duplicates detected.")
     
     # 2. Referential Integrity Checks
-    missing_products = ~df_fact['product_id'].isin(df_product['product_id'])
+    missing_products = ~df_fact['product_key'].isin(df_product['product_key'])
     if missing_products.any():
-        errors.append(f"RI Violation: {missing_products.sum()} rows in Fact have invalid product_id.")
+        errors.append(f"RI Violation: {missing_products.sum()} rows in Fact have invalid product_key.")
         
     missing_dates = ~df_fact['date_id'].isin(df_date['date_id'])
     if missing_dates.any():
@@ -260,6 +633,21 @@ def validate_schema(df_fact, df_product, df_date, df_region, logger):
     if df_fact.isnull().any().any():
         errors.append("NULL values found in Fact Table.")
 
+    # 4. Inventory Snapshot (grain: product x date; FKs checked while building it)
+    if df_snapshot is not None:
+        duplicate_snapshots = df_snapshot.duplicated(subset=['product_id', 'date_id'])
+        if duplicate_snapshots.any():
+            errors.append(f"Snapshot Grain Violation: {duplicate_snapshots.sum()} duplicate (product, date) rows.")
+        if (df_snapshot['stock_on_hand'] < 0).any():
+            errors.append("Negative stock_on_hand found in Inventory Snapshot.")
+        if df_snapshot[['product_id', 'date_id', 'stock_on_hand']].isnull().any().any():
+            errors.append("NULL keys or stock_on_hand found in Inventory Snapshot.")
+
+    report_validation(errors, logger)
+
+
+def report_validation(errors, logger):
+    """Logs the validation errors and fails the build, or logs the pass."""
     if errors:
         for err in errors:
             logger.error(f"Validation Failure: {err}")
@@ -267,36 +655,799 @@ def validate_schema(df_fact, df_product, df_date, df_region, logger):
     else:
         logger.info("Validation Passed: Referential Integrity, Grain Uniqueness, and Data Hygiene verified.")
 
+
+def stage_validation_keys(conn, data_dict):
+    """Temp tables holding the grain and foreign keys of the rows an incremental load upserts."""
+    staged = {
+        'validation_fact_keys': (data_dict['fact_sales'], ['product_id', 'date_id', 'region_id', 'product_key']),
+        'validation_snapshot_keys': (data_dict['fact_inventory_snapshot'], ['product_id', 'date_id', 'product_key']),
+    }
+    for name, (df, keys) in staged.items():
+        conn.execute(f"DROP TABLE IF EXISTS temp.{name}")
+        conn.execute(f"CREATE TEMP TABLE {name} ({', '.join(f'{k} INTEGER' for k in keys)})")
+        conn.executemany(
+            f"INSERT INTO {name} VALUES ({', '.join('?' * len(keys))})",
+            df[keys].itertuples(index=False, name=None)
+        )
+
+
+def validate_schema_sql(conn, logger, incremental=False):
+    """
+    validate_schema as set-based SQL, run inside the load transaction before COMMIT (the
+    caller defers foreign keys so violating rows are loaded and counted here). Raises the
+    same ValueError, and the rolled-back transaction leaves the database as it was.
+
+    Full rebuilds check the loaded tables with PRAGMA foreign_key_check and one aggregate pass
+    for negatives / NULLs; the grain needs no query there, because the UNIQUE / primary keys
+    already rejected duplicates during the insert. incremental=True checks only the upserted
+    rows, keyed by the temp tables from stage_validation_keys, and counts duplicates on the
+    staged keys with grouped queries, since the upsert itself would merge them.
+    """
+    logger.info(f"Performing Schema Validation (SQL, {'upserted rows' if incremental else 'loaded tables'}).")
+    errors = []
+
+    def scalar(sql):
+        return conn.execute(sql).fetchone()[0] or 0
+
+    if incremental:
+        fact_keys, snapshot_keys = "temp.validation_fact_keys", "temp.validation_snapshot_keys"
+        fact = f"(SELECT f.* FROM {fact_keys} k JOIN fact_sales f USING (product_id, date_id, region_id))"
+        snapshot = f"(SELECT s.* FROM {snapshot_keys} k JOIN fact_inventory_snapshot s USING (product_id, date_id))"
+    else:
+        fact_keys = fact = "fact_sales"
+        snapshot_keys = snapshot = "fact_inventory_snapshot"
+
+    # 1. Grain Protection: duplicate analytical keys (in the delta; the loaded tables are unique by constraint)
+    duplicates = incremental and scalar(
+        f"SELECT SUM(n - 1) FROM (SELECT COUNT(*) AS n FROM {fact_keys} "
+        "GROUP BY product_id, date_id, region_id HAVING COUNT(*) > 1)"
+    )
+    if duplicates:
+        logger.error(f"GRAIN VIOLATION: Found {duplicates} duplicate rows for (product, date, region).")
+        errors.append("Fact Table Grain Violation: Duplicates detected.")
+
+    # 2. Referential Integrity: rows per (table, foreign key column) without a parent
+    missing = {(table, column): 0 for table, keys in FOREIGN_KEYS.items() for column in keys}
+    if incremental:
+        for table, keys in (('fact_sales', fact_keys), ('fact_inventory_snapshot', snapshot_keys)):
+            for column, parent in FOREIGN_KEYS[table].items():
+                missing[(table, column)] = scalar(
+                    f"SELECT COUNT(*) FROM {keys} k WHERE NOT EXISTS "
+                    f"(SELECT 1 FROM {parent} p WHERE p.{column} = k.{column})"
+                )
+    else:
+        for table, _, parent, _ in conn.execute("PRAGMA foreign_key_check").fetchall():
+            # Month partitions of fact_sales report under their own names
+            table = 'fact_sales' if table.startswith('fact_sales') else table
+            column = next(col for col, dim in FOREIGN_KEYS.get(table, {}).items() if dim == parent)
+            missing[(table, column)] += 1
+    labels = {'fact_sales': 'Fact', 'fact_inventory_snapshot': 'Inventory Snapshot'}
+    for (table, column), count in missing.items():
+        if count:
+            errors.append(f"RI Violation: {count} rows in {labels[table]} have invalid {column}.")
+
+    # 3. Data Hygiene (one pass over the fact rows)
+    columns = [row[1] for row in conn.execute("PRAGMA table_info(fact_sales)")]
+    negative_quantity, negative_revenue, negative_cost, null_rows = conn.execute(
+        f"SELECT SUM(quantity < 0), SUM(revenue < 0), SUM(cost < 0), "
+        f"SUM({' OR '.join(f'{col} IS NULL' for col in columns)}) FROM {fact}"
+    ).fetchone()
+    if negative_quantity:
+        errors.append("Negative Quantity found.")
+    if negative_revenue:
+        errors.append("Negative Revenue found.")
+    if negative_cost:
+        errors.append("Negative Cost found.")
+    if null_rows:
+        errors.append("NULL values found in Fact Table.")
+
+    # 4. Inventory Snapshot (grain: product x date)
+    duplicate_snapshots = incremental and scalar(
+        f"SELECT SUM(n - 1) FROM (SELECT COUNT(*) AS n FROM {snapshot_keys} "
+        "GROUP BY product_id, date_id HAVING COUNT(*) > 1)"
+    )
+    if duplicate_snapshots:
+        errors.append(f"Snapshot Grain Violation: {duplicate_snapshots} duplicate (product, date) rows.")
+    negative_stock, null_snapshots = conn.execute(
+        "SELECT SUM(stock_on_hand < 0), "
+        f"SUM(product_id IS NULL OR date_id IS NULL OR stock_on_hand IS NULL) FROM {snapshot}"
+    ).fetchone()
+    if negative_stock:
+        errors.append("Negative stock_on_hand found in Inventory Snapshot.")
+    if null_snapshots:
+        errors.append("NULL keys or stock_on_hand found in Inventory Snapshot.")
+
+    report_validation(errors, logger)
+
 # ==============================================================================
 # DATABASE LOADER
 # ==============================================================================
+def split_sql_statements(sql_script):
+    """Split a SQL script into complete statements (comments kept with their statement)."""
+    statements, buffer = [], ""
+    for line in sql_script.splitlines(keepends=True):
+        buffer += line
+        if sqlite3.complete_statement(buffer):
+            statements.append(buffer.strip())
+            buffer = ""
+    if buffer.strip() and re.sub(r'--[^\n]*', '', buffer).strip():
+        statements.append(buffer.strip())
+    return statements
+
+
+def is_index_statement(statement):
+    """True for CREATE [UNIQUE] INDEX statements (leading comments ignored)."""
+    body = re.sub(r'--[^\n]*', '', statement).strip()
+    return re.match(r'CREATE\s+(UNIQUE\s+)?INDEX\b', body, re.IGNORECASE) is not None
+
+
+def is_fact_statement(statement):
+    """True for the DDL creating fact_sales or one of its indexes."""
+    body = re.sub(r'--[^\n]*', '', statement).strip()
+    creates_table = re.match(r'CREATE\s+TABLE\s+(IF\s+NOT\s+EXISTS\s+)?fact_sales\b', body, re.IGNORECASE)
+    indexes_table = is_index_statement(statement) and re.search(r'\bON\s+fact_sales\s*\(', body, re.IGNORECASE)
+    return bool(creates_table or indexes_table)
+
+
+def partition_statements(fact_statements, year_month):
+    """fact_sales table and index DDL rewritten for the partition of one month."""
+    statements = []
+    for statement in fact_statements:
+        if is_index_statement(statement):
+            statement = re.sub(r'(INDEX\s+(?:IF\s+NOT\s+EXISTS\s+)?)(\w+)', rf'\g<1>\g<2>_p{year_month}', statement)
+        statements.append(re.sub(r'\bfact_sales\b', partition_name(year_month), statement))
+    return statements
+
+
+def fact_partitions(df):
+    """(partition table, rows) per year-month of a fact_sales frame."""
+    for year_month, rows in df.groupby(df['date_id'] // 100, sort=True):
+        yield partition_name(year_month), rows
+
+
+def is_fact_partitioned(conn):
+    """True when fact_sales is the UNION ALL view over month partitions."""
+    row = conn.execute("SELECT type FROM sqlite_master WHERE name = 'fact_sales'").fetchone()
+    return row is not None and row[0] == 'view'
+
+
+def bulk_insert(conn, table, df, chunk_rows):
+    """Insert a DataFrame with chunked executemany (caller owns the transaction)."""
+    columns = list(df.columns)
+    insert_sql = f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})"
+    for start in range(0, len(df), chunk_rows):
+        chunk = df.iloc[start:start + chunk_rows]
+        conn.executemany(insert_sql, chunk.itertuples(index=False, name=None))
+    return len(df)
+
+
+def stage_fact_rows(path, fact_df, partitioned):
+    """
+    Worker side of stage_region_facts: writes fact rows into a new staging database at `path`
+    (plain tables without keys or indexes; one per month partition when `partitioned`).
+    Returns the row count.
+    """
+    conn = sqlite3.connect(path, isolation_level=None)
+    try:
+        conn.execute("PRAGMA journal_mode = OFF")
+        conn.execute("PRAGMA synchronous = OFF")
+        targets = fact_partitions(fact_df) if partitioned else [('fact_sales', fact_df)]
+        conn.execute("BEGIN")
+        for table, rows in targets:
+            conn.execute(f"CREATE TABLE {table} ({', '.join(rows.columns)})")
+            bulk_insert(conn, table, rows, BULK_LOAD_CONFIG['chunk_rows'])
+        conn.execute("COMMIT")
+    finally:
+        conn.close()
+    return len(fact_df)
+
+
+def stage_region_facts(fact_df, stage_dir, partitioned, logger):
+    """
+    Writes fact_sales into per-region-group staging databases under `stage_dir`, one worker
+    process per group (REGION_PARALLEL_CONFIG). Returns the staging paths in region order,
+    or [] when the load should stay in-process (single worker or single region).
+    """
+    region_sizes = fact_df.groupby('region_id', sort=False).size()
+    workers = region_worker_count(len(fact_df), len(region_sizes))
+    if workers <= 1:
+        return []
+
+    stage_start = time.perf_counter()
+    slices = [fact_df[fact_df['region_id'].isin(group)] for group in region_groups(region_sizes, workers)]
+    paths = [os.path.join(stage_dir, f"fact_stage_{i}.db") for i in range(len(slices))]
+    with ProcessPoolExecutor(max_workers=len(slices)) as pool:
+        rows = sum(pool.map(stage_fact_rows, paths, slices, repeat(partitioned)))
+    logger.info(
+        f"Staged fact_sales: {rows} rows of {len(region_sizes)} regions in {len(paths)} worker processes "
+        f"in {time.perf_counter() - stage_start:.3f}s."
+    )
+    return paths
+
+
+def copy_staged_facts(conn, stages):
+    """
+    Copies staged fact rows into the load connection's fact tables with INSERT ... SELECT
+    (caller's transaction; the stages are attached as stage0, stage1, ...). Returns rows copied.
+    """
+    rows = 0
+    for i in range(len(stages)):
+        schema = f"stage{i}"
+        tables = [row[0] for row in conn.execute(f"SELECT name FROM {schema}.sqlite_master WHERE type = 'table'")]
+        for table in tables:
+            columns = ', '.join(row[1] for row in conn.execute(f"PRAGMA {schema}.table_info({table})"))
+            before = conn.total_changes
+            conn.execute(f"INSERT INTO main.{table} ({columns}) SELECT {columns} FROM {schema}.{table}")
+            rows += conn.total_changes - before
+    return rows
+
+
+def open_shadow_db(logger):
+    """
+    Opens the shadow database a full rebuild is loaded into (SHADOW_BUILD_CONFIG["location"]).
+    Returns (connection, path); path is None for an in-memory shadow. The shadow takes the
+    page size of analytics.db: the backup that publishes it cannot change the page size of a
+    WAL database.
+    """
+    location = SHADOW_BUILD_CONFIG['location']
+    if location == 'memory':
+        path = None
+        conn = sqlite3.connect(':memory:', isolation_level=None)
+    elif location == 'file':
+        fd, path = tempfile.mkstemp(prefix='analytics.', suffix='.shadow.db', dir=os.path.dirname(DB_PATH))
+        os.close(fd)
+        conn = sqlite3.connect(path, isolation_level=None)
+    else:
+        raise ValueError(f"Unknown shadow location '{location}'. Expected 'memory' or 'file'.")
+
+    if os.path.exists(DB_PATH):
+        live = sqlite3.connect(DB_PATH)
+        try:
+            page_size = live.execute("PRAGMA page_size").fetchone()[0]
+        finally:
+            live.close()
+        conn.execute(f"PRAGMA page_size = {int(page_size)}")
+    for pragma in SHADOW_PRAGMAS:
+        conn.execute(pragma)
+    logger.info(f"Building star schema in shadow database: {path or ':memory:'}")
+    return conn, path
+
+
+def star_objects(conn, schema='main'):
+    """(type, name, sql) of the star-schema tables, views and indexes in `schema`, in creation order."""
+    return conn.execute(
+        f"SELECT type, name, sql FROM {schema}.sqlite_master WHERE sql IS NOT NULL AND name NOT LIKE 'sqlite_%' "
+        "ORDER BY CASE type WHEN 'table' THEN 0 WHEN 'index' THEN 1 ELSE 2 END, rowid"
+    ).fetchall()
+
+
+def carry_over_objects(shadow, logger):
+    """
+    Copies the objects of analytics.db that the star schema does not own (the SQL-layer
+    tables, indexes and views of run_sql_layer.py, with their rows) into the shadow, so that
+    publishing the shadow keeps them. Star objects of analytics.db (the tables / views the
+    shadow holds, plus fact partitions of an earlier layout) are replaced, not copied.
+    Everything is read in one transaction, i.e. from one snapshot of analytics.db.
+    """
+    if not os.path.exists(DB_PATH):
+        return 0
+    shadow.execute("ATTACH DATABASE ? AS live", (DB_PATH,))
+    try:
+        owned = {name for kind, name, _ in star_objects(shadow) if kind in ('table', 'view')}
+        owned.add('fact_sales')
+        shadow.execute("BEGIN")
+        try:
+            live_objects = shadow.execute(
+                "SELECT type, name, tbl_name, sql FROM live.sqlite_master "
+                "WHERE sql IS NOT NULL AND name NOT LIKE 'sqlite_%' "
+                "ORDER BY CASE type WHEN 'table' THEN 0 WHEN 'index' THEN 1 ELSE 2 END, rowid"
+            ).fetchall()
+            carried = [
+                (kind, name, sql) for kind, name, table, sql in live_objects
+                if table not in owned and not partition_months([table])
+            ]
+            for kind, name, sql in carried:
+                shadow.execute(sql)
+                if kind == 'table':
+                    shadow.execute(f"INSERT INTO main.{name} SELECT * FROM live.{name}")
+            shadow.execute("COMMIT")
+        except Exception:
+            shadow.execute("ROLLBACK")
+            raise
+    finally:
+        shadow.execute("DETACH DATABASE live")
+    if carried:
+        logger.info(f"Carried {len(carried)} non-star objects of {DB_PATH} over into the shadow database.")
+    return len(carried)
+
+
+def swap_shadow_into_place(shadow, logger):
+    """
+    Publishes the finished shadow database as analytics.db.
+
+    The objects of analytics.db outside the star schema are first copied into the shadow
+    (carry_over_objects), then the sqlite3 online backup API copies the shadow into
+    analytics.db page by page, in one write transaction on analytics.db. Pages and indexes are
+    copied as built (no row-by-row INSERT ... SELECT, no index maintenance on the live file).
+    analytics.db stays in WAL mode: dashboards reading the old schema are never blocked and
+    never see a half-built one; they switch to the new schema at the commit. The WAL is then
+    checkpointed back into the database file. A SQL-layer load committed between the carry-over
+    and the backup would be dropped together with its _sql_layer_meta fingerprint, so the next
+    run_sql_layer.py simply reloads it.
+    """
+    swap_start = time.perf_counter()
+    carry_over_objects(shadow, logger)
+    objects = star_objects(shadow)
+
+    live = sqlite3.connect(DB_PATH, timeout=SHADOW_BUILD_CONFIG['swap_timeout_s'], isolation_level=None)
+    try:
+        live.execute("PRAGMA journal_mode = WAL")
+        shadow.backup(live)
+        busy, _, _ = live.execute("PRAGMA wal_checkpoint(TRUNCATE)").fetchone()
+        if busy:
+            logger.warning("WAL checkpoint deferred: readers still hold the previous schema.")
+    finally:
+        live.close()
+    logger.info(f"Swapped {len(objects)} objects into {DB_PATH} in {time.perf_counter() - swap_start:.3f}s.")
+
+
 def load_to_sqlite(data_dict, logger):
-    """Executes DDL and loads DataFrames to SQLite."""
-    logger.info(f"Connecting to database: {DB_PATH}")
-    
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
+    """
+    Executes DDL and bulk-loads DataFrames to SQLite.
+
+    Load path: the schema is built in a shadow database (SHADOW_BUILD_CONFIG, in memory by
+    default) so the live analytics.db is never dropped under its readers. In the shadow:
+    table DDL, chunked executemany of all tables inside one transaction (multi-region facts
+    are staged by worker processes and copied with INSERT ... SELECT, see stage_region_facts),
+    the CREATE INDEX statements from the DDL once the data is in, then the aggregates. The
+    result is swapped into analytics.db atomically (swap_shadow_into_place). Throughput is
+    logged per table.
+    """
+    # Autocommit mode: transactions are opened explicitly below
+    conn, shadow_path = open_shadow_db(logger)
+    load_start = time.perf_counter()
+    stage_dir = tempfile.TemporaryDirectory(prefix='analytics.stage.')
     
     try:
-        # 1. Execute DDL
+        # 1. Execute DDL (tables now, indexes after the load)
         with open(SQL_SCRIPT_PATH, 'r') as f:
-            sql_script = f.read()
-        cursor.executescript(sql_script)
-        logger.info("DDL executed successfully.")
+            statements = split_sql_statements(f.read())
+
+        # Partitioned fact: the fact_sales DDL is applied per month instead
+        months = sorted(set(data_dict['fact_sales']['date_id'] // 100))
+        partitioned = FACT_PARTITION_CONFIG['enabled'] and bool(months)
+        if partitioned:
+            fact_statements = [s for s in statements if is_fact_statement(s)]
+            statements = [s for s in statements if s not in fact_statements]
+            for year_month in months:
+                statements.extend(partition_statements(fact_statements, year_month))
+
+        index_statements = [s for s in statements if is_index_statement(s)]
+        for statement in statements:
+            if statement not in index_statements:
+                conn.execute(statement)
+        if partitioned:
+            conn.execute(union_view_sql(months))
+            logger.info(f"fact_sales partitioned by month: {len(months)} partitions ({months[0]}-{months[-1]}).")
+        logger.info(f"DDL executed successfully ({len(index_statements)} index builds deferred).")
         
-        # 2. Load DataFrames (Using 'append' as tables are freshly created by DDL)
-        # Note: index=False because we generated explicit PKs in the DataFrames
-        data_dict['dim_region'].to_sql('dim_region', conn, if_exists='append', index=False)
-        data_dict['dim_date'].to_sql('dim_date', conn, if_exists='append', index=False)
-        data_dict['dim_product'].to_sql('dim_product', conn, if_exists='append', index=False)
-        data_dict['fact_sales'].to_sql('fact_sales', conn, if_exists='append', index=False)
+        # Multi-region facts are staged by worker processes and attached (outside the transaction)
+        stages = stage_region_facts(data_dict['fact_sales'], stage_dir.name, partitioned, logger)
+        for i, path in enumerate(stages):
+            conn.execute(f"ATTACH DATABASE ? AS stage{i}", (path,))
         
-        logger.info("All tables populated successfully.")
-        conn.commit()
+        # 2. Bulk load all tables in a single transaction
+        # Note: explicit PKs were generated in the DataFrames
+        conn.execute("BEGIN")
+        if VALIDATION_CONFIG['mode'] == 'sql':
+            # Foreign keys are checked at COMMIT, after validate_schema_sql has counted violations
+            conn.execute("PRAGMA defer_foreign_keys = ON")
+        total_rows = 0
+        for table in LOAD_ORDER:
+            table_start = time.perf_counter()
+            if table == 'fact_sales' and stages:
+                rows = copy_staged_facts(conn, stages)
+            elif table == 'fact_sales' and partitioned:
+                rows = sum(
+                    bulk_insert(conn, partition, part, BULK_LOAD_CONFIG['chunk_rows'])
+                    for partition, part in fact_partitions(data_dict[table])
+                )
+            else:
+                rows = bulk_insert(conn, table, data_dict[table], BULK_LOAD_CONFIG['chunk_rows'])
+            seconds = time.perf_counter() - table_start
+            total_rows += rows
+            logger.info(f"Loaded {table}: {rows} rows in {seconds:.3f}s ({rows / max(seconds, 1e-9):,.0f} rows/sec).")
+        if VALIDATION_CONFIG['mode'] == 'sql':
+            validate_schema_sql(conn, logger)
+        conn.execute("COMMIT")
+        for i in range(len(stages)):
+            conn.execute(f"DETACH DATABASE stage{i}")
+
+        # 3. Build indexes on the populated tables
+        index_start = time.perf_counter()
+        conn.execute("BEGIN")
+        for statement in index_statements:
+            conn.execute(statement)
+        conn.execute("COMMIT")
+        logger.info(f"Built {len(index_statements)} indexes in {time.perf_counter() - index_start:.3f}s.")
+
+        # 4. Aggregate tables from the loaded fact
+        conn.execute("BEGIN")
+        refresh_aggregates(conn, logger)
+        conn.execute("COMMIT")
+
+        # Reporting queries must still be served by their covering indexes
+        check_query_plans(conn, logger)
+
+        # 5. Publish
+        swap_shadow_into_place(conn, logger)
+
+        total_seconds = time.perf_counter() - load_start
+        logger.info(
+            f"All tables populated successfully: {total_rows} rows in {total_seconds:.3f}s "
+            f"({total_rows / max(total_seconds, 1e-9):,.0f} rows/sec)."
+        )
         
+    except sqlite3.IntegrityError as e:
+        # Grain (UNIQUE) and NOT NULL constraints reject bad rows during the load itself
+        logger.error(f"Validation Failure: {e}")
+        raise ValueError("Schema Validation Failed. Check logs.") from e
     except sqlite3.Error as e:
+        # analytics.db is untouched unless the swap itself failed (its transaction rolls back)
         logger.error(f"Database Error: {e}")
-        conn.rollback()
+        if conn.in_transaction:
+            conn.rollback()
+        raise
+    finally:
+        conn.close()
+        stage_dir.cleanup()
+        if shadow_path is not None and os.path.exists(shadow_path):
+            os.remove(shadow_path)
+
+def refresh_aggregates(conn, logger, fact_keys=None):
+    """
+    Maintains the aggregate tables (AGGREGATES) from fact_sales inside the caller's transaction.
+
+    fact_keys=None rebuilds every aggregate. Otherwise fact_keys (product_id, date_id of the
+    upserted fact rows) limits the refresh to the aggregate rows those facts roll up into:
+    they are deleted and re-aggregated from fact_sales, so changed facts replace their old
+    contribution. An aggregate that is still empty (e.g. a database built before it existed)
+    is rebuilt in full.
+    """
+    refresh_start = time.perf_counter()
+    if fact_keys is not None:
+        conn.execute("DROP TABLE IF EXISTS temp.agg_delta_keys")
+        conn.execute("CREATE TEMP TABLE agg_delta_keys (product_id INTEGER, date_id INTEGER)")
+        conn.executemany(
+            "INSERT INTO agg_delta_keys VALUES (?, ?)",
+            fact_keys[['product_id', 'date_id']].itertuples(index=False, name=None)
+        )
+
+    for spec in AGGREGATES:
+        table = spec['table']
+        grain_cols = list(spec['grain'])
+        grain_exprs = list(spec['grain'].values())
+        columns = grain_cols + list(spec['columns'])
+        select = (
+            f"SELECT {', '.join(grain_exprs + list(spec['columns'].values()))} FROM fact_sales"
+            " {where} "
+            f"GROUP BY {', '.join(grain_exprs)}"
+        )
+        insert = f"INSERT INTO {table} ({', '.join(columns)}) "
+
+        full = fact_keys is None or conn.execute(f"SELECT 1 FROM {table} LIMIT 1").fetchone() is None
+        if full:
+            conn.execute(f"DELETE FROM {table}")
+            conn.execute(insert + select.format(where=""))
+        else:
+            touched = f"SELECT DISTINCT {', '.join(grain_exprs)} FROM agg_delta_keys"
+            conn.execute(f"DELETE FROM {table} WHERE ({', '.join(grain_cols)}) IN ({touched})")
+            conn.execute(insert + select.format(where=f"WHERE ({', '.join(grain_exprs)}) IN ({touched})"))
+
+    if fact_keys is not None:
+        conn.execute("DROP TABLE temp.agg_delta_keys")
+    logger.info(
+        f"Refreshed {len(AGGREGATES)} aggregate tables ({'full' if fact_keys is None else 'incremental'}) "
+        f"in {time.perf_counter() - refresh_start:.3f}s."
+    )
+
+
+def duckdb_statements(sql_script):
+    """
+    data_model.sql for DuckDB: same tables and constraints; PRAGMAs, CREATE INDEX
+    (columnar scans do not use them) and the SQLite-only WITHOUT ROWID are dropped, and
+    REAL becomes DOUBLE (DuckDB's REAL is 4-byte; SQLite stores REAL as 8-byte).
+    """
+    for statement in split_sql_statements(sql_script):
+        body = re.sub(r'--[^\n]*', '', statement).strip()
+        if body.upper().startswith('PRAGMA') or is_index_statement(statement):
+            continue
+        statement = re.sub(r'\)\s*WITHOUT\s+ROWID', ')', statement, flags=re.IGNORECASE)
+        yield re.sub(r'\bREAL\b', 'DOUBLE', statement)
+
+
+def mirror_to_duckdb(logger):
+    """
+    Copies the loaded star schema (facts, dimensions, aggregates) from SQLite into the
+    DuckDB analytics file, recreating it from the same DDL. SQLite stays the system of
+    record (validation, upserts); DuckDB serves the analytical reads when selected.
+    """
+    tables = LOAD_ORDER + [spec['table'] for spec in AGGREGATES]
+    mirror_start = time.perf_counter()
+
+    with open(SQL_SCRIPT_PATH, 'r') as f:
+        statements = list(duckdb_statements(f.read()))
+
+    source = sqlite3.connect(DB_PATH)
+    try:
+        with get_backend('duckdb') as duck:
+            logger.info(f"Mirroring star schema to DuckDB: {duck.path}")
+            for statement in statements:
+                duck.execute(statement)
+            total_rows = 0
+            for table in tables:
+                for chunk in pd.read_sql_query(f"SELECT * FROM {table}", source,
+                                               chunksize=BULK_LOAD_CONFIG['chunk_rows']):
+                    duck.insert_frame(table, chunk)
+                    total_rows += len(chunk)
+            duck.commit()
+    finally:
+        source.close()
+
+    seconds = time.perf_counter() - mirror_start
+    logger.info(f"DuckDB mirror completed: {total_rows} rows in {seconds:.3f}s.")
+
+
+def export_parquet(logger, months=None):
+    """
+    Writes the loaded star schema (facts, dimensions, aggregates) from analytics.db to the
+    Parquet export (PARQUET_EXPORT_CONFIG). months=None exports everything; otherwise only
+    those YYYYMM fact partitions are rewritten. Skipped with a warning without pyarrow.
+    """
+    if not parquet_available():
+        logger.warning("Parquet export skipped: pyarrow is not installed.")
+        return
+    export_start = time.perf_counter()
+    source = sqlite3.connect(f"file:{DB_PATH}?mode=ro", uri=True)
+    try:
+        manifest = export_star_schema(
+            source, LOAD_ORDER + [spec['table'] for spec in AGGREGATES],
+            export_dir=PARQUET_EXPORT_CONFIG['path'], months=months,
+            row_group_rows=PARQUET_EXPORT_CONFIG['row_group_rows'],
+            compression=PARQUET_EXPORT_CONFIG['compression'],
+        )
+    finally:
+        source.close()
+
+    scope = 'full' if months is None else f"{len(months)} fact months"
+    total_rows = sum(entry['rows'] for entry in manifest['tables'].values())
+    logger.info(
+        f"Parquet export ({scope}) completed: {total_rows} rows in {len(manifest['tables'])} tables "
+        f"in {time.perf_counter() - export_start:.3f}s -> {PARQUET_EXPORT_CONFIG['path']}"
+    )
+
+
+def upsert_statement(table, columns, key_columns, update_columns):
+    """
+    INSERT ... ON CONFLICT(key) DO UPDATE that only rewrites rows whose values changed
+    (DO NOTHING when there is nothing to update).
+    """
+    insert = f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})"
+    conflict = f"ON CONFLICT({', '.join(key_columns)})"
+    if not update_columns:
+        return f"{insert} {conflict} DO NOTHING"
+    assignments = ', '.join(f"{col} = excluded.{col}" for col in update_columns)
+    changed = ' OR '.join(f"{table}.{col} IS NOT excluded.{col}" for col in update_columns)
+    return f"{insert} {conflict} DO UPDATE SET {assignments} WHERE {changed}"
+
+
+# Upsert specs: table -> (conflict key, columns updated on conflict)
+UPSERT_SPECS = {
+    'dim_region': (['region_id'], ['region_name']),
+    'dim_date': (['date_id'], []),
+    # SCD2: product_key is stable across loads (stable_product_keys); a version's price and
+    # validity are refreshed in place, new versions are appended
+    'dim_product': (['product_key'], ['unit_price', 'unit_cost', 'valid_to', 'is_current']),
+    # sales_id is left to SQLite for new rows (numbered in Python when partitioned); existing rows keep theirs
+    'fact_sales': (['product_id', 'date_id', 'region_id'], ['product_key', 'quantity', 'revenue', 'cost']),
+    'fact_inventory_snapshot': (['product_id', 'date_id'], ['product_key'] + SNAPSHOT_MEASURES),
+}
+
+
+def stable_region_ids(conn, data_dict, logger):
+    """
+    Maps the region_id numbering of a freshly built dim_region onto the IDs already stored
+    (matched on region_name); new regions are numbered after MAX(region_id). Returns data_dict
+    with dim_region and fact_sales remapped.
+    """
+    dim_region = data_dict['dim_region']
+    stored = pd.read_sql_query("SELECT region_id, region_name FROM dim_region", conn)
+    stored_ids = dim_region['region_name'].map(stored.set_index('region_name')['region_id'])
+    new = stored_ids.isna()
+    next_id = int(stored['region_id'].max()) + 1 if not stored.empty else 1
+    stored_ids[new] = np.arange(next_id, next_id + new.sum())
+    if new.any() and not stored.empty:
+        logger.info(f"Dim_Region: new regions {dim_region.loc[new, 'region_name'].tolist()}.")
+
+    id_map = pd.Series(stored_ids.astype('int64').to_numpy(), index=dim_region['region_id'])
+    remapped = dict(data_dict)
+    for table in ('dim_region', 'fact_sales'):
+        remapped[table] = data_dict[table].assign(region_id=data_dict[table]['region_id'].map(id_map))
+    return remapped
+
+
+def stable_product_keys(conn, data_dict, logger):
+    """
+    Maps the product_key numbering of a freshly built dim_product onto the keys already stored
+    (matched on the version key product_id + valid_from); new versions are numbered after
+    MAX(product_key). Returns data_dict with dim_product and both facts remapped.
+
+    Versions are only ever appended after a product's latest stored version. A rebuilt history
+    that drops a stored version or inserts one before it (restated prices / costs) would leave
+    older facts on the wrong version, so it is rejected in favour of a full rebuild.
+    """
+    dim_product = data_dict['dim_product']
+    stored = pd.read_sql_query("SELECT product_key, product_id, valid_from FROM dim_product", conn)
+    matched = dim_product[['product_key', 'product_id', 'valid_from']].merge(
+        stored, on=['product_id', 'valid_from'], how='left', suffixes=('', '_stored')
+    )
+
+    known = stored[stored['product_id'].isin(dim_product['product_id'])]
+    dropped = ~known.set_index(['product_id', 'valid_from']).index.isin(
+        dim_product.set_index(['product_id', 'valid_from']).index
+    )
+    new = matched['product_key_stored'].isna()
+    latest_start = matched['product_id'].map(stored.groupby('product_id')['valid_from'].max())
+    inserted = new & latest_start.notna() & (matched['valid_from'] <= latest_start)
+    if dropped.any() or inserted.any():
+        products = sorted(set(known.loc[dropped, 'product_id']) | set(matched.loc[inserted, 'product_id']))
+        raise ValueError(
+            f"Product history restated for product_id {products[:10]}; "
+            "versions can only be appended incrementally. Run a full rebuild."
+        )
+
+    next_key = int(stored['product_key'].max()) + 1 if not stored.empty else 1
+    matched.loc[new, 'product_key_stored'] = np.arange(next_key, next_key + new.sum())
+    key_map = pd.Series(matched['product_key_stored'].astype('int64').to_numpy(), index=matched['product_key'])
+    if new.any():
+        logger.info(f"Dim_Product: {new.sum()} new product versions.")
+
+    remapped = dict(data_dict)
+    for table in ('dim_product', 'fact_sales', 'fact_inventory_snapshot'):
+        remapped[table] = data_dict[table].assign(product_key=data_dict[table]['product_key'].map(key_map))
+    return remapped
+
+
+def prepare_fact_partitions(conn, fact_df, fact_statements, logger):
+    """
+    Readies the month partitions an incremental fact upsert writes to (caller's transaction):
+    rejects closed months (FACT_PARTITION_CONFIG["open_months"]), creates the partitions of new
+    months and rebuilds the fact_sales view over them. Returns fact_df with sales_id numbered
+    after the existing partitions (SQLite cannot number rows across tables); rows that already
+    exist keep their sales_id on conflict.
+    """
+    existing = partition_months(row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'"))
+    months = sorted(set(fact_df['date_id'] // 100))
+
+    open_months = FACT_PARTITION_CONFIG['open_months']
+    if open_months is not None and months:
+        all_months = sorted(set(existing) | set(months))
+        first_open = all_months[max(len(all_months) - open_months, 0)]
+        closed = [m for m in months if m < first_open]
+        if closed:
+            raise ValueError(
+                f"Incremental load touches closed fact_sales partitions {closed} "
+                f"(open_months={open_months}); restate them with a full rebuild."
+            )
+
+    new_months = [m for m in months if m not in existing]
+    if new_months:
+        for year_month in new_months:
+            for statement in partition_statements(fact_statements, year_month):
+                conn.execute(statement)
+        conn.execute("DROP VIEW fact_sales")
+        conn.execute(union_view_sql(existing + new_months))
+        logger.info(f"Added fact_sales partitions: {new_months}.")
+
+    # MAX(rowid) per partition is a b-tree edge lookup (the view would be scanned)
+    last_id = max(
+        [conn.execute(f"SELECT COALESCE(MAX(sales_id), 0) FROM {partition_name(m)}").fetchone()[0] for m in existing],
+        default=0
+    )
+    return fact_df.assign(sales_id=np.arange(last_id + 1, last_id + 1 + len(fact_df)))
+
+
+def upsert_to_sqlite(data_dict, logger):
+    """
+    Incremental load: keeps the existing tables (DROP statements are skipped, CREATE ... IF NOT
+    EXISTS builds anything missing) and upserts the given rows in one transaction. Unchanged rows
+    are not rewritten, so the write volume follows the daily delta. Product versions keep their
+    stored product_key and region_id (stable_product_keys, stable_region_ids). Deltas are
+    small, so they are upserted in-process (no per-region staging). Grain protection still comes
+    from UNIQUE(product_id, date_id, region_id), which is also the fact upsert's conflict target.
+    A partitioned fact_sales is upserted partition by partition (prepare_fact_partitions).
+    """
+    logger.info(f"Connecting to database (incremental): {DB_PATH}")
+
+    conn = sqlite3.connect(DB_PATH, isolation_level=None)
+    load_start = time.perf_counter()
+
+    try:
+        for pragma in LOAD_PRAGMAS:
+            conn.execute(pragma)
+
+        with open(SQL_SCRIPT_PATH, 'r') as f:
+            statements = split_sql_statements(f.read())
+        # The existing layout wins: a partitioned fact keeps its partitions and view
+        partitioned = is_fact_partitioned(conn)
+        fact_statements = [s for s in statements if is_fact_statement(s)]
+        for statement in statements:
+            if re.sub(r'--[^\n]*', '', statement).strip().upper().startswith('DROP'):
+                continue
+            if partitioned and statement in fact_statements:
+                continue
+            conn.execute(statement)
+
+        conn.execute("BEGIN")
+        data_dict = stable_region_ids(conn, data_dict, logger)
+        data_dict = stable_product_keys(conn, data_dict, logger)
+        if VALIDATION_CONFIG['mode'] == 'sql':
+            conn.execute("PRAGMA defer_foreign_keys = ON")
+            stage_validation_keys(conn, data_dict)
+        total_rows = 0
+        for table in LOAD_ORDER:
+            df = data_dict[table]
+            if table == 'fact_sales' and partitioned:
+                df = prepare_fact_partitions(conn, df, fact_statements, logger)
+                targets = list(fact_partitions(df))
+            elif table == 'fact_sales':
+                df = df.drop(columns=['sales_id'], errors='ignore')
+                targets = [(table, df)]
+            else:
+                targets = [(table, df)]
+            key_columns, update_columns = UPSERT_SPECS[table]
+
+            before = conn.total_changes
+            table_start = time.perf_counter()
+            for target, rows in targets:
+                sql = upsert_statement(target, list(rows.columns), key_columns, update_columns)
+                for start in range(0, len(rows), BULK_LOAD_CONFIG['chunk_rows']):
+                    chunk = rows.iloc[start:start + BULK_LOAD_CONFIG['chunk_rows']]
+                    conn.executemany(sql, chunk.itertuples(index=False, name=None))
+            seconds = time.perf_counter() - table_start
+            total_rows += len(df)
+            logger.info(
+                f"Upserted {table}: {len(df)} rows offered, {conn.total_changes - before} inserted/updated "
+                f"in {seconds:.3f}s ({len(df) / max(seconds, 1e-9):,.0f} rows/sec)."
+            )
+        # Only the upserted rows are validated; a failure rolls the whole upsert back
+        if VALIDATION_CONFIG['mode'] == 'sql':
+            validate_schema_sql(conn, logger, incremental=True)
+        # Aggregates follow the fact in the same transaction
+        refresh_aggregates(conn, logger, fact_keys=data_dict['fact_sales'])
+        conn.execute("COMMIT")
+        conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+
+        total_seconds = time.perf_counter() - load_start
+        logger.info(
+            f"Incremental load completed: {total_rows} rows in {total_seconds:.3f}s "
+            f"({total_rows / max(total_seconds, 1e-9):,.0f} rows/sec)."
+        )
+
+    except ValueError:
+        # Rejected delta (validation, closed partitions): nothing from this upsert is kept
+        if conn.in_transaction:
+            conn.rollback()
+        raise
+    except sqlite3.IntegrityError as e:
+        logger.error(f"Validation Failure: {e}")
+        if conn.in_transaction:
+            conn.rollback()
+        raise ValueError("Schema Validation Failed. Check logs.") from e
+    except sqlite3.Error as e:
+        logger.error(f"Database Error: {e}")
+        if conn.in_transaction:
+            conn.rollback()
         raise
     finally:
         conn.close()
@@ -349,7 +1500,7 @@ def generate_erd(logger):
                 'size': (320, 120)
             },
             'PROD': {
-                'label': 'dim_product\n(PK: product_id)',
+                'label': 'dim_product\n(PK: product_key, SCD2)',
                 'color': DIM_COLOR,
                 'pos': (cx - 400, cy), # Left
                 'size': (250, 100)
@@ -435,10 +1586,15 @@ def generate_erd(logger):
 # ==============================================================================
 # MAIN ORCHESTRATOR
 # ==============================================================================
-def main(data=None, correlation_id=None):
+def main(data=None, correlation_id=None, incremental=False):
     """
     Main orchestrator for Star Schema Build.
     Accepts optional 'data' dict from pipeline and optional 'correlation_id'.
+
+    incremental=True upserts into the existing database instead of rebuilding it. The fact
+    rows come from data['sales_delta'] / data['inventory_delta'] when present (see
+    run_features_incremental), otherwise from data['sales'] / data['inventory']; dimensions
+    are derived from the full data['sales'] / ['inventory'].
     """
     if correlation_id is None:
         correlation_id = str(uuid.uuid4())
@@ -454,32 +1610,66 @@ def main(data=None, correlation_id=None):
             logger.info("Using data passed from upstream pipeline.")
             raw_data = data
         
+        # Incremental runs build facts from the changed daily rows only
+        fact_source = raw_data['sales']
+        snapshot_source = raw_data['inventory']
+        if incremental and raw_data.get('sales_delta') is not None:
+            fact_source = raw_data['sales_delta']
+        if incremental and raw_data.get('inventory_delta') is not None:
+            snapshot_source = raw_data['inventory_delta']
+
         # 2. Build Dimensions (with explicit SKs)
-        dim_region = build_dim_region(logger)
-        dim_date = build_dim_date(raw_data['sales'], logger)
+        dim_region = build_dim_region(raw_data['sales'], logger)
+        # Calendar covers both fact sources
+        fact_dates = pd.concat(
+            [pd.to_datetime(fact_source['date']), pd.to_datetime(snapshot_source['date'])], ignore_index=True
+        ).to_frame('date')
+        dim_date = build_dim_date(fact_dates, logger)
         dim_product = build_dim_product(raw_data['sales'], raw_data['inventory'], logger)
         
         # 3. Build Fact
-        fact_sales = build_fact_sales(
-            raw_data['sales'], 
+        fact_sales = build_fact_sales_by_region(
+            fact_source, 
             dim_date, 
             dim_product, 
+            dim_region,
             logger
         )
+        fact_inventory_snapshot = build_fact_inventory_snapshot(snapshot_source, dim_date, dim_product, logger)
         
         # 4. Strict Validation (Including Grain Check)
-        validate_schema(fact_sales, dim_product, dim_date, dim_region, logger)
+        # SQL mode validates inside the load transaction instead (validate_schema_sql)
+        if VALIDATION_CONFIG['mode'] not in ('pandas', 'sql'):
+            raise ValueError(f"Unknown validation mode '{VALIDATION_CONFIG['mode']}'. Expected 'pandas' or 'sql'.")
+        if VALIDATION_CONFIG['mode'] == 'pandas':
+            validate_schema(fact_sales, dim_product, dim_date, dim_region, logger, df_snapshot=fact_inventory_snapshot)
         
         # 5. Pack Data
         schema_data = {
             'dim_region': dim_region,
             'dim_date': dim_date,
             'dim_product': dim_product,
-            'fact_sales': fact_sales
+            'fact_sales': fact_sales,
+            'fact_inventory_snapshot': fact_inventory_snapshot
         }
         
         # 6. Load to DB
-        load_to_sqlite(schema_data, logger)
+        if incremental:
+            # Dates already loaded are skipped by the dim_date upsert (ON CONFLICT DO NOTHING)
+            upsert_to_sqlite(schema_data, logger)
+        else:
+            load_to_sqlite(schema_data, logger)
+
+        # Analytical copy for the DuckDB backend (DSS_ANALYTICS_BACKEND=duckdb)
+        if backend_name() == 'duckdb':
+            mirror_to_duckdb(logger)
+
+        # Columnar copy for BI readers (incremental loads rewrite the touched fact months)
+        if PARQUET_EXPORT_CONFIG['enabled']:
+            touched_months = None
+            if incremental:
+                touched_months = sorted(set(fact_sales['date_id'] // 100) | set(fact_inventory_snapshot['date_id'] // 100))
+            export_parquet(logger, months=touched_months)
         
         # 7. Documentation
         generate_erd(logger)
@@ -1,5 +1,5 @@
 -- data_model/data_model.sql
--- Version: 1.2 (Final)
+-- Version: 1.10
 -- Description: Star Schema DDL for DSS Week 10
 -- Standards: Strict Star Schema, User-Managed Keys, Grain Protection
 -- Dialect: SQLite
@@ -8,40 +8,60 @@
 PRAGMA foreign_keys = ON;
 
 -- Clean up existing objects in correct order (Fact first, then Dims)
+-- (Skipped by the incremental loader, which upserts into the existing tables)
+DROP TABLE IF EXISTS agg_product_month;
+DROP TABLE IF EXISTS agg_daily_sales;
+DROP TABLE IF EXISTS agg_product_totals;
+DROP TABLE IF EXISTS fact_inventory_snapshot;
 DROP TABLE IF EXISTS fact_sales;
 DROP TABLE IF EXISTS dim_product;
 DROP TABLE IF EXISTS dim_date;
 DROP TABLE IF EXISTS dim_region;
 
 -- 1. Dimension: Region
--- Logic: Static dimension for this project scope.
-CREATE TABLE dim_region (
-    region_id INTEGER PRIMARY KEY,  -- Managed by Python (No AUTOINCREMENT)
-    region_name TEXT NOT NULL
+-- Logic: One row per sales region (region column of the sales feed; 'ALL' without one).
+CREATE TABLE IF NOT EXISTS dim_region (
+    region_id INTEGER PRIMARY KEY,  -- Managed by Python (No AUTOINCREMENT, stable across loads)
+    region_name TEXT NOT NULL UNIQUE
 );
 
 -- 2. Dimension: Date
--- Logic: Time dimension with surrogate key.
-CREATE TABLE dim_date (
-    date_id INTEGER PRIMARY KEY,    -- Managed by Python (No AUTOINCREMENT)
+-- Logic: Contiguous calendar (every day in range, with or without sales).
+CREATE TABLE IF NOT EXISTS dim_date (
+    date_id INTEGER PRIMARY KEY,    -- Smart key YYYYMMDD, derived from the date in Python
     full_date TEXT NOT NULL UNIQUE, -- Format: YYYY-MM-DD
     day INTEGER,
     month INTEGER,
     quarter INTEGER,
-    year INTEGER
+    year INTEGER,
+    day_of_week INTEGER,            -- ISO: 1 = Monday ... 7 = Sunday
+    is_weekend INTEGER,             -- 0/1
+    iso_year INTEGER,
+    iso_week INTEGER,
+    is_month_start INTEGER,         -- 0/1
+    is_month_end INTEGER,           -- 0/1
+    fiscal_year INTEGER,            -- Named by the calendar year the fiscal year ends in
+    fiscal_quarter INTEGER,
+    fiscal_month INTEGER,           -- 1 = first month of the fiscal year
+    is_holiday INTEGER              -- 0/1, from CALENDAR_CONFIG holidays
 );
 
 -- 3. Dimension: Product
--- Logic: Type 1 SCD. product_id serves as the SK for this implementation.
-CREATE TABLE dim_product (
-    product_id INTEGER PRIMARY KEY, -- Managed by Python (Business Key used as SK)
-    unit_price REAL,
-    unit_cost REAL
+-- Logic: Type 2 SCD. One row per product version; versions of a product are contiguous in time.
+CREATE TABLE IF NOT EXISTS dim_product (
+    product_key INTEGER PRIMARY KEY, -- Surrogate Key of the version (Managed by Python, stable across loads)
+    product_id INTEGER NOT NULL,    -- Business Key
+    unit_price REAL,                -- Realized average price over the version
+    unit_cost REAL,
+    valid_from INTEGER NOT NULL,    -- First date_id (YYYYMMDD) the version is in effect
+    valid_to INTEGER NOT NULL,      -- Last date_id of the version (99991231 while current)
+    is_current INTEGER NOT NULL,    -- 0/1
+    UNIQUE(product_id, valid_from)  -- Also serves as-of lookups by (product, date)
 );
 
 -- 4. Fact: Sales
 -- Analytical Grain: One row per Product per Date per Region
-CREATE TABLE fact_sales (
+CREATE TABLE IF NOT EXISTS fact_sales (
     -- Technical Surrogate Key (Row Identifier Only)
     -- NOT part of the analytical grain.
     sales_id INTEGER PRIMARY KEY,   
@@ -51,13 +71,16 @@ CREATE TABLE fact_sales (
     date_id INTEGER NOT NULL,
     region_id INTEGER NOT NULL,
     
+    -- Product version in effect on date_id (SCD2, resolved at load)
+    product_key INTEGER NOT NULL,
+    
     -- Measures
     quantity INTEGER,
     revenue REAL,
-    cost REAL,
+    cost REAL,                      -- quantity x unit_cost of the product version
     
     -- Explicit Referential Integrity
-    FOREIGN KEY (product_id) REFERENCES dim_product(product_id),
+    FOREIGN KEY (product_key) REFERENCES dim_product(product_key),
     FOREIGN KEY (date_id) REFERENCES dim_date(date_id),
     FOREIGN KEY (region_id) REFERENCES dim_region(region_id),
     
@@ -65,7 +88,73 @@ CREATE TABLE fact_sales (
     UNIQUE(product_id, date_id, region_id)
 );
 
--- Performance Indexes (Foreign Keys)
-CREATE INDEX idx_fact_product ON fact_sales(product_id);
-CREATE INDEX idx_fact_date ON fact_sales(date_id);
-CREATE INDEX idx_fact_region ON fact_sales(region_id);
\ No newline at end of file
+-- 5. Fact: Inventory Snapshot (periodic snapshot)
+-- Analytical Grain: One row per Product per Date (stock position at end of day)
+-- The grain key is the clustered primary key, so per-product date ranges are range scans.
+CREATE TABLE IF NOT EXISTS fact_inventory_snapshot (
+    product_id INTEGER NOT NULL,
+    date_id INTEGER NOT NULL,
+    product_key INTEGER NOT NULL,   -- Product version in effect on date_id (SCD2)
+    
+    -- Semi-additive measures (sum across products, not across dates)
+    stock_on_hand INTEGER,
+    reorder_point INTEGER,
+    lead_time_days INTEGER,
+    
+    -- Daily sales context and coverage ratio (from the features stage)
+    daily_quantity_sold REAL,
+    daily_revenue REAL,
+    stock_ratio REAL,
+    
+    -- Rolling mean daily demand over the last 7 / 14 / 28 calendar days (features stage)
+    demand_mean_7d REAL,
+    demand_mean_14d REAL,
+    demand_mean_28d REAL,
+    
+    FOREIGN KEY (product_key) REFERENCES dim_product(product_key),
+    FOREIGN KEY (date_id) REFERENCES dim_date(date_id),
+    
+    -- GRAIN PROTECTION
+    PRIMARY KEY (product_id, date_id)
+) WITHOUT ROWID;
+
+-- Performance Indexes (workload-driven, see data_model/workload_queries.py)
+-- Covering: the dashboard / decision-brief queries read these instead of the table, already in
+-- their GROUP BY order. They also serve the product_id / date_id foreign keys.
+-- Date window by (date, product, region): enhanced_dashboard time series
+CREATE INDEX IF NOT EXISTS idx_fact_date_cover ON fact_sales(date_id, product_id, region_id, quantity, revenue, cost);
+-- Per-product totals and date span: decision brief fallback, agg_product_* refresh
+CREATE INDEX IF NOT EXISTS idx_fact_product_cover ON fact_sales(product_id, date_id, quantity, revenue, cost);
+-- Region-leading date window: enhanced_dashboard time series for one region
+CREATE INDEX IF NOT EXISTS idx_fact_region_cover ON fact_sales(region_id, date_id, product_id, quantity, revenue, cost);
+CREATE INDEX IF NOT EXISTS idx_snapshot_date ON fact_inventory_snapshot(date_id);
+
+-- 6. Aggregates (maintained by the builder from fact_sales, read via aggregate_navigator)
+-- Logic: Summary tables at coarser grains; rebuilt on full loads, refreshed per touched key on incremental loads.
+CREATE TABLE IF NOT EXISTS agg_product_totals (
+    product_id INTEGER PRIMARY KEY,
+    fact_rows INTEGER,
+    quantity INTEGER,
+    revenue REAL,
+    cost REAL,
+    first_date_id INTEGER,          -- First/last date_id with sales
+    last_date_id INTEGER
+);
+
+CREATE TABLE IF NOT EXISTS agg_daily_sales (
+    date_id INTEGER PRIMARY KEY,
+    fact_rows INTEGER,
+    quantity INTEGER,
+    revenue REAL,
+    cost REAL
+);
+
+CREATE TABLE IF NOT EXISTS agg_product_month (
+    product_id INTEGER NOT NULL,
+    year_month INTEGER NOT NULL,    -- YYYYMM (date_id / 100)
+    fact_rows INTEGER,
+    quantity INTEGER,
+    revenue REAL,
+    cost REAL,
+    PRIMARY KEY (product_id, year_month)
+) WITHOUT ROWID;
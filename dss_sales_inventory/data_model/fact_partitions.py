@@ -0,0 +1,83 @@
+# dss_sales_inventory/data_model/fact_partitions.py
+"""
+Year-month partitions of fact_sales.
+
+With FACT_PARTITION_CONFIG["enabled"] (build_star_schema), the fact is stored as one table
+per month, fact_sales_pYYYYMM, with the columns, keys and indexes of fact_sales; fact_sales
+itself becomes a UNION ALL view over them, so every existing reader keeps working. Closed
+months are never rewritten by incremental loads (only partitions of the delta are touched).
+
+fact_source() prunes partitions from a date_id range: it returns a FROM-clause source
+covering only the months the range can touch, so recent-window queries read recent
+partitions only. Unpartitioned databases (and the DuckDB mirror, where fact_sales is a
+single columnar table) get plain fact_sales.
+
+Example:
+    with get_backend(read_only=True) as db:
+        source = fact_source(db, date_key("2025-10-01"), date_key("2025-12-31"))
+        db.query(f"SELECT SUM(revenue) FROM {source} f WHERE f.date_id BETWEEN ? AND ?", [...])
+"""
+import re
+import pandas as pd
+
+FACT_TABLE = "fact_sales"
+PARTITION_PREFIX = "fact_sales_p"
+PARTITION_PATTERN = re.compile(rf"^{PARTITION_PREFIX}(\d{{6}})$")
+
+
+def date_key(value) -> int:
+    """YYYYMMDD date_id for a date-like value (same key as dim_date)."""
+    return int(pd.Timestamp(value).strftime("%Y%m%d"))
+
+
+def partition_name(year_month: int) -> str:
+    """Partition table holding the fact rows of YYYYMM."""
+    return f"{PARTITION_PREFIX}{int(year_month)}"
+
+
+def partition_months(table_names) -> list:
+    """Sorted YYYYMM of the partition tables among `table_names`."""
+    months = []
+    for name in table_names:
+        match = PARTITION_PATTERN.match(name)
+        if match:
+            months.append(int(match.group(1)))
+    return sorted(months)
+
+
+def union_view_sql(months) -> str:
+    """CREATE VIEW fact_sales over the given month partitions."""
+    if not months:
+        raise ValueError("A partitioned fact_sales needs at least one partition.")
+    selects = " UNION ALL ".join(f"SELECT * FROM {partition_name(m)}" for m in sorted(months))
+    return f"CREATE VIEW {FACT_TABLE} AS {selects}"
+
+
+def prune_months(months, date_from=None, date_to=None) -> list:
+    """Months whose partition can hold date_ids in [date_from, date_to] (None = open bound)."""
+    low = date_from // 100 if date_from is not None else None
+    high = date_to // 100 if date_to is not None else None
+    return [m for m in months if (low is None or m >= low) and (high is None or m <= high)]
+
+
+def fact_source(db, date_from=None, date_to=None) -> str:
+    """
+    FROM-clause source (table name or parenthesised UNION ALL) for fact_sales rows with
+    date_id in [date_from, date_to]. Callers still filter on date_id: pruning is by month.
+    """
+    return pruned_source(db.table_names(), date_from, date_to)
+
+
+def pruned_source(table_names, date_from=None, date_to=None) -> str:
+    """fact_source over a known set of table names (e.g. from sqlite_master)."""
+    months = partition_months(table_names)
+    if not months:
+        return FACT_TABLE
+
+    selected = prune_months(months, date_from, date_to)
+    if not selected:
+        # Empty source with the fact's columns
+        return f"(SELECT * FROM {partition_name(months[0])} WHERE 0)"
+    if len(selected) == 1:
+        return partition_name(selected[0])
+    return "(" + " UNION ALL ".join(f"SELECT * FROM {partition_name(m)}" for m in selected) + ")"
@@ -0,0 +1,99 @@
+# dss_sales_inventory/data_model/inventory_snapshot.py
+"""
+Readers for fact_inventory_snapshot (star schema, analytics.db).
+
+Rows come back shaped like the inventory_features table (same columns and order, `date` as
+YYYY-MM-DD text, unit_cost of the dim_product version in effect on the snapshot date), so the KPI, risk and scenario layers can
+switch from the feature partitions to indexed SQL without changing their logic.
+"""
+import os
+import sqlite3
+from contextlib import closing
+import pandas as pd
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DB_PATH = os.path.join(PROJECT_ROOT, 'analysis', 'analytics.db')
+
+SNAPSHOT_TABLE = "fact_inventory_snapshot"
+
+SNAPSHOT_COLUMNS = """
+    s.product_id,
+    d.full_date AS date,
+    s.stock_on_hand,
+    s.reorder_point,
+    s.lead_time_days,
+    p.unit_cost,
+    s.daily_quantity_sold,
+    s.daily_revenue,
+    s.stock_ratio
+"""
+
+# Full history (optionally filtered), in (product_id, date) order: a range scan on the primary key
+SQL_SNAPSHOT = f"""
+SELECT {SNAPSHOT_COLUMNS}
+FROM fact_inventory_snapshot s
+JOIN dim_date d ON d.date_id = s.date_id
+JOIN dim_product p ON p.product_key = s.product_key
+{{where}}
+ORDER BY s.product_id, s.date_id
+"""
+
+# One row per product: the first or latest snapshot, found by a primary-key seek per product
+# (CROSS JOIN keeps the current dim_product versions as the outer loop instead of scanning the
+# snapshot table, in (product_id, valid_from) index order; unit_cost comes from the version of
+# the snapshot row)
+SQL_SNAPSHOT_PER_PRODUCT = f"""
+SELECT {SNAPSHOT_COLUMNS}
+FROM dim_product cur
+CROSS JOIN fact_inventory_snapshot s
+    ON cur.is_current = 1
+   AND s.product_id = cur.product_id
+   AND s.date_id = (SELECT {{edge}}(date_id) FROM fact_inventory_snapshot WHERE product_id = cur.product_id)
+JOIN dim_product p ON p.product_key = s.product_key
+JOIN dim_date d ON d.date_id = s.date_id
+{{where}}
+ORDER BY cur.product_id
+"""
+
+PER_PRODUCT_EDGES = {"first": "MIN", "latest": "MAX"}
+
+
+def snapshot_available(db_path: str = DB_PATH) -> bool:
+    """True when the database exists and holds a populated fact_inventory_snapshot."""
+    if not os.path.exists(db_path):
+        return False
+    # sqlite3's own context manager only commits; closing() releases the connection
+    with closing(sqlite3.connect(db_path)) as conn:
+        exists = conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (SNAPSHOT_TABLE,)
+        ).fetchone()
+        return bool(exists) and conn.execute(f"SELECT 1 FROM {SNAPSHOT_TABLE} LIMIT 1").fetchone() is not None
+
+
+def load_inventory_snapshot(db_path: str = DB_PATH, product_ids=None, per_product: str = None) -> pd.DataFrame:
+    """
+    Inventory snapshots as an inventory_features-shaped frame.
+
+    product_ids: restrict to these products (None = all).
+    per_product: None for the full history, "first" / "latest" for one row per product.
+    """
+    if per_product is not None and per_product not in PER_PRODUCT_EDGES:
+        raise ValueError(f"per_product must be one of {sorted(PER_PRODUCT_EDGES)} or None")
+
+    params = []
+    where = ""
+    if product_ids is not None:
+        product_ids = [int(pid) for pid in product_ids]
+        if not product_ids:
+            where = "WHERE 0"
+        else:
+            where = f"WHERE s.product_id IN ({', '.join('?' * len(product_ids))})"
+            params = product_ids
+
+    if per_product is None:
+        sql = SQL_SNAPSHOT.format(where=where)
+    else:
+        sql = SQL_SNAPSHOT_PER_PRODUCT.format(edge=PER_PRODUCT_EDGES[per_product], where=where)
+
+    with closing(sqlite3.connect(db_path)) as conn:
+        return pd.read_sql_query(sql, conn, params=params)
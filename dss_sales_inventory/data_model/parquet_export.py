@@ -0,0 +1,211 @@
+# dss_sales_inventory/data_model/parquet_export.py
+"""
+Columnar Parquet export of the star schema for BI consumers.
+
+The builder (PARQUET_EXPORT_CONFIG in build_star_schema) writes the loaded tables from
+analytics.db to analysis/star_parquet:
+
+    star_parquet/_manifest.json                         tables, columns, rows per partition
+    star_parquet/dim_product.parquet                    dimensions and aggregates: one file each
+    star_parquet/fact_sales/month=YYYYMM/part-0.parquet facts: Hive-style month partitions
+
+Fact partitions are sorted by (date_id, product_id), so the row-group min/max statistics of
+date_id are tight; key and text columns are dictionary encoded. read_star_table() reads
+only the requested columns and turns a date_id range into filters on the month partitions
+and the date_id statistics, so a year of facts reads 12 partitions' worth of row groups.
+Full rebuilds replace the whole export; incremental loads rewrite the month partitions they
+touched (each file is written next to its target and swapped in with os.replace).
+
+Example:
+    fact = read_star_table("fact_sales", columns=["date_id", "product_id", "revenue"],
+                           date_from=20240101, date_to=20241231)
+"""
+import os
+import json
+import shutil
+import tempfile
+from datetime import datetime
+
+import pandas as pd
+
+from data_model.fact_partitions import pruned_source
+
+# pyarrow is optional: without it the builder skips the export
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = pq = None
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+EXPORT_DIR = os.path.join(PROJECT_ROOT, "analysis", "star_parquet")
+MANIFEST_FILE = "_manifest.json"
+
+# Tables exported as month partitions, with the sort order of each partition
+MONTH_PARTITIONED = {
+    "fact_sales": ["date_id", "product_id", "region_id"],
+    "fact_inventory_snapshot": ["date_id", "product_id"],
+}
+PARTITION_COLUMN = "month"
+# Unique row ids gain nothing from a dictionary
+DICTIONARY_EXCLUDE = {"sales_id"}
+
+
+def parquet_available() -> bool:
+    return pq is not None
+
+
+def _require_pyarrow():
+    if pq is None:
+        raise ImportError("The Parquet export requires the pyarrow package (pip install pyarrow)")
+
+
+def dictionary_columns(frame: pd.DataFrame) -> list:
+    """Columns to dictionary-encode: repeating keys (*_id, *_key) and text columns."""
+    return [
+        col for col in frame.columns
+        if col not in DICTIONARY_EXCLUDE
+        and (col.endswith("_id") or col.endswith("_key") or not pd.api.types.is_numeric_dtype(frame[col]))
+    ]
+
+
+def write_parquet(frame: pd.DataFrame, path: str, row_group_rows: int, compression: str) -> int:
+    """Writes one Parquet file through a temporary sibling (readers never see a partial file)."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    # Leading '.' keeps the temporary file out of dataset discovery
+    tmp_path = os.path.join(os.path.dirname(path), f".{os.path.basename(path)}.tmp")
+    pq.write_table(
+        pa.Table.from_pandas(frame, preserve_index=False), tmp_path,
+        row_group_size=row_group_rows, compression=compression,
+        use_dictionary=dictionary_columns(frame), write_statistics=True,
+    )
+    os.replace(tmp_path, path)
+    return len(frame)
+
+
+def month_partition_path(export_dir: str, table: str, month: int) -> str:
+    return os.path.join(export_dir, table, f"{PARTITION_COLUMN}={int(month)}", "part-0.parquet")
+
+
+def _table_names(conn) -> set:
+    return {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type IN ('table', 'view')")}
+
+
+def _export_month(conn, table, month, tables, export_dir, row_group_rows, compression) -> int:
+    date_from, date_to = month * 100 + 1, month * 100 + 31
+    source = pruned_source(tables, date_from, date_to) if table == "fact_sales" else table
+    frame = pd.read_sql_query(
+        f"SELECT * FROM {source} WHERE date_id BETWEEN ? AND ? ORDER BY {', '.join(MONTH_PARTITIONED[table])}",
+        conn, params=[date_from, date_to],
+    )
+    path = month_partition_path(export_dir, table, month)
+    if frame.empty:
+        if os.path.exists(path):
+            os.remove(path)
+        return 0
+    return write_parquet(frame, path, row_group_rows, compression)
+
+
+def export_star_schema(conn, tables, export_dir: str = EXPORT_DIR, months=None,
+                       row_group_rows: int = 128_000, compression: str = "zstd") -> dict:
+    """
+    Exports `tables` from the SQLite connection to `export_dir`. months=None writes a fresh
+    export and swaps it in for the previous one; a list of YYYYMM rewrites only those month
+    partitions of the fact tables (plus the small unpartitioned tables) in the existing
+    export, falling back to a full export when there is none. Returns the manifest.
+    """
+    _require_pyarrow()
+    manifest_path = os.path.join(export_dir, MANIFEST_FILE)
+    if months is not None and not os.path.exists(manifest_path):
+        months = None
+
+    if months is None:
+        parent = os.path.dirname(os.path.abspath(export_dir))
+        os.makedirs(parent, exist_ok=True)
+        target = tempfile.mkdtemp(prefix=".star_parquet.", dir=parent)
+        manifest = {"tables": {}}
+        months = [row[0] for row in conn.execute("SELECT DISTINCT date_id / 100 FROM dim_date ORDER BY 1")]
+    else:
+        target = export_dir
+        manifest = load_manifest(export_dir)
+
+    try:
+        available = _table_names(conn)
+        for table in tables:
+            if table in MONTH_PARTITIONED:
+                entry = manifest["tables"].get(table) or {"path": table, "partitioning": PARTITION_COLUMN, "partitions": {}}
+                for month in months:
+                    rows = _export_month(conn, table, int(month), available, target, row_group_rows, compression)
+                    if rows:
+                        entry["partitions"][str(int(month))] = rows
+                    else:
+                        entry["partitions"].pop(str(int(month)), None)
+                entry["rows"] = sum(entry["partitions"].values())
+            else:
+                frame = pd.read_sql_query(f"SELECT * FROM {table}", conn)
+                entry = {"path": f"{table}.parquet", "partitioning": None,
+                         "rows": write_parquet(frame, os.path.join(target, f"{table}.parquet"), row_group_rows, compression)}
+            entry["columns"] = [row[1] for row in conn.execute(f"PRAGMA table_info({table})")]
+            manifest["tables"][table] = entry
+
+        manifest["exported_at"] = datetime.now().isoformat(timespec="seconds")
+        with open(os.path.join(target, MANIFEST_FILE), "w", encoding="utf-8") as f:
+            json.dump(manifest, f, indent=2)
+    except Exception:
+        if target != export_dir:
+            shutil.rmtree(target, ignore_errors=True)
+        raise
+
+    if target != export_dir:
+        # Swap the fresh export in; the previous one is removed once it is out of the way
+        previous = None
+        if os.path.exists(export_dir):
+            previous = f"{target}.old"
+            os.rename(export_dir, previous)
+        os.rename(target, export_dir)
+        if previous is not None:
+            shutil.rmtree(previous, ignore_errors=True)
+    return manifest
+
+
+def load_manifest(export_dir: str = EXPORT_DIR) -> dict:
+    manifest_path = os.path.join(export_dir, MANIFEST_FILE)
+    if not os.path.exists(manifest_path):
+        raise FileNotFoundError(f"Parquet export not found: {manifest_path}")
+    with open(manifest_path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def export_available(export_dir: str = EXPORT_DIR) -> bool:
+    return parquet_available() and os.path.exists(os.path.join(export_dir, MANIFEST_FILE))
+
+
+def read_star_table(table: str, columns=None, date_from: int = None, date_to: int = None,
+                    export_dir: str = EXPORT_DIR) -> pd.DataFrame:
+    """
+    Reads an exported table with column projection. date_from / date_to (YYYYMMDD date_id,
+    inclusive) filter the facts: month partitions outside the range are not opened and row
+    groups are skipped on their date_id statistics.
+    """
+    _require_pyarrow()
+    entry = load_manifest(export_dir)["tables"].get(table)
+    if entry is None:
+        raise ValueError(f"Table '{table}' is not in the Parquet export at {export_dir}.")
+    path = os.path.join(export_dir, entry["path"])
+
+    filters = []
+    if date_from is not None:
+        filters.append(("date_id", ">=", int(date_from)))
+    if date_to is not None:
+        filters.append(("date_id", "<=", int(date_to)))
+    if entry["partitioning"] == PARTITION_COLUMN:
+        if not entry["partitions"]:
+            return pd.DataFrame(columns=columns or entry["columns"])
+        if date_from is not None:
+            filters.append((PARTITION_COLUMN, ">=", int(date_from) // 100))
+        if date_to is not None:
+            filters.append((PARTITION_COLUMN, "<=", int(date_to) // 100))
+
+    frame = pd.read_parquet(path, engine="pyarrow", columns=columns, filters=filters or None)
+    # The partition key is a directory name, not a table column
+    return frame[list(columns or entry["columns"])]
@@ -0,0 +1,193 @@
+# dss_sales_inventory/data_model/workload_queries.py
+"""
+Star-schema queries issued by the reporting layer, and query-plan checks that keep them on
+their indexes.
+
+The covering indexes in data_model.sql (idx_fact_date_cover, idx_fact_region_cover,
+idx_fact_product_cover) are designed from these queries: the dashboard time series filters a
+date_id range, optionally for one region, and groups by (date, product, region); the
+decision brief groups the fact by product when the aggregate tables are missing. verify_query_plans() runs EXPLAIN QUERY PLAN for each
+workload query on a SQLite star schema and reports a regression when a plan scans a table
+without a covering index, sorts or groups in a temp B-tree, or no longer uses the index
+the query was designed for.
+
+The builder runs the check on every full rebuild (log warnings); from the project root,
+    python -m data_model.workload_queries
+prints the plans for analytics.db and exits non-zero on a regression.
+"""
+import os
+import re
+import sys
+import sqlite3
+from contextlib import closing
+
+from data_model.aggregate_navigator import build_query
+from data_model.fact_partitions import partition_months, pruned_source
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DB_PATH = os.path.join(PROJECT_ROOT, 'analysis', 'analytics.db')
+
+# enhanced_dashboard.load_sales_time_series; {fact} is fact_sales or its pruned partitions.
+# Grouping on the fact keys (date_id, product_id, region_id) follows idx_fact_date_cover, so
+# rows come off the index already grouped and ordered. full_date / region_name are constant
+# per group (primary-key lookups); MAX() carries them without adding them to the GROUP BY,
+# which would cost a temp B-tree in SQLite (DuckDB rejects bare non-grouped columns).
+SQL_SALES_TIME_SERIES = """
+SELECT
+    MAX(d.full_date) AS date,
+    f.product_id,
+    MAX(r.region_name) AS region_name,
+    SUM(f.revenue) AS revenue,
+    SUM(f.quantity) AS quantity,
+    SUM(f.revenue - f.cost) AS profit
+FROM {fact} f
+JOIN dim_date d ON f.date_id = d.date_id
+JOIN dim_region r ON f.region_id = r.region_id
+WHERE f.date_id BETWEEN ? AND ?
+GROUP BY f.date_id, f.product_id, f.region_id
+ORDER BY f.date_id, f.product_id, f.region_id
+"""
+
+# enhanced_dashboard.load_sales_time_series with one region selected: idx_fact_region_cover
+# (region_id, date_id, product_id, ...) seeks the region's date window in group order
+SQL_SALES_TIME_SERIES_REGION = """
+SELECT
+    MAX(d.full_date) AS date,
+    f.product_id,
+    MAX(r.region_name) AS region_name,
+    SUM(f.revenue) AS revenue,
+    SUM(f.quantity) AS quantity,
+    SUM(f.revenue - f.cost) AS profit
+FROM {fact} f
+JOIN dim_date d ON f.date_id = d.date_id
+JOIN dim_region r ON f.region_id = r.region_id
+WHERE f.region_id = ? AND f.date_id BETWEEN ? AND ?
+GROUP BY f.date_id, f.product_id
+ORDER BY f.date_id, f.product_id
+"""
+
+# enhanced_dashboard.load_demand_windows: the precomputed rolling demand means of the snapshot
+# for a date window, seeking idx_snapshot_date (its entries carry product_id, the rest of the
+# primary key, so rows come back in (date, product) order)
+SQL_DEMAND_WINDOWS = """
+SELECT
+    d.full_date AS date,
+    s.product_id,
+    s.daily_quantity_sold,
+    s.demand_mean_7d,
+    s.demand_mean_14d,
+    s.demand_mean_28d
+FROM fact_inventory_snapshot s
+JOIN dim_date d ON s.date_id = d.date_id
+WHERE s.date_id BETWEEN ? AND ?
+ORDER BY s.date_id, s.product_id
+"""
+
+# enhanced_dashboard region filter
+SQL_REGIONS = "SELECT region_id, region_name FROM dim_region ORDER BY region_name"
+
+# enhanced_dashboard.load_calendar
+SQL_CALENDAR = """
+SELECT full_date AS date, day_of_week, is_weekend, is_holiday
+FROM dim_date
+WHERE full_date BETWEEN ? AND ?
+ORDER BY full_date
+"""
+
+# enhanced_dashboard.main date bounds
+SQL_DATE_BOUNDS = "SELECT MIN(full_date) AS min_d, MAX(full_date) AS max_d FROM dim_date"
+
+# decision_brief date lookup
+SQL_DATE_LOOKUP = """
+SELECT full_date
+FROM dim_date
+WHERE date_id = ?
+"""
+
+# Plan lines that mark a regression: a table read without an index, or a sort / grouping pass
+FULL_SCAN_PATTERN = re.compile(r"^SCAN \w+$")
+TEMP_BTREE_PATTERN = re.compile(r"USE TEMP B-TREE")
+
+
+def workload(conn) -> dict:
+    """
+    name -> (sql, params, index the plan must use or None) for the reporting queries, with
+    parameters drawn from the loaded calendar. The time-series window is the latest calendar
+    month, or the latest partition when fact_sales is partitioned.
+    """
+    first_id, last_id = conn.execute("SELECT MIN(date_id), MAX(date_id) FROM dim_date").fetchone()
+    region_id = conn.execute("SELECT MIN(region_id) FROM dim_region").fetchone()[0]
+    first_day, last_day = conn.execute("SELECT MIN(full_date), MAX(full_date) FROM dim_date").fetchone()
+    tables = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type IN ('table', 'view')")}
+    months = partition_months(tables)
+    last_month = months[-1] if months else last_id // 100
+    window = [last_month * 100 + 1, last_month * 100 + 31]
+
+    queries = {
+        'sales_time_series': (
+            SQL_SALES_TIME_SERIES.format(fact=pruned_source(tables, *window)), window, 'idx_fact_date_cover'
+        ),
+        'sales_time_series_region': (
+            SQL_SALES_TIME_SERIES_REGION.format(fact=pruned_source(tables, *window)), [region_id] + window,
+            'idx_fact_region_cover'
+        ),
+        'demand_windows': (SQL_DEMAND_WINDOWS, window, 'idx_snapshot_date'),
+        'regions': (SQL_REGIONS, [], None),
+        'calendar': (SQL_CALENDAR, [first_day, last_day], None),
+        'date_bounds': (SQL_DATE_BOUNDS, [], None),
+        'date_lookup': (SQL_DATE_LOOKUP, [first_id], None),
+    }
+    # Aggregate-navigator fallbacks on fact_sales (decision brief without aggregate tables).
+    # Over a partitioned fact they read every partition through the view by design.
+    if not months:
+        queries['product_financials_fact'] = (
+            build_query(['revenue', 'profit'], ['product_id'], available=set()), [], 'idx_fact_product_cover'
+        )
+        queries['total_financials_fact'] = (
+            build_query(['revenue', 'cost', 'profit', 'first_date_id', 'last_date_id'], available=set()), [], None
+        )
+    return queries
+
+
+def verify_query_plans(conn) -> dict:
+    """
+    EXPLAIN QUERY PLAN for every workload query. Returns name -> {"plan": [...], "problems": [...]};
+    an empty problems list means the query is served by its indexes.
+    """
+    report = {}
+    for name, (sql, params, index) in workload(conn).items():
+        plan = [row[-1] for row in conn.execute(f"EXPLAIN QUERY PLAN {sql}", params).fetchall()]
+        problems = [f"full scan: {line}" for line in plan if FULL_SCAN_PATTERN.match(line)]
+        problems += [f"temp b-tree: {line}" for line in plan if TEMP_BTREE_PATTERN.search(line)]
+        if index is not None and not any(index in line for line in plan):
+            problems.append(f"{index} not used")
+        report[name] = {"plan": plan, "problems": problems}
+    return report
+
+
+def check_query_plans(conn, logger) -> bool:
+    """Logs plan regressions (warning per problem); True when every workload query is clean."""
+    report = verify_query_plans(conn)
+    clean = True
+    for name, result in report.items():
+        for problem in result["problems"]:
+            clean = False
+            logger.warning(f"Query plan regression in {name}: {problem}")
+    if clean:
+        logger.info(f"Query plans verified: {len(report)} workload queries use their indexes.")
+    return clean
+
+
+if __name__ == "__main__":
+    db_path = sys.argv[1] if len(sys.argv) > 1 else DB_PATH
+    with closing(sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)) as conn:
+        results = verify_query_plans(conn)
+
+    for query_name, result in results.items():
+        status = "OK" if not result["problems"] else "REGRESSION"
+        print(f"[{status}] {query_name}")
+        for line in result["plan"]:
+            print(f"    {line}")
+        for problem in result["problems"]:
+            print(f"    !! {problem}")
+    sys.exit(1 if any(r["problems"] for r in results.values()) else 0)
@@ -0,0 +1,202 @@
+# dss_sales_inventory/features/feature_store.py
+import os
+import json
+import shutil
+import numpy as np
+import pandas as pd
+import logging
+from datetime import datetime, timezone
+
+from features.features import PROCESSED_DIR, FEATURE_KEYS, densify_measures
+
+# Logger configuration (assumed configured at project level)
+dss_logger = logging.getLogger('dss_logger')
+
+# Columnar snapshots need pyarrow; fall back to CSV without it
+try:
+    import pyarrow  # noqa: F401
+    STORE_FORMAT = "parquet"
+except ImportError:
+    STORE_FORMAT = "csv"
+
+FEATURE_STORE_DIR = os.path.join(PROCESSED_DIR, "feature_store")
+CURRENT_FILE = "CURRENT"
+MANIFEST_FILE = "manifest.json"
+OFFSETS_FILE = "offsets.npy"
+PRODUCTS_FILE = "product_ids.npy"
+
+# Snapshot retention: every run saves a full snapshot, so only the newest versions are kept
+FEATURE_STORE_CONFIG = {
+    "keep_versions": 5,     # snapshots kept after each save (the current one always); None keeps all
+}
+
+
+class FeatureStore:
+    """
+    Product-indexed view over a feature table (e.g. inventory_features from run_features).
+
+    Rows are kept sorted by (product_id, date) and a CSR-style offset array records where
+    each product's block starts, so get_product(pid) is a binary search plus a positional
+    slice of the shared frame (no scan, no copy) instead of df[df['product_id'] == pid].
+    Each saved snapshot is versioned by the pipeline run's correlation_id; saving prunes
+    all but the newest FEATURE_STORE_CONFIG["keep_versions"] snapshots.
+    """
+
+    def __init__(self, frame: pd.DataFrame, version: str = None, _sorted: bool = False):
+        if 'product_id' not in frame.columns:
+            raise ValueError("Feature store frame must contain product_id")
+
+        if not _sorted:
+            sort_cols = [c for c in FEATURE_KEYS if c in frame.columns]
+            frame = frame.sort_values(sort_cols, kind='mergesort').reset_index(drop=True)
+
+        product_col = frame['product_id'].to_numpy()
+        self.frame = frame
+        self.version = version
+        self.product_ids, starts = np.unique(product_col, return_index=True)
+        self.offsets = np.append(starts, len(frame)).astype('int64')
+
+    # ------------------------
+    # Access
+    # ------------------------
+    def __len__(self) -> int:
+        return len(self.frame)
+
+    def __contains__(self, product_id) -> bool:
+        return self._position(product_id) is not None
+
+    def _position(self, product_id):
+        pos = np.searchsorted(self.product_ids, product_id)
+        if pos < len(self.product_ids) and self.product_ids[pos] == product_id:
+            return pos
+        return None
+
+    def get_product(self, product_id) -> pd.DataFrame:
+        """Rows of one product in date order (empty frame if unknown)."""
+        pos = self._position(product_id)
+        if pos is None:
+            return self.frame.iloc[0:0]
+        return self.frame.iloc[self.offsets[pos]:self.offsets[pos + 1]]
+
+    def iter_products(self):
+        """Yield (product_id, rows) for every product in product_id order."""
+        for pos, product_id in enumerate(self.product_ids):
+            yield product_id, self.frame.iloc[self.offsets[pos]:self.offsets[pos + 1]]
+
+    # ------------------------
+    # Versioned persistence
+    # ------------------------
+    def save(self, store_dir: str = FEATURE_STORE_DIR) -> str:
+        """Write this snapshot under <store_dir>/<version>/ and mark it as current."""
+        if not self.version:
+            raise ValueError("A version (pipeline correlation_id) is required to save the feature store")
+
+        version_dir = os.path.join(store_dir, self.version)
+        os.makedirs(version_dir, exist_ok=True)
+
+        # Snapshots are written dense (Parquet has no SparseDtype); zero runs compress well
+        frame = densify_measures(self.frame)
+        data_file = f"features.{STORE_FORMAT}"
+        if STORE_FORMAT == "parquet":
+            frame.to_parquet(os.path.join(version_dir, data_file), index=False)
+        else:
+            frame.to_csv(os.path.join(version_dir, data_file), index=False)
+        np.save(os.path.join(version_dir, OFFSETS_FILE), self.offsets)
+        np.save(os.path.join(version_dir, PRODUCTS_FILE), self.product_ids)
+
+        manifest = {
+            "version": self.version,
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "format": STORE_FORMAT,
+            "data_file": data_file,
+            "rows": int(len(self.frame)),
+            "products": int(len(self.product_ids)),
+            "columns": list(self.frame.columns),
+        }
+        with open(os.path.join(version_dir, MANIFEST_FILE), 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, indent=2)
+
+        # Point CURRENT at the new version only once the snapshot is complete
+        current_tmp = os.path.join(store_dir, CURRENT_FILE + ".tmp")
+        with open(current_tmp, 'w', encoding='utf-8') as f:
+            f.write(self.version)
+        os.replace(current_tmp, os.path.join(store_dir, CURRENT_FILE))
+
+        if FEATURE_STORE_CONFIG["keep_versions"] is not None:
+            prune_versions(store_dir, FEATURE_STORE_CONFIG["keep_versions"])
+        return version_dir
+
+    @classmethod
+    def load(cls, version: str = None, store_dir: str = FEATURE_STORE_DIR) -> "FeatureStore":
+        """Load a saved snapshot (the current one when version is None)."""
+        if version is None:
+            version = current_version(store_dir)
+            if version is None:
+                raise FileNotFoundError(f"No feature store snapshot found in {store_dir}")
+
+        version_dir = os.path.join(store_dir, version)
+        if not os.path.exists(os.path.join(version_dir, MANIFEST_FILE)):
+            raise FileNotFoundError(f"Feature store version {version} not found in {store_dir}")
+        with open(os.path.join(version_dir, MANIFEST_FILE), 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+
+        data_path = os.path.join(version_dir, manifest["data_file"])
+        if manifest["format"] == "parquet":
+            frame = pd.read_parquet(data_path)
+        else:
+            frame = pd.read_csv(data_path, parse_dates=['date'] if 'date' in manifest["columns"] else None)
+
+        store = cls.__new__(cls)
+        store.frame = frame
+        store.version = manifest["version"]
+        store.offsets = np.load(os.path.join(version_dir, OFFSETS_FILE))
+        store.product_ids = np.load(os.path.join(version_dir, PRODUCTS_FILE))
+        if store.offsets[-1] != len(frame):
+            raise ValueError(f"Feature store snapshot {version} is inconsistent (offsets do not match rows)")
+        return store
+
+
+def current_version(store_dir: str = FEATURE_STORE_DIR):
+    """Version CURRENT points at, or None before the first save."""
+    current_path = os.path.join(store_dir, CURRENT_FILE)
+    if not os.path.exists(current_path):
+        return None
+    with open(current_path, 'r', encoding='utf-8') as f:
+        return f.read().strip()
+
+
+def list_versions(store_dir: str = FEATURE_STORE_DIR) -> list:
+    """Complete snapshots (with a manifest) in store_dir, oldest first."""
+    versions = []
+    if not os.path.isdir(store_dir):
+        return versions
+    for name in os.listdir(store_dir):
+        manifest_path = os.path.join(store_dir, name, MANIFEST_FILE)
+        if os.path.exists(manifest_path):
+            with open(manifest_path, 'r', encoding='utf-8') as f:
+                versions.append((json.load(f)["created_at"], name))
+    return [name for _, name in sorted(versions)]
+
+
+def prune_versions(store_dir: str = FEATURE_STORE_DIR, keep: int = 5) -> list:
+    """Delete all but the `keep` newest snapshots; the current one is never deleted. Returns the removed versions."""
+    if keep < 1:
+        raise ValueError("At least one feature store version must be kept")
+    current = current_version(store_dir)
+    versions = list_versions(store_dir)
+    removed = [version for version in versions[:-keep] if version != current]
+    for version in removed:
+        shutil.rmtree(os.path.join(store_dir, version))
+    return removed
+
+
+def build_feature_store(features: dict, correlation_id: str, store_dir: str = FEATURE_STORE_DIR) -> FeatureStore:
+    """Build the product-indexed store from run_features output and save it as this run's version."""
+    store = FeatureStore(features['inventory'], version=correlation_id)
+    path = store.save(store_dir)
+    dss_logger.info(
+        f"Feature store saved: {path}",
+        extra={"run_id": correlation_id, "stage": "FEATURES", "function": "build_feature_store",
+               "rows_in": len(features['inventory']), "rows_out": len(store), "status": "SUCCESS"}
+    )
+    return store
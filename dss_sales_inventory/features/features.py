@@ -1,108 +1,574 @@
 # dss_sales_inventory/features/features.py
 import os
+import json
+import shutil
+import numpy as np
 import pandas as pd
 import logging
 
+from features.quantile_sketch import KLLSketch
+from features.sql_pushdown import compute_base_features_sql
+from cleaning.key_index import encode_inventory_keys
+from cleaning.partitions import (
+    partition_name,
+    partition_path,
+    iter_month_partitions,
+    write_partition,
+    write_partition_stats,
+    load_partition_stats,
+    prune_partitions,
+    read_partition,
+    STATS_FILE,
+)
+from ingestion.ingestion import DEFAULT_REGION
+
 # Logger configuration (assumed configured at project level)
 dss_logger = logging.getLogger('dss_logger')
 
-def run_features(cleaned_data: dict, correlation_id: str) -> dict:
+# Persisted feature tables: month partitions in the cleaning.partitions layout, e.g.
+#   data/processed/inventory_features/year=2024/month=07/part-0.parquet
+# so an incremental refresh reads and rewrites only the months its delta touches
+PROCESSED_DIR = r"C:\Data_Analysis\dss_sales_inventory\data\processed"
+SALES_FEATURES_DIR = "sales_features"
+INVENTORY_FEATURES_DIR = "inventory_features"
+STOCK_RATIO_CLIP_FILE = "stock_ratio_clip.json"   # IQR limit of the last run (+ sketch in "sketch" mode)
+INVENTORY_MEASURES_FILE = "measures.npz"    # sparse measures, next to each inventory partition file
+FIRST_DATES_FILE = "_first_dates.json"      # first inventory date per product (carried history)
+
+FEATURE_KEYS = ['product_id', 'date']
+# daily_sales (sales_features) keeps the sales region; inventory is per product
+SALES_FEATURE_KEYS = FEATURE_KEYS + ['region']
+
+# ======================
+# Rolling / lag demand feature configuration
+# ======================
+ROLLING_FEATURE_CONFIG = {
+    "measure": "daily_quantity_sold",   # demand column the windows are computed over
+    "windows": [7, 14, 28],             # calendar-day windows ending on (and including) each date
+    "aggregations": ["sum", "mean"],    # -> demand_sum_7d, demand_mean_7d, ...
+    "cover_window": 28,                 # mean-demand window used for days_of_cover
+}
+
+# Offset applied to day numbers so (product, day) packs into one sortable int64
+_DAY_OFFSET = 1 << 31
+
+# ======================
+# stock_ratio IQR clip configuration
+# ======================
+STOCK_RATIO_CLIP_CONFIG = {
+    "method": "exact",          # "exact" (pandas quantile) | "sketch" (mergeable KLL sketch)
+    "iqr_multiplier": 1.5,      # upper limit = Q3 + iqr_multiplier * IQR
+    "sketch_error": 0.01,       # target normalized rank error of the sketch quantiles
+    "chunk_rows": 1_000_000,    # rows fed to one sketch per update when streaming a column
+    "seed": 42,                 # compaction RNG seed (reproducible limits)
+}
+
+
+# ======================
+# Sparse sales measures in inventory_features (optional)
+# ======================
+# Most product x day rows carry no sales. When enabled, the measures below are held as
+# pandas SparseDtype (only non-zero values stored) in the returned frame, and on disk
+# each inventory partition omits them while its INVENTORY_MEASURES_FILE run-length
+# encodes them against the partition's row order (zero-run length before each non-zero
+# row + the values). load_inventory_features rebuilds the dense table.
+SPARSE_FEATURES_CONFIG = {
+    "enabled": False,
+    "columns": ['daily_quantity_sold', 'daily_revenue'],
+}
+
+
+# ======================
+# Row-level features (vectorized column arithmetic, no per-row apply)
+# ======================
+def compute_sales_revenue(sales_df: pd.DataFrame) -> pd.Series:
+    """Reported revenue where present, otherwise quantity * unit_price."""
+    fallback = sales_df['quantity'] * sales_df['unit_price']
+    if 'revenue' not in sales_df.columns:
+        return fallback
+    return sales_df['revenue'].fillna(fallback)
+
+
+def compute_stock_ratio(inventory_features: pd.DataFrame) -> pd.Series:
+    """Days of stock at the day's sales rate: stock_on_hand / max(daily_quantity_sold, 1)."""
+    return inventory_features['stock_on_hand'] / np.maximum(inventory_features['daily_quantity_sold'], 1)
+
+
+def compute_rolling_features(inventory_features: pd.DataFrame, config: dict = None,
+                             carry: pd.DataFrame = None) -> pd.DataFrame:
+    """
+    Rolling and lag demand features over (product_id, date), computed in one vectorized pass.
+
+    Rows are ordered by a packed (product, day) int64 key and the demand column is
+    prefix-summed once; each window sum is then a difference of two prefix sums whose
+    start is found with a single searchsorted over the key. Windows are calendar-based,
+    so days missing from the table count as zero demand. Means divide by the number of
+    calendar days in the window that fall on or after the product's first date.
+
+    Columns returned (aligned to the input index):
+        demand_{agg}_{w}d      for every configured window / aggregation
+        days_of_cover          stock_on_hand / demand_mean over cover_window (NaN without demand)
+        days_since_last_sale   days since the latest date with demand > 0 (NaN before the first sale)
+
+    `carry` (indexed by product_id, columns first_date / last_sale_date) describes history
+    that precedes the rows passed in, so a recent slice of a product can be recomputed
+    without its full history (see run_features_incremental).
+    """
+    config = config or ROLLING_FEATURE_CONFIG
+    measure = config["measure"]
+
+    codes, _ = pd.factorize(inventory_features['product_id'])
+    days = pd.to_datetime(inventory_features['date']).to_numpy(dtype='datetime64[D]').astype('int64')
+    keys = (codes.astype('int64') << 32) + (days + _DAY_OFFSET)
+
+    order = np.argsort(keys, kind='stable')
+    keys = keys[order]
+    days = days[order]
+    demand = inventory_features[measure].to_numpy(dtype='float64')[order]
+
+    prefix = np.concatenate(([0.0], np.cumsum(demand)))
+    positions = np.arange(len(keys))
+
+    # First row of each product (keys of one product share the high 32 bits)
+    group_start = np.searchsorted(keys, (keys >> 32) << 32, side='left')
+    first_day = days[group_start]
+
+    carried_last = None
+    if carry is not None:
+        carried = carry.reindex(inventory_features['product_id'].to_numpy()[order])
+        carried_first = carried['first_date'].to_numpy(dtype='datetime64[D]')
+        known = ~np.isnat(carried_first)
+        first_day = np.where(known, np.minimum(first_day, carried_first.astype('int64')), first_day)
+        carried_last = carried['last_sale_date'].to_numpy(dtype='datetime64[D]')
+
+    features = {}
+    window_means = {}
+    for window in sorted(set(config["windows"]) | {config["cover_window"]}):
+        start = np.searchsorted(keys, keys - (window - 1), side='left')
+        window_sum = prefix[positions + 1] - prefix[start]
+        window_days = np.minimum(window, days - first_day + 1)
+        window_means[window] = window_sum / window_days
+
+        if window in config["windows"]:
+            if "sum" in config["aggregations"]:
+                features[f"demand_sum_{window}d"] = window_sum
+            if "mean" in config["aggregations"]:
+                features[f"demand_mean_{window}d"] = window_means[window]
+
+    stock = inventory_features['stock_on_hand'].to_numpy(dtype='float64')[order]
+    cover_mean = window_means[config["cover_window"]]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        features["days_of_cover"] = np.where(cover_mean > 0, stock / cover_mean, np.nan)
+
+    # Lag since last sale: carry forward the position of the latest row with demand
+    last_sale = np.maximum.accumulate(np.where(demand > 0, positions, -1))
+    has_sale = last_sale >= group_start
+    features["days_since_last_sale"] = np.where(
+        has_sale, days - days[np.maximum(last_sale, 0)], np.nan
+    )
+    if carried_last is not None:
+        from_carry = ~has_sale & ~np.isnat(carried_last)
+        features["days_since_last_sale"][from_carry] = days[from_carry] - carried_last[from_carry].astype('int64')
+
+    # Scatter back to the input row order
+    result = {}
+    for name, values in features.items():
+        aligned = np.empty(len(values), dtype='float64')
+        aligned[order] = values
+        result[name] = aligned
+    return pd.DataFrame(result, index=inventory_features.index)
+
+
+# ======================
+# stock_ratio IQR clip (exact or streaming sketch)
+# ======================
+def build_stock_ratio_sketch(chunks, config: dict = None) -> KLLSketch:
+    """
+    Build a quantile sketch from an iterable of stock_ratio chunks (Series/arrays).
+
+    Each chunk can come from a file chunk, a month partition or a worker; only the
+    sketch (O(k) values) is kept between chunks. Sketches from separate calls can
+    be combined with KLLSketch.merge.
+    """
+    config = config or STOCK_RATIO_CLIP_CONFIG
+    sketch = KLLSketch.from_error(config["sketch_error"], seed=config["seed"])
+    for chunk in chunks:
+        sketch.update(chunk)
+    return sketch
+
+
+def iqr_upper_limit_from_sketch(sketch: KLLSketch, config: dict = None) -> float:
+    config = config or STOCK_RATIO_CLIP_CONFIG
+    q1, q3 = sketch.quantiles([0.25, 0.75])
+    return float(q3 + config["iqr_multiplier"] * (q3 - q1))
+
+
+def iter_column_chunks(values: pd.Series, chunk_rows: int):
+    for start in range(0, len(values), chunk_rows):
+        yield values.iloc[start:start + chunk_rows]
+
+
+def compute_stock_ratio_upper_limit(stock_ratio: pd.Series, config: dict = None,
+                                    sketch: KLLSketch = None) -> float:
+    """IQR upper limit of stock_ratio using the configured method (an existing sketch is reused)."""
+    config = config or STOCK_RATIO_CLIP_CONFIG
+    if config["method"] == "exact":
+        q1 = stock_ratio.quantile(0.25)
+        q3 = stock_ratio.quantile(0.75)
+        return q3 + config["iqr_multiplier"] * (q3 - q1)
+    if config["method"] == "sketch":
+        if sketch is None:
+            sketch = build_stock_ratio_sketch(iter_column_chunks(stock_ratio, config["chunk_rows"]), config)
+        return iqr_upper_limit_from_sketch(sketch, config)
+    raise ValueError(f"Unknown stock_ratio clip method: {config['method']}")
+
+
+def save_stock_ratio_clip(upper_limit: float, sketch: KLLSketch = None, processed_dir: str = PROCESSED_DIR) -> str:
+    """Persist the stock_ratio upper limit and, in "sketch" mode, the sketch it came from."""
+    path = os.path.join(processed_dir, STOCK_RATIO_CLIP_FILE)
+    state = {"upper_limit": float(upper_limit), "sketch": sketch.to_dict() if sketch is not None else None}
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(state, f)
+    return path
+
+
+def load_stock_ratio_clip(processed_dir: str = PROCESSED_DIR, config: dict = None) -> tuple:
+    """(upper_limit, sketch or None) as saved by the last run."""
+    config = config or STOCK_RATIO_CLIP_CONFIG
+    path = os.path.join(processed_dir, STOCK_RATIO_CLIP_FILE)
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"stock_ratio clip state not found: {path} (run run_features first)")
+    with open(path, 'r', encoding='utf-8') as f:
+        state = json.load(f)
+    sketch = KLLSketch.from_dict(state["sketch"], seed=config["seed"]) if state["sketch"] is not None else None
+    return state["upper_limit"], sketch
+
+
+def clip_stock_ratio(stock_ratio: pd.Series, upper_limit: float, correlation_id: str,
+                     function: str, rows_in: int) -> pd.Series:
+    """Clip stock_ratio at the IQR upper limit, logging how many values were clipped."""
+    outliers = int((stock_ratio > upper_limit).sum())
+    if outliers == 0:
+        return stock_ratio
+    dss_logger.warning(
+        f"{outliers} stock_ratio values exceeded IQR upper limit ({upper_limit:.2f}) and were clipped",
+        extra={"run_id": correlation_id, "stage": "FEATURES", "function": function,
+               "rows_in": rows_in, "rows_out": len(stock_ratio), "status": "WARNING"}
+    )
+    return stock_ratio.clip(upper=upper_limit)
+
+
+# ======================
+# Shared building blocks (full and incremental runs)
+# ======================
+def aggregate_daily_sales(sales_df: pd.DataFrame) -> pd.DataFrame:
+    """Daily quantity and revenue per (product_id, date, region)."""
+    sales_df = sales_df.assign(revenue=compute_sales_revenue(sales_df))
+    if 'region' not in sales_df.columns:
+        sales_df = sales_df.assign(region=DEFAULT_REGION)
+    return sales_df.groupby(SALES_FEATURE_KEYS, as_index=False).agg(
+        daily_quantity_sold=pd.NamedAgg(column='quantity', aggfunc='sum'),
+        daily_revenue=pd.NamedAgg(column='revenue', aggfunc='sum')
+    )
+
+
+def product_daily_sales(daily_sales: pd.DataFrame) -> pd.DataFrame:
+    """daily_sales summed over regions: one row per (product_id, date), the inventory grain."""
+    return daily_sales.groupby(FEATURE_KEYS, as_index=False, sort=False)[
+        ['daily_quantity_sold', 'daily_revenue']
+    ].sum()
+
+
+def join_inventory_sales(inventory_df: pd.DataFrame, daily_sales: pd.DataFrame) -> pd.DataFrame:
+    """Left-join daily sales (all regions) onto inventory rows (no sales -> 0) and compute stock_ratio."""
+    inventory_features = inventory_df.merge(product_daily_sales(daily_sales), on=FEATURE_KEYS, how='left')
+
+    # Fill NaN daily values with 0 (no sales)
+    inventory_features['daily_quantity_sold'] = inventory_features['daily_quantity_sold'].fillna(0)
+    inventory_features['daily_revenue'] = inventory_features['daily_revenue'].fillna(0)
+
+    inventory_features['stock_ratio'] = compute_stock_ratio(inventory_features)
+    return inventory_features
+
+
+def validate_features(daily_sales: pd.DataFrame, inventory_features: pd.DataFrame) -> None:
+    if (daily_sales['daily_quantity_sold'] < 0).any() or (daily_sales['daily_revenue'] < 0).any():
+        raise ValueError("Negative values found in sales features")
+    if (inventory_features['stock_ratio'] < 0).any():
+        raise ValueError("Negative stock_ratio values found")
+    if daily_sales.duplicated(subset=SALES_FEATURE_KEYS).any():
+        raise ValueError("Duplicate rows found in daily_sales aggregation")
+    if inventory_features.duplicated(subset=FEATURE_KEYS).any():
+        raise ValueError("Duplicate rows found in inventory_features")
+
+
+def sparsify_measures(inventory_features: pd.DataFrame, columns: list = None) -> pd.DataFrame:
+    """Store the sales measures as SparseDtype with fill value 0 (zero-sale days cost nothing)."""
+    columns = columns or SPARSE_FEATURES_CONFIG["columns"]
+    return inventory_features.astype({
+        col: pd.SparseDtype('float64', 0.0) for col in columns if col in inventory_features.columns
+    })
+
+
+def densify_measures(inventory_features: pd.DataFrame) -> pd.DataFrame:
+    """Dense copy of any SparseDtype columns (reconstruction on demand)."""
+    sparse_cols = [col for col, dtype in inventory_features.dtypes.items() if isinstance(dtype, pd.SparseDtype)]
+    return inventory_features.astype({col: 'float64' for col in sparse_cols})
+
+
+def save_sparse_measures(inventory_features: pd.DataFrame, measure_cols: list, path: str) -> None:
+    """Run-length encode the measure columns against the frame's row order."""
+    measures = densify_measures(inventory_features[measure_cols])
+    rows = np.flatnonzero((measures != 0).any(axis=1).to_numpy())
+    zero_runs = np.diff(rows, prepend=-1) - 1
+
+    np.savez_compressed(
+        path,
+        rows=np.array(len(measures)),
+        columns=np.array(measure_cols),
+        zero_runs=zero_runs.astype('int32'),
+        **{col: measures[col].to_numpy()[rows] for col in measure_cols}
+    )
+
+
+def restore_sparse_measures(inventory_features: pd.DataFrame, path: str) -> pd.DataFrame:
+    """Add back the measure columns encoded by save_sparse_measures (zero elsewhere)."""
+    with np.load(path) as encoded:
+        if int(encoded['rows']) != len(inventory_features):
+            raise ValueError(f"Sparse measures in {path} do not match their partition (row count differs)")
+        measure_cols = [str(col) for col in encoded['columns']]
+        rows = np.cumsum(encoded['zero_runs'].astype('int64') + 1) - 1
+        restored = {}
+        for col in measure_cols:
+            values = np.zeros(len(inventory_features))
+            values[rows] = encoded[col]
+            restored[col] = values
+
+    columns = list(inventory_features.columns)
+    insert_at = columns.index('stock_ratio') if 'stock_ratio' in columns else len(columns)
+    inventory_features = inventory_features.assign(**restored)
+    return inventory_features[columns[:insert_at] + measure_cols + columns[insert_at:]]
+
+
+def write_feature_partitions(frame: pd.DataFrame, dataset_dir: str, incremental: bool = False,
+                             sparse_columns: list = None) -> list:
+    """
+    Write `frame` as month partitions of dataset_dir and update its statistics file.
+
+    A full write replaces the dataset. With incremental=True only the months present in
+    `frame` are rewritten (each must be complete) and the other partitions are kept.
+    `sparse_columns` are left out of the partition files and run-length encoded next to
+    them (INVENTORY_MEASURES_FILE). Returns the partition names written.
+    """
+    stats = {}
+    if os.path.exists(dataset_dir):
+        if incremental:
+            stats = {entry["partition"]: entry for entry in load_partition_stats(dataset_dir)}
+        else:
+            shutil.rmtree(dataset_dir)
+    os.makedirs(dataset_dir, exist_ok=True)
+
+    written = []
+    frame = densify_measures(frame).assign(date=pd.to_datetime(frame['date']))
+    for period, part in iter_month_partitions(frame):
+        part = part.reset_index(drop=True)
+        measures_path = os.path.join(partition_path(dataset_dir, period), INVENTORY_MEASURES_FILE)
+        if sparse_columns:
+            os.makedirs(os.path.dirname(measures_path), exist_ok=True)
+            save_sparse_measures(part, sparse_columns, measures_path)
+            part = part.drop(columns=sparse_columns)
+        elif os.path.exists(measures_path):
+            os.remove(measures_path)
+
+        entry = write_partition(part, dataset_dir, period)
+        stats[entry["partition"]] = entry
+        written.append(entry["partition"])
+
+    write_partition_stats(dataset_dir, [stats[name] for name in sorted(stats)])
+    return written
+
+
+def read_feature_partitions(dataset_dir: str, entries: list = None) -> pd.DataFrame:
+    """Concatenate the partitions of the given statistics entries (all when None), densified."""
+    if entries is None:
+        entries = load_partition_stats(dataset_dir)
+
+    frames = []
+    for entry in entries:
+        part = read_partition(dataset_dir, entry)
+        measures_path = os.path.join(dataset_dir, entry["partition"], INVENTORY_MEASURES_FILE)
+        if os.path.exists(measures_path):
+            part = restore_sparse_measures(part, measures_path)
+        frames.append(part)
+
+    if not frames:
+        return pd.DataFrame()
+    return pd.concat(frames, ignore_index=True)
+
+
+def feature_partition_files(dataset_dir: str) -> list:
+    """Files of a feature dataset (statistics file first), relative to dataset_dir's parent."""
+    name = os.path.basename(os.path.normpath(dataset_dir))
+    files = [f"{name}/{STATS_FILE}"]
+    for entry in load_partition_stats(dataset_dir):
+        files.append(f"{name}/{entry['path']}")
+        if os.path.exists(os.path.join(dataset_dir, entry["partition"], INVENTORY_MEASURES_FILE)):
+            files.append(f"{name}/{entry['partition']}/{INVENTORY_MEASURES_FILE}")
+    return files
+
+
+def load_first_dates(dataset_dir: str) -> pd.Series:
+    """First inventory date per product_id, as recorded by save_features."""
+    path = os.path.join(dataset_dir, FIRST_DATES_FILE)
+    if not os.path.exists(path):
+        return pd.Series(dtype='datetime64[ns]')
+    with open(path, 'r', encoding='utf-8') as f:
+        first_dates = json.load(f)
+    return pd.Series(pd.to_datetime(list(first_dates.values())),
+                     index=np.array(list(first_dates.keys()), dtype='int64'))
+
+
+def save_first_dates(dataset_dir: str, first_dates: pd.Series) -> str:
+    path = os.path.join(dataset_dir, FIRST_DATES_FILE)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({str(int(pid)): date.strftime('%Y-%m-%d') for pid, date in first_dates.items()}, f)
+    return path
+
+
+def save_features(daily_sales: pd.DataFrame, inventory_features: pd.DataFrame,
+                  processed_dir: str = PROCESSED_DIR, incremental: bool = False) -> None:
+    """
+    Write daily_sales and inventory_features as month partitions. With incremental=True
+    the frames hold complete months and only those partitions are replaced.
+    """
+    inventory_dir = os.path.join(processed_dir, INVENTORY_FEATURES_DIR)
+    sparse_columns = None
+    if SPARSE_FEATURES_CONFIG["enabled"]:
+        sparse_columns = [col for col in SPARSE_FEATURES_CONFIG["columns"] if col in inventory_features.columns]
+
+    write_feature_partitions(daily_sales, os.path.join(processed_dir, SALES_FEATURES_DIR), incremental)
+    write_feature_partitions(inventory_features, inventory_dir, incremental, sparse_columns)
+
+    first_dates = pd.to_datetime(inventory_features['date']).groupby(inventory_features['product_id'].to_numpy()).min()
+    if incremental:
+        first_dates = pd.concat([load_first_dates(inventory_dir), first_dates]).groupby(level=0).min()
+    save_first_dates(inventory_dir, first_dates)
+
+
+def load_sales_features(path: str = None, start_date=None, end_date=None) -> pd.DataFrame:
+    """Read daily_sales from its month partitions (date bounds select whole partitions)."""
+    path = path or os.path.join(PROCESSED_DIR, SALES_FEATURES_DIR)
+    return read_feature_partitions(path, prune_partitions(path, start_date, end_date))
+
+
+def load_inventory_features(path: str = None, sparse: bool = False, start_date=None, end_date=None) -> pd.DataFrame:
+    """
+    Read inventory_features from its month partitions, restoring the sales measures from
+    the sparse measures files when the table was saved with SPARSE_FEATURES_CONFIG enabled
+    (zero elsewhere). Date bounds select whole partitions overlapping the range.
+    `sparse=True` keeps the restored measures as SparseDtype.
+    """
+    path = path or os.path.join(PROCESSED_DIR, INVENTORY_FEATURES_DIR)
+    inventory_features = read_feature_partitions(path, prune_partitions(path, start_date, end_date))
+    return sparsify_measures(inventory_features) if sparse else inventory_features
+
+
+def load_features(processed_dir: str = PROCESSED_DIR) -> dict:
+    """The persisted feature tables, shaped like the result of run_features."""
+    return {
+        'sales': load_sales_features(os.path.join(processed_dir, SALES_FEATURES_DIR)),
+        'inventory': load_inventory_features(os.path.join(processed_dir, INVENTORY_FEATURES_DIR)),
+    }
+
+
+def run_features(cleaned_data: dict, correlation_id: str, backend: str = "pandas") -> dict:
     """
     Compute daily features for sales, join with inventory, calculate stock_ratio,
-    validate, and save feature CSVs.
+    validate, and save the feature tables (month partitions).
+
+    backend="sqlite" pushes the daily aggregation, inventory join and stock_ratio down into
+    a SQLite work database (see features.sql_pushdown); cleaned_data may then hold CSV paths
+    instead of DataFrames so large histories are never materialised as intermediate frames.
 
     Enhancements:
     - Stock_ratio outliers are detected using IQR and clipped instead of raising an error.
     - Added logging warning for clipped stock_ratio values.
+    - SPARSE_FEATURES_CONFIG["enabled"] keeps zero-sale measures sparse in memory and on disk.
+    - STOCK_RATIO_CLIP_CONFIG["method"] = "sketch" computes Q1/Q3 with a mergeable KLL
+      sketch fed chunk by chunk instead of an exact quantile over the full column.
+    - Rolling/lag demand features (ROLLING_FEATURE_CONFIG) are added to inventory_features,
+      so downstream layers read demand windows instead of recomputing them.
+
+    The cleaned frames are treated as read-only; derived columns are added to new frames.
     """
     if cleaned_data is None or 'sales' not in cleaned_data or 'inventory' not in cleaned_data:
         raise ValueError("Invalid or missing cleaned_data")
 
-    sales_df = cleaned_data['sales'].copy()
-    inventory_df = cleaned_data['inventory'].copy()
+    if backend not in ("pandas", "sqlite"):
+        raise ValueError(f"Unknown features backend: {backend}")
+
+    sales_df = cleaned_data['sales']
+    inventory_df = cleaned_data['inventory']
 
-    # Log start
-    rows_in_sales = len(sales_df)
-    rows_in_inventory = len(inventory_df)
-    rows_in_total = rows_in_sales + rows_in_inventory
+    # Log start (row counts are unknown up front for CSV sources)
+    in_memory = isinstance(sales_df, pd.DataFrame) and isinstance(inventory_df, pd.DataFrame)
+    if not in_memory and backend == "pandas":
+        raise ValueError("The pandas features backend requires DataFrame inputs")
+    rows_in_total = len(sales_df) + len(inventory_df) if in_memory else None
     dss_logger.info(
         "Features started",
         extra={"run_id": correlation_id, "stage": "FEATURES", "function": "run_features", 
                "rows_in": rows_in_total, "rows_out": None, "status": "STARTED"}
     )
 
-    # ======================
-    # Compute daily sales features
-    # ======================
-    sales_df['revenue'] = sales_df.apply(
-        lambda x: x['revenue'] if 'revenue' in x and pd.notnull(x['revenue']) else x['quantity'] * x['unit_price'],
-        axis=1
-    )
+    if backend == "sqlite":
+        # ======================
+        # Daily aggregation, join and stock_ratio in SQLite
+        # ======================
+        daily_sales, inventory_features = compute_base_features_sql(sales_df, inventory_df)
+    else:
+        # ======================
+        # Compute daily sales features
+        # ======================
+        daily_sales = aggregate_daily_sales(sales_df)
 
-    daily_sales = sales_df.groupby(['product_id', 'date'], as_index=False).agg(
-        daily_quantity_sold=pd.NamedAgg(column='quantity', aggfunc='sum'),
-        daily_revenue=pd.NamedAgg(column='revenue', aggfunc='sum')
-    )
+        # ======================
+        # Join with inventory and calculate stock_ratio
+        # ======================
+        inventory_features = join_inventory_sales(inventory_df, daily_sales)
 
     # ======================
-    # Join with inventory
+    # Detect outliers using IQR and clip
     # ======================
-    inventory_features = inventory_df.merge(
-        daily_sales,
-        on=['product_id', 'date'],
-        how='left'
+    # In "sketch" mode the sketch is persisted so run_features_incremental can keep the limit current
+    sketch = None
+    if STOCK_RATIO_CLIP_CONFIG["method"] == "sketch":
+        sketch = build_stock_ratio_sketch(
+            iter_column_chunks(inventory_features['stock_ratio'], STOCK_RATIO_CLIP_CONFIG["chunk_rows"])
+        )
+    upper_limit = compute_stock_ratio_upper_limit(inventory_features['stock_ratio'], sketch=sketch)
+    inventory_features['stock_ratio'] = clip_stock_ratio(
+        inventory_features['stock_ratio'], upper_limit, correlation_id, "run_features", rows_in_total
     )
 
-    # Fill NaN daily values with 0 (no sales)
-    inventory_features['daily_quantity_sold'] = inventory_features['daily_quantity_sold'].fillna(0)
-    inventory_features['daily_revenue'] = inventory_features['daily_revenue'].fillna(0)
-
     # ======================
-    # Calculate stock_ratio
+    # Rolling / lag demand features
     # ======================
-    inventory_features['stock_ratio'] = inventory_features.apply(
-        lambda x: x['stock_on_hand'] / max(x['daily_quantity_sold'], 1), axis=1
-    )
+    inventory_features = inventory_features.join(compute_rolling_features(inventory_features))
 
-    # ======================
-    # Detect outliers using IQR and clip
-    # ======================
-    Q1 = inventory_features['stock_ratio'].quantile(0.25)
-    Q3 = inventory_features['stock_ratio'].quantile(0.75)
-    IQR = Q3 - Q1
-    upper_limit = Q3 + 1.5 * IQR
-
-    outliers = inventory_features[inventory_features['stock_ratio'] > upper_limit]
-    if not outliers.empty:
-        dss_logger.warning(
-            f"{len(outliers)} stock_ratio values exceeded IQR upper limit ({upper_limit:.2f}) and were clipped",
-            extra={"run_id": correlation_id, "stage": "FEATURES", "function": "run_features",
-                   "rows_in": rows_in_total, "rows_out": len(inventory_features), "status": "WARNING"}
-        )
-        inventory_features['stock_ratio'] = inventory_features['stock_ratio'].clip(upper=upper_limit)
+    if SPARSE_FEATURES_CONFIG["enabled"]:
+        inventory_features = sparsify_measures(inventory_features)
 
     # ======================
     # Validation
     # ======================
-    if (daily_sales['daily_quantity_sold'] < 0).any() or (daily_sales['daily_revenue'] < 0).any():
-        raise ValueError("Negative values found in sales features")
-    if (inventory_features['stock_ratio'] < 0).any():
-        raise ValueError("Negative stock_ratio values found")
-    if daily_sales.duplicated(subset=['product_id','date']).any():
-        raise ValueError("Duplicate rows found in daily_sales aggregation")
-    if inventory_features.duplicated(subset=['product_id','date']).any():
-        raise ValueError("Duplicate rows found in inventory_features")
+    validate_features(daily_sales, inventory_features)
 
     # ======================
-    # Save feature CSVs
+    # Save feature partitions (+ stock_ratio clip state)
     # ======================
-    processed_dir = r"C:\Data_Analysis\dss_sales_inventory\data\processed"
-    os.makedirs(processed_dir, exist_ok=True)
-    sales_features_path = os.path.join(processed_dir, "sales_features.csv")
-    inventory_features_path = os.path.join(processed_dir, "inventory_features.csv")
-
-    daily_sales.to_csv(sales_features_path, index=False)
-    inventory_features.to_csv(inventory_features_path, index=False)
+    save_features(daily_sales, inventory_features)
+    save_stock_ratio_clip(upper_limit, sketch)
 
     # Log completion
     rows_out_sales = len(daily_sales)
@@ -116,3 +582,222 @@ def run_features(cleaned_data: dict, correlation_id: str) -> dict:
     )
 
     return {'sales': daily_sales, 'inventory': inventory_features}
+
+
+# ======================
+# Incremental refresh
+# ======================
+def _upsert(base: pd.DataFrame, updates: pd.DataFrame, base_keys: pd.Index, update_keys: np.ndarray,
+            additive: list = ()) -> tuple:
+    """
+    Write `updates` into `base` by packed (product_id, date) key: matching rows are replaced
+    (columns in `additive` are summed instead) and unmatched rows are appended.
+    Returns (result, positions of the updated rows in result).
+    """
+    pos = base_keys.get_indexer(update_keys)
+    matched = pos >= 0
+
+    if matched.any():
+        rows = pos[matched]
+        for col in updates.columns:
+            values = updates[col].to_numpy()[matched]
+            if col in additive:
+                values = base[col].to_numpy()[rows] + values
+            base.iloc[rows, base.columns.get_loc(col)] = values
+
+    appended = updates[~matched]
+    result = pd.concat([base, appended], ignore_index=True) if len(appended) else base
+    positions = np.concatenate([pos[matched], np.arange(len(base), len(base) + len(appended))])
+    return result, positions
+
+
+def _months(dates: pd.Series) -> set:
+    """Partition names (year=YYYY/month=MM) of the months the dates fall in."""
+    return {partition_name(period) for period in pd.to_datetime(dates).dt.to_period('M').unique()}
+
+
+def _month_rows(frame: pd.DataFrame, months: set) -> pd.DataFrame:
+    """Rows of `frame` in the given partitions (whole months)."""
+    return frame[frame['date'].dt.to_period('M').map(partition_name).isin(months).to_numpy()]
+
+
+def run_features_incremental(delta: dict, correlation_id: str, processed_dir: str = PROCESSED_DIR) -> dict:
+    """
+    Refresh the persisted feature tables for a delta of cleaned rows instead of
+    recomputing the full history.
+
+    `delta` holds the rows returned by run_cleaning(..., incremental=True): sales rows with
+    new sale_ids and inventory rows for new (product_id, date) keys. Only the month
+    partitions holding touched keys are read, and only the months whose rows changed are
+    rewritten:
+        - daily_sales: delta aggregates are added to existing (product_id, date, region) rows
+        - inventory_features: new keys are appended, keys whose daily sales changed are
+          re-joined, and stock_ratio is recomputed for both
+        - stock_ratio clip: in "sketch" mode the new keys' ratios are merged into the
+          persisted sketch and the refreshed IQR limit clips the recomputed rows; in "exact"
+          mode the limit of the last full run is reused (an exact refresh needs the full
+          column, so it waits for the next run_features)
+        - rolling/lag features: recomputed per touched product from its earliest touched
+          date with max(window) - 1 days of context. Earlier history is carried from
+          FIRST_DATES_FILE and from the product's last stored row before the context
+          (its date minus days_since_last_sale is the last sale date); older partitions are
+          read back only until that row is found.
+    Returns 'sales_delta' / 'inventory_delta': the final values of the upserted daily_sales
+    rows and of every inventory row whose features changed (they drive incremental
+    star-schema loads; see load_features for the full tables).
+    """
+    if delta is None or delta.get('sales') is None or delta.get('inventory') is None:
+        raise ValueError("Invalid or missing cleaned delta")
+
+    rows_in_total = len(delta['sales']) + len(delta['inventory'])
+    dss_logger.info(
+        "Incremental features started",
+        extra={"run_id": correlation_id, "stage": "FEATURES", "function": "run_features_incremental",
+               "rows_in": rows_in_total, "rows_out": None, "status": "STARTED"}
+    )
+
+    sales_dir = os.path.join(processed_dir, SALES_FEATURES_DIR)
+    inventory_dir = os.path.join(processed_dir, INVENTORY_FEATURES_DIR)
+    upper_limit, sketch = load_stock_ratio_clip(processed_dir)
+
+    delta_daily = aggregate_daily_sales(delta['sales'])
+    if (delta_daily['daily_quantity_sold'] < 0).any() or (delta_daily['daily_revenue'] < 0).any():
+        raise ValueError("Negative values found in sales features")
+    new_inventory = delta['inventory'].assign(date=pd.to_datetime(delta['inventory']['date']))
+    if delta_daily.empty and new_inventory.empty:
+        dss_logger.info(
+            "Incremental features completed successfully (empty delta, feature tables unchanged)",
+            extra={"run_id": correlation_id, "stage": "FEATURES", "function": "run_features_incremental",
+                   "rows_in": 0, "rows_out": 0, "status": "SUCCESS"}
+        )
+        return {'sales_delta': delta_daily, 'inventory_delta': new_inventory}
+
+    # ======================
+    # Daily sales: additive upsert of the delta aggregates
+    # ======================
+    # Read the months of the delta sales (rewritten) and of the new inventory keys (re-joined)
+    sales_months = _months(delta_daily['date'])
+    joined_months = sales_months | _months(new_inventory['date'])
+    daily_sales = read_feature_partitions(
+        sales_dir, [entry for entry in load_partition_stats(sales_dir) if entry["partition"] in joined_months]
+    )
+    if daily_sales.empty:
+        daily_sales = delta_daily.iloc[:0]
+    if 'region' not in daily_sales.columns:
+        daily_sales = daily_sales.assign(region=DEFAULT_REGION)
+
+    daily_sales, daily_rows = _upsert(
+        daily_sales, delta_daily, pd.MultiIndex.from_frame(daily_sales[SALES_FEATURE_KEYS]),
+        pd.MultiIndex.from_frame(delta_daily[SALES_FEATURE_KEYS]), additive=['daily_quantity_sold', 'daily_revenue']
+    )
+
+    # ======================
+    # Inventory features: upsert new keys, then re-join touched keys
+    # ======================
+    # Partitions from the earliest context day onward (rows after a touched date are refreshed)
+    context_days = max(ROLLING_FEATURE_CONFIG["windows"] + [ROLLING_FEATURE_CONFIG["cover_window"]]) - 1
+    touched_dates = pd.concat([new_inventory['date'], delta_daily['date']])
+    read_start = touched_dates.min() - pd.Timedelta(days=context_days)
+    inventory_features = load_inventory_features(inventory_dir, start_date=read_start)
+    if inventory_features.empty:
+        inventory_features = new_inventory.iloc[:0]
+    for col in ('daily_quantity_sold', 'daily_revenue', 'stock_ratio'):
+        if col not in inventory_features.columns:
+            inventory_features[col] = np.nan
+
+    inventory_keys = pd.Index(encode_inventory_keys(inventory_features))
+    new_keys = encode_inventory_keys(new_inventory)
+    is_new_key = inventory_keys.get_indexer(new_keys) < 0
+
+    inventory_features, new_rows = _upsert(inventory_features, new_inventory, inventory_keys, new_keys)
+    inventory_keys = pd.Index(encode_inventory_keys(inventory_features))
+
+    sales_rows = inventory_keys.get_indexer(encode_inventory_keys(delta_daily))
+    touched = np.unique(np.concatenate([new_rows, sales_rows[sales_rows >= 0]]))
+
+    # Daily sales of the touched keys, summed over regions
+    daily_keys = encode_inventory_keys(daily_sales)
+    touched_keys = inventory_keys[touched]
+    in_touched = np.isin(daily_keys, touched_keys)
+    touched_sales = daily_sales.loc[in_touched, ['daily_quantity_sold', 'daily_revenue']].groupby(daily_keys[in_touched]).sum()
+    daily_pos = touched_sales.index.get_indexer(touched_keys)
+    has_sales = daily_pos >= 0
+    for col in ('daily_quantity_sold', 'daily_revenue'):
+        values = np.zeros(len(touched))
+        values[has_sales] = touched_sales[col].to_numpy(dtype='float64')[daily_pos[has_sales]]
+        inventory_features.iloc[touched, inventory_features.columns.get_loc(col)] = values
+
+    stock_ratio = compute_stock_ratio(inventory_features.iloc[touched])
+
+    if sketch is not None:
+        # Only new keys feed the sketch; revised keys keep their earlier contribution.
+        # _upsert returns the matched positions first, then the appended ones
+        appended_rows = new_rows[(~is_new_key).sum():]
+        sketch.update(stock_ratio.to_numpy()[np.isin(touched, appended_rows)])
+        upper_limit = iqr_upper_limit_from_sketch(sketch)
+    inventory_features.iloc[touched, inventory_features.columns.get_loc('stock_ratio')] = clip_stock_ratio(
+        stock_ratio, upper_limit, correlation_id, "run_features_incremental", rows_in_total
+    ).to_numpy()
+
+    # ======================
+    # Rolling / lag features for touched products
+    # ======================
+    touched_frame = inventory_features.iloc[touched]
+    since = touched_frame.groupby('product_id')['date'].min()
+    context_start = since - pd.Timedelta(days=context_days)
+
+    product_since = inventory_features['product_id'].map(since)
+    in_product = product_since.notna().to_numpy()
+    dates = inventory_features['date']
+    in_context = in_product & (dates >= product_since - pd.Timedelta(days=context_days)).to_numpy()
+
+    # Carried history: the last stored row before each product's context. Products with
+    # earlier history but no such row among the loaded months read older partitions back
+    first_dates = load_first_dates(inventory_dir)
+    lag_cols = ['product_id', 'date', 'days_since_last_sale']
+    before = inventory_features.loc[in_product & ~in_context].reindex(columns=lag_cols)
+    older = [entry for entry in load_partition_stats(inventory_dir)
+             if entry["rows"] and pd.Timestamp(entry["max_date"]) < read_start]
+    while older:
+        has_history = first_dates.reindex(context_start.index) < context_start
+        missing = has_history & ~context_start.index.isin(before['product_id'])
+        if not missing.any():
+            break
+        part = read_feature_partitions(inventory_dir, [older.pop()])
+        part = part[part['product_id'].isin(missing.index[missing])].reindex(columns=lag_cols)
+        before = pd.concat([part, before], ignore_index=True)
+
+    last_rows = before.sort_values('date').groupby('product_id').tail(1).set_index('product_id')
+    carry = pd.DataFrame({
+        'first_date': first_dates.reindex(since.index),
+        'last_sale_date': (last_rows['date'] - pd.to_timedelta(last_rows['days_since_last_sale'], unit='D')).reindex(since.index),
+    })
+    rolling = compute_rolling_features(inventory_features[in_context], carry=carry)
+
+    refresh = (dates >= product_since).to_numpy()[in_context]
+    refresh_rows = np.flatnonzero(in_context)[refresh]
+    for col in rolling.columns:
+        if col not in inventory_features.columns:
+            inventory_features[col] = np.nan
+        inventory_features.iloc[refresh_rows, inventory_features.columns.get_loc(col)] = rolling[col].to_numpy()[refresh]
+
+    # ======================
+    # Validation (touched rows) and save of the changed months
+    # ======================
+    if (inventory_features['stock_ratio'].iloc[touched] < 0).any():
+        raise ValueError("Negative stock_ratio values found")
+
+    inventory_months = _months(inventory_features['date'].iloc[refresh_rows])
+    save_features(_month_rows(daily_sales, sales_months), _month_rows(inventory_features, inventory_months),
+                  processed_dir=processed_dir, incremental=True)
+    save_stock_ratio_clip(upper_limit, sketch, processed_dir=processed_dir)
+
+    dss_logger.info(
+        f"Incremental features completed successfully ({len(sales_months)} sales and "
+        f"{len(inventory_months)} inventory partitions rewritten)",
+        extra={"run_id": correlation_id, "stage": "FEATURES", "function": "run_features_incremental",
+               "rows_in": rows_in_total, "rows_out": len(refresh_rows) + len(delta_daily), "status": "SUCCESS"}
+    )
+
+    return {'sales_delta': daily_sales.iloc[np.sort(daily_rows)],
+            'inventory_delta': inventory_features.iloc[refresh_rows]}
@@ -0,0 +1,158 @@
+# dss_sales_inventory/features/quantile_sketch.py
+import math
+import numpy as np
+
+# Compactor capacities shrink by this factor per level below the top (KLL paper value)
+_CAPACITY_DECAY = 2.0 / 3.0
+_MIN_CAPACITY = 2
+
+
+def k_for_error(rank_error: float) -> int:
+    """
+    Smallest compactor size k whose expected normalized rank error is <= rank_error.
+    Uses the empirical KLL bound eps ~= 2.296 / k**0.9723 (single-quantile, ~99% confidence).
+    """
+    if not 0 < rank_error < 1:
+        raise ValueError("rank_error must be in (0, 1)")
+    return max(8, int(math.ceil((2.296 / rank_error) ** (1 / 0.9723))))
+
+
+class KLLSketch:
+    """
+    Mergeable streaming quantile sketch (Karnin-Lang-Liberty).
+
+    Values are held in a stack of compactors; an item at level h stands for 2**h
+    input values. A full compactor is sorted and every other item (random offset)
+    is promoted to the next level, so memory stays O(k) while the rank error of any
+    quantile stays within ~rank_error * n. Sketches built on separate chunks,
+    partitions or workers can be merged and queried as if built on the union.
+    """
+
+    def __init__(self, k: int = 200, seed: int = None):
+        if k < 8:
+            raise ValueError("k must be at least 8")
+        self.k = int(k)
+        self.n = 0
+        self.min = None
+        self.max = None
+        self._levels = [np.empty(0, dtype='float64')]
+        self._rng = np.random.default_rng(seed)
+
+    @classmethod
+    def from_error(cls, rank_error: float, seed: int = None) -> "KLLSketch":
+        return cls(k=k_for_error(rank_error), seed=seed)
+
+    # ------------------------
+    # Updates
+    # ------------------------
+    def update(self, values) -> "KLLSketch":
+        """Add a chunk of values (NaNs are ignored)."""
+        values = np.asarray(values, dtype='float64').ravel()
+        values = values[~np.isnan(values)]
+        if len(values) == 0:
+            return self
+
+        self.n += len(values)
+        chunk_min, chunk_max = float(values.min()), float(values.max())
+        self.min = chunk_min if self.min is None else min(self.min, chunk_min)
+        self.max = chunk_max if self.max is None else max(self.max, chunk_max)
+
+        self._levels[0] = np.concatenate([self._levels[0], values])
+        self._compress()
+        return self
+
+    def merge(self, other: "KLLSketch") -> "KLLSketch":
+        """Fold another sketch into this one (in place)."""
+        if other.n == 0:
+            return self
+        while len(self._levels) < len(other._levels):
+            self._levels.append(np.empty(0, dtype='float64'))
+        for h, items in enumerate(other._levels):
+            self._levels[h] = np.concatenate([self._levels[h], items])
+
+        self.n += other.n
+        self.min = other.min if self.min is None else min(self.min, other.min)
+        self.max = other.max if self.max is None else max(self.max, other.max)
+        self.k = min(self.k, other.k)
+        self._compress()
+        return self
+
+    def _capacity(self, level: int) -> int:
+        depth = len(self._levels) - level - 1
+        return max(_MIN_CAPACITY, int(math.ceil(self.k * _CAPACITY_DECAY ** depth)))
+
+    def _compress(self) -> None:
+        level = 0
+        while level < len(self._levels):
+            items = self._levels[level]
+            if len(items) < self._capacity(level):
+                level += 1
+                continue
+
+            items = np.sort(items)
+            # Odd item out stays at this level; the rest is halved
+            keep = items[-1:] if len(items) % 2 else items[:0]
+            pairs = items[:len(items) - len(keep)]
+            promoted = pairs[self._rng.integers(2)::2]
+
+            self._levels[level] = keep
+            if level + 1 == len(self._levels):
+                self._levels.append(np.empty(0, dtype='float64'))
+            self._levels[level + 1] = np.concatenate([self._levels[level + 1], promoted])
+            # Adding a level shrinks lower capacities, so re-check from the bottom
+            level = 0
+
+    # ------------------------
+    # Queries
+    # ------------------------
+    def quantiles(self, qs) -> np.ndarray:
+        """Approximate quantiles for the probabilities in `qs`."""
+        qs = np.asarray(qs, dtype='float64')
+        if self.n == 0:
+            return np.full(qs.shape, np.nan)
+        if ((qs < 0) | (qs > 1)).any():
+            raise ValueError("Quantile probabilities must be in [0, 1]")
+
+        items = np.concatenate(self._levels)
+        weights = np.concatenate([np.full(len(lvl), 2 ** h, dtype='float64') for h, lvl in enumerate(self._levels)])
+        order = np.argsort(items, kind='stable')
+        items, cum_weights = items[order], np.cumsum(weights[order])
+
+        pos = np.searchsorted(cum_weights, qs * cum_weights[-1], side='left')
+        result = items[np.minimum(pos, len(items) - 1)]
+        # Extremes are tracked exactly
+        result = np.where(qs == 0, self.min, result)
+        result = np.where(qs == 1, self.max, result)
+        return result
+
+    def quantile(self, q: float) -> float:
+        return float(self.quantiles([q])[0])
+
+    @property
+    def retained(self) -> int:
+        """Number of items currently stored (memory footprint in values)."""
+        return int(sum(len(lvl) for lvl in self._levels))
+
+    # ------------------------
+    # Persistence
+    # ------------------------
+    def to_dict(self) -> dict:
+        return {
+            "type": "kll",
+            "k": self.k,
+            "n": self.n,
+            "min": self.min,
+            "max": self.max,
+            "levels": [lvl.tolist() for lvl in self._levels],
+        }
+
+    @classmethod
+    def from_dict(cls, state: dict, seed: int = None) -> "KLLSketch":
+        if state.get("type") != "kll":
+            raise ValueError(f"Unsupported sketch type: {state.get('type')}")
+        sketch = cls(k=state["k"], seed=seed)
+        sketch.n = int(state["n"])
+        sketch.min = state["min"]
+        sketch.max = state["max"]
+        sketch._levels = [np.asarray(lvl, dtype='float64') for lvl in state["levels"]] or [np.empty(0, dtype='float64')]
+        return sketch
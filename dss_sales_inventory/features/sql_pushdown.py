@@ -0,0 +1,156 @@
+# dss_sales_inventory/features/sql_pushdown.py
+import os
+import sqlite3
+import tempfile
+import numpy as np
+import pandas as pd
+import logging
+
+from ingestion.ingestion import DEFAULT_REGION
+
+# Logger configuration (assumed configured at project level)
+dss_logger = logging.getLogger('dss_logger')
+
+# ======================
+# SQL pushdown configuration
+# ======================
+SQL_PUSHDOWN_CONFIG = {
+    "database": None,           # None -> temporary file (out-of-core); ":memory:" or a path also work
+    "chunk_rows": 100_000,      # rows per bulk-load batch and per fetched result chunk
+    "cache_size_kib": 262_144,  # SQLite page cache for the work database
+}
+
+# ======================
+# Queries
+# ======================
+# Daily aggregation: revenue falls back to quantity * unit_price (see compute_sales_revenue)
+# ({region} is the region column, or the default region for feeds without one;
+#  {revenue} is REVENUE_SQL, or FALLBACK_REVENUE_SQL for feeds without a revenue column)
+DAILY_SALES_SQL = """
+    INSERT INTO daily_sales (product_id, date, region, daily_quantity_sold, daily_revenue)
+    SELECT product_id,
+           date,
+           {region},
+           SUM(quantity),
+           SUM({revenue})
+    FROM sales_clean
+    GROUP BY 1, 2, 3
+"""
+REVENUE_SQL = "COALESCE(revenue, quantity * unit_price)"
+FALLBACK_REVENUE_SQL = "quantity * unit_price"
+
+# Inventory join + stock_ratio (stock_on_hand / max(daily_quantity_sold, 1)), in inventory row order.
+# Inventory is per product: daily sales are summed over regions (a prefix of the daily_sales key).
+INVENTORY_FEATURES_SQL = """
+    SELECT {inventory_columns},
+           CAST(COALESCE(d.daily_quantity_sold, 0) AS REAL) AS daily_quantity_sold,
+           CAST(COALESCE(d.daily_revenue, 0) AS REAL) AS daily_revenue,
+           i.stock_on_hand * 1.0 / MAX(COALESCE(d.daily_quantity_sold, 0), 1) AS stock_ratio
+    FROM inventory_clean AS i
+    LEFT JOIN (
+        SELECT product_id, date, SUM(daily_quantity_sold) AS daily_quantity_sold, SUM(daily_revenue) AS daily_revenue
+        FROM daily_sales
+        GROUP BY product_id, date
+    ) AS d
+           ON d.product_id = i.product_id AND d.date = i.date
+    ORDER BY i.rowid
+"""
+
+
+def _iter_source_chunks(source, chunk_rows: int):
+    """Yield DataFrame chunks from a DataFrame or a CSV path."""
+    if isinstance(source, pd.DataFrame):
+        for start in range(0, len(source), chunk_rows):
+            yield source.iloc[start:start + chunk_rows]
+    else:
+        yield from pd.read_csv(source, chunksize=chunk_rows)
+
+
+def _from_day_numbers(days: pd.Series, dtype) -> pd.Series:
+    return pd.Series(days.to_numpy(dtype='int64').astype('datetime64[D]'), index=days.index).astype(dtype)
+
+
+def _bulk_load(conn: sqlite3.Connection, table: str, source, chunk_rows: int) -> tuple:
+    """
+    Create `table` from the source's columns and insert it chunk by chunk.
+    Returns (row count, datetime dtype of the source's date column).
+    """
+    rows = 0
+    insert_sql = None
+    date_dtype = None
+    for chunk in _iter_source_chunks(source, chunk_rows):
+        if insert_sql is None:
+            columns = list(chunk.columns)
+            conn.execute(f"CREATE TABLE {table} ({', '.join(columns)})")
+            insert_sql = f"INSERT INTO {table} VALUES ({', '.join('?' * len(columns))})"
+
+        # Dates are stored as integer day numbers: cheap to bind, group and join on
+        dates = pd.to_datetime(chunk['date'])
+        date_dtype = date_dtype or dates.dtype
+        chunk = chunk.assign(date=dates.to_numpy(dtype='datetime64[D]').astype('int64'))
+        conn.executemany(insert_sql, chunk.itertuples(index=False, name=None))
+        rows += len(chunk)
+    return rows, date_dtype
+
+
+def compute_base_features_sql(sales_source, inventory_source, config: dict = None) -> tuple:
+    """
+    Daily sales aggregation, inventory join and stock_ratio computed inside SQLite.
+
+    The cleaned sales/inventory (DataFrames or CSV paths) are bulk-loaded in chunks into a
+    work database, aggregated with GROUP BY into a keyed daily_sales table and joined there;
+    only the two result tables come back to pandas. Returns (daily_sales, inventory_features)
+    with the same columns, order and dtypes as the pandas path.
+    """
+    config = config or SQL_PUSHDOWN_CONFIG
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        database = config["database"] or os.path.join(work_dir, "features_work.db")
+        conn = sqlite3.connect(database)
+        try:
+            conn.execute("PRAGMA journal_mode = OFF")
+            conn.execute("PRAGMA synchronous = OFF")
+            conn.execute("PRAGMA temp_store = MEMORY")
+            conn.execute(f"PRAGMA cache_size = -{int(config['cache_size_kib'])}")
+
+            with conn:
+                sales_rows, date_dtype = _bulk_load(conn, "sales_clean", sales_source, config["chunk_rows"])
+                inventory_rows, _ = _bulk_load(conn, "inventory_clean", inventory_source, config["chunk_rows"])
+
+                conn.execute("""
+                    CREATE TABLE daily_sales (
+                        product_id INTEGER,
+                        date INTEGER,
+                        region TEXT,
+                        daily_quantity_sold INTEGER,
+                        daily_revenue REAL,
+                        PRIMARY KEY (product_id, date, region)
+                    ) WITHOUT ROWID
+                """)
+                sales_columns = {row[1] for row in conn.execute("PRAGMA table_info(sales_clean)")}
+                region = "region" if "region" in sales_columns else f"'{DEFAULT_REGION}'"
+                revenue = REVENUE_SQL if "revenue" in sales_columns else FALLBACK_REVENUE_SQL
+                conn.execute(DAILY_SALES_SQL.format(region=region, revenue=revenue))
+
+            # Results are fetched in chunks so only one chunk of Python row tuples exists at a time
+            daily_sales = pd.concat(pd.read_sql_query(
+                "SELECT * FROM daily_sales ORDER BY product_id, date, region", conn, chunksize=config["chunk_rows"]
+            ), ignore_index=True)
+            inventory_columns = [row[1] for row in conn.execute("PRAGMA table_info(inventory_clean)")]
+            inventory_features = pd.concat(pd.read_sql_query(
+                INVENTORY_FEATURES_SQL.format(inventory_columns=", ".join(f"i.{c}" for c in inventory_columns)),
+                conn, chunksize=config["chunk_rows"]
+            ), ignore_index=True)
+        finally:
+            conn.close()
+
+    daily_sales['date'] = _from_day_numbers(daily_sales['date'], date_dtype)
+    inventory_features['date'] = _from_day_numbers(inventory_features['date'], date_dtype)
+
+    dss_logger.info(
+        f"SQL pushdown features: loaded {sales_rows} sales / {inventory_rows} inventory rows",
+        extra={"run_id": None, "stage": "FEATURES", "function": "compute_base_features_sql",
+               "rows_in": sales_rows + inventory_rows, "rows_out": len(daily_sales) + len(inventory_features),
+               "status": "INFO"}
+    )
+    return daily_sales, inventory_features
@@ -6,9 +6,23 @@ import logging
 # Logger configuration (assumed configured at project level)
 dss_logger = logging.getLogger('dss_logger')
 
+# Sales feeds may carry a 'region' column (multi-region grain); single-region feeds get this one
+DEFAULT_REGION = "ALL"
+
 class SchemaValidationError(Exception):
     pass
 
+
+def normalize_region(sales_df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Sales frame with a clean 'region' column: names stripped and upper-cased, missing values
+    (or a missing column) set to DEFAULT_REGION. Returns a new frame.
+    """
+    if 'region' not in sales_df.columns:
+        return sales_df.assign(region=DEFAULT_REGION)
+    region = sales_df['region'].astype('string').str.strip().str.upper()
+    return sales_df.assign(region=region.mask(region.isna() | (region == ""), DEFAULT_REGION).astype(object))
+
 def run_ingestion(correlation_id: str) -> dict:
     """
     Load raw sales and inventory data from CSV files and perform initial validation.
@@ -23,6 +37,7 @@ def run_ingestion(correlation_id: str) -> dict:
     dict
         Dictionary containing two validated DataFrames:
         {'sales': pd.DataFrame, 'inventory': pd.DataFrame}
+        Sales always carry a 'region' column (see normalize_region); inventory is per product.
 
     Raises
     ------
@@ -83,6 +98,9 @@ def run_ingestion(correlation_id: str) -> dict:
     except Exception as e:
         raise SchemaValidationError(f"Error converting 'date' columns to datetime: {str(e)}")
 
+    # Optional region column (multi-region feeds)
+    sales_df = normalize_region(sales_df)
+
     # Validate numeric columns (must be >=0 or >0)
     numeric_checks_sales = {
         'sale_id': lambda x: x > 0,
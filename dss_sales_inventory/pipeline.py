@@ -11,12 +11,26 @@ project_root = Path(__file__).resolve().parent
 if str(project_root) not in sys.path:
     sys.path.insert(0, str(project_root))
 
+# ========================
+# Pandas Copy-on-Write (No-Mutation Contract)
+# ========================
+# Stages receive the previous stage's DataFrames through the data dict and must
+# never modify them in place: derived columns go on new frames (assign/merge/selection).
+# With copy-on-write those new frames share memory with their source until a column
+# is actually written, so stages no longer take defensive .copy() of their inputs.
+# Copy-on-write is always on from pandas 3.0; enable it explicitly on pandas 2.x.
+import pandas as pd
+
+if int(pd.__version__.split('.')[0]) < 3:
+    pd.set_option("mode.copy_on_write", True)
+
 # ========================
 # Imports
 # ========================
 from ingestion.ingestion import run_ingestion
 from cleaning.cleaning import run_cleaning
-from features.features import run_features
+from features.features import run_features, run_features_incremental, load_features
+from features.feature_store import build_feature_store
 from analysis.analysis import run_analysis
 
 # Star Schema Layer (Week 10 - New Addition)
@@ -69,6 +83,10 @@ if not dss_logger.handlers:
 if __name__ == "__main__":
     correlation_id = str(uuid.uuid4())
 
+    # --incremental: clean only rows not loaded by earlier runs, refresh the features for that
+    # delta and upsert the star schema (requires the processed files of a previous full run)
+    incremental = "--incremental" in sys.argv[1:]
+
     dss_logger.info(
         "Pipeline started",
         extra={
@@ -126,8 +144,8 @@ if __name__ == "__main__":
                 "status": "STARTED"
             }
         )
-        # Cleaning processes the dataframe
-        data = run_cleaning(data, correlation_id)
+        # Cleaning processes the dataframe (incremental: only rows not seen before)
+        data = run_cleaning(data, correlation_id, incremental=incremental)
         dss_logger.info(
             "Cleaning stage completed",
             extra={
@@ -156,7 +174,13 @@ if __name__ == "__main__":
         )
         
         # run_features now returns a dictionary: {'sales': df, 'inventory': df}
-        data = run_features(data, correlation_id)
+        if incremental:
+            # Only the feature partitions the delta touches are rewritten; later stages
+            # get the full tables plus the refreshed rows (sales_delta / inventory_delta)
+            delta = run_features_incremental(data, correlation_id)
+            data = {**load_features(), **delta}
+        else:
+            data = run_features(data, correlation_id)
         
         # Verify structure for logging purposes (optional validation)
         if isinstance(data, dict) and 'sales' in data and 'inventory' in data:
@@ -165,6 +189,9 @@ if __name__ == "__main__":
             dss_logger.info(f"Features split created - Sales: {sales_shape}, Inventory: {inv_shape}",
                             extra={"run_id": correlation_id, "stage": "FEATURES", "function": "run_features", "rows_in": None, "rows_out": None, "status": "INFO"})
 
+        # Product-indexed feature store, versioned by this run's correlation_id
+        build_feature_store(data, correlation_id)
+
         dss_logger.info(
             "Features stage completed",
             extra={
@@ -194,7 +221,7 @@ if __name__ == "__main__":
         
         # Pass the data dictionary (from Features) and correlation_id
         # This function builds the dimensions/facts and loads them into SQLite
-        run_star_schema(data, correlation_id)
+        run_star_schema(data, correlation_id, incremental=incremental)
 
         dss_logger.info(
             "Star Schema Layer completed",
@@ -16,7 +16,7 @@
 #   C:\Data_Analysis\dss_sales_inventory\reporting\outputs\python_dash\decision_brief.md
 # ---------------------------------------------------------
 
-import sqlite3
+import sys
 import pandas as pd
 from pathlib import Path
 import re
@@ -29,13 +29,22 @@ from datetime import datetime, UTC
 
 PROJECT_ROOT = Path(r"C:\Data_Analysis\dss_sales_inventory")
 
-DB_PATH = PROJECT_ROOT / "analysis" / "analytics.db"
+# Star schema: analytics backend from data_model.backends (SQLite analytics.db by default,
+# DuckDB analytics.duckdb with DSS_ANALYTICS_BACKEND=duckdb)
 
 KPI_PATH = PROJECT_ROOT / "analysis" / "kpis" / "product_kpis.csv"
 RISK_PATH = PROJECT_ROOT / "analysis" / "risk" / "product_risk_scores.csv"
 
 TREND_PATH = PROJECT_ROOT / "analysis" / "time_series" / "trend_insights.md"
 
+# Project root on sys.path so shared modules resolve when run as a script
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from data_model.aggregate_navigator import query as query_aggregate  # noqa: E402
+from data_model.backends import get_backend  # noqa: E402
+from data_model.workload_queries import SQL_DATE_LOOKUP  # noqa: E402
+
 # Unified output location
 OUTPUT_MD = (
     PROJECT_ROOT
@@ -49,32 +58,10 @@ OUTPUT_MD = (
 # ---------------------------------------------------------
 # SQL QUERIES (validated against real schema)
 # ---------------------------------------------------------
-
-SQL_TOTAL_FINANCIALS = """
-SELECT
-    SUM(f.revenue)                     AS total_revenue,
-    SUM(f.cost)                        AS total_cost,
-    SUM(f.revenue - f.cost)            AS total_profit
-FROM fact_sales f;
-"""
-
-SQL_PRODUCT_FINANCIALS = """
-SELECT
-    f.product_id,
-    SUM(f.revenue)          AS total_revenue,
-    SUM(f.revenue - f.cost) AS total_profit
-FROM fact_sales f
-GROUP BY f.product_id;
-"""
-
-SQL_DATE_RANGE = """
-SELECT
-    MIN(d.full_date) AS min_date,
-    MAX(d.full_date) AS max_date
-FROM fact_sales f
-JOIN dim_date d
-    ON f.date_id = d.date_id;
-"""
+# Financial totals are routed by the aggregate navigator to the
+# smallest aggregate table that can answer them (fact_sales fallback).
+# The date lookup (SQL_DATE_LOOKUP) is shared with data_model/workload_queries.py,
+# which checks the query plans of the reporting workload.
 
 
 # ---------------------------------------------------------
@@ -201,10 +188,20 @@ def compile_decision_summary() -> dict:
     # ---------------------------
     # SQLite queries
     # ---------------------------
-    with sqlite3.connect(DB_PATH) as conn:
-        financials = pd.read_sql(SQL_TOTAL_FINANCIALS, conn).iloc[0].to_dict()
-        product_financials = pd.read_sql(SQL_PRODUCT_FINANCIALS, conn)
-        date_range = pd.read_sql(SQL_DATE_RANGE, conn).iloc[0].to_dict()
+    with get_backend(read_only=True) as db:
+        totals = query_aggregate(db, ["revenue", "cost", "profit", "first_date_id", "last_date_id"]).iloc[0]
+        financials = {
+            "total_revenue": totals["revenue"],
+            "total_cost": totals["cost"],
+            "total_profit": totals["profit"],
+        }
+        product_financials = query_aggregate(db, ["revenue", "profit"], group_by=["product_id"]).rename(
+            columns={"revenue": "total_revenue", "profit": "total_profit"}
+        )
+        date_range = {
+            "min_date": db.query(SQL_DATE_LOOKUP, [int(totals["first_date_id"])]).iloc[0, 0],
+            "max_date": db.query(SQL_DATE_LOOKUP, [int(totals["last_date_id"])]).iloc[0, 0],
+        }
 
     # ---------------------------
     # Portfolio KPIs
@@ -1,10 +1,23 @@
-import sqlite3
+import sys
 import pandas as pd
 import streamlit as st
 import plotly.express as px
 from pathlib import Path
 import os
 
+# Project root on sys.path so shared modules resolve when run with streamlit
+PROJECT_ROOT = Path(__file__).resolve().parents[3]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from data_model.backends import get_backend, backend_name  # noqa: E402
+from data_model.fact_partitions import date_key, fact_source  # noqa: E402
+from data_model.workload_queries import (  # noqa: E402
+    SQL_SALES_TIME_SERIES, SQL_SALES_TIME_SERIES_REGION, SQL_REGIONS, SQL_CALENDAR, SQL_DATE_BOUNDS,
+    SQL_DEMAND_WINDOWS
+)
+from features.features import ROLLING_FEATURE_CONFIG  # noqa: E402
+
 # -------------------------------------------------
 # Database Configuration and Root Discovery
 # -------------------------------------------------
@@ -23,6 +36,10 @@ def find_project_root(start: Path):
         "Could not locate DSS project root (analysis/analytics.db not found)."
     )
 
+# Analytics backend (DSS_ANALYTICS_BACKEND=sqlite|duckdb) and its database file
+BACKEND = backend_name()
+DB_FILES = {"sqlite": "analytics.db", "duckdb": "analytics.duckdb"}
+
 # Optional environment variable override for DB path
 ENV_DB_PATH = os.getenv("DSS_DB_PATH")
 
@@ -30,65 +47,86 @@ if ENV_DB_PATH:
     DB_PATH = Path(ENV_DB_PATH).expanduser().resolve()
 else:
     BASE_DIR = find_project_root(Path(__file__).resolve())
-    DB_PATH = BASE_DIR / "analysis" / "analytics.db"
+    DB_PATH = BASE_DIR / "analysis" / DB_FILES[BACKEND]
 
 if not DB_PATH.exists():
-    raise FileNotFoundError(f"SQLite database not found at: {DB_PATH}")
+    raise FileNotFoundError(f"{BACKEND} database not found at: {DB_PATH}")
 
 # -------------------------------------------------
 # Database Connection Utilities
 # -------------------------------------------------
 
 def get_connection():
-    """Return a SQLite connection using string path."""
-    return sqlite3.connect(str(DB_PATH))
+    """Return a read-only analytics backend on DB_PATH (use as a context manager)."""
+    return get_backend(BACKEND, path=DB_PATH, read_only=True)
 
 # -------------------------------------------------
 # Data Loading – SQL Layer
 # -------------------------------------------------
 
-def load_sales_time_series(start_date: str, end_date: str) -> pd.DataFrame:
+def load_sales_time_series(start_date: str, end_date: str, region_id: int = None) -> pd.DataFrame:
     """
     Load time series data aggregated by product_id and region_name,
     including revenue, quantity, and profit.
+    The date range is applied to the date_id smart key, so a month-partitioned
+    fact_sales is pruned to the partitions the window covers. region_id restricts the
+    query to one region (seek on idx_fact_region_cover instead of reading every region's
+    rows). The SQL lives in data_model/workload_queries.py, where its plans are checked.
     """
-    query = """
-    SELECT
-        d.full_date AS date,
-        f.product_id,
-        r.region_name,
-        SUM(f.revenue) AS revenue,
-        SUM(f.quantity) AS quantity,
-        SUM(f.revenue - f.cost) AS profit
-    FROM fact_sales f
-    JOIN dim_date d ON f.date_id = d.date_id
-    JOIN dim_region r ON f.region_id = r.region_id
-    WHERE d.full_date BETWEEN ? AND ?
-    GROUP BY d.full_date, f.product_id, r.region_name
-    ORDER BY d.full_date
+    date_from, date_to = date_key(start_date), date_key(end_date)
+    with get_connection() as db:
+        source = fact_source(db, date_from, date_to)
+        if region_id is None:
+            df = db.query(SQL_SALES_TIME_SERIES.format(fact=source), params=[date_from, date_to])
+        else:
+            df = db.query(SQL_SALES_TIME_SERIES_REGION.format(fact=source), params=[int(region_id), date_from, date_to])
+
+    df["date"] = pd.to_datetime(df["date"])
+    return df
+
+def load_demand_windows(start_date: str, end_date: str) -> pd.DataFrame:
     """
-    with get_connection() as conn:
-        df = pd.read_sql_query(query, conn, params=[start_date, end_date])
+    Load the rolling mean daily demand per product (demand_mean_7d / _14d / _28d, computed
+    by the features stage and stored in fact_inventory_snapshot) for [start_date, end_date].
+    """
+    with get_connection() as db:
+        df = db.query(SQL_DEMAND_WINDOWS, params=[date_key(start_date), date_key(end_date)])
 
     df["date"] = pd.to_datetime(df["date"])
     return df
 
+
+def load_calendar(start_date: str, end_date: str) -> pd.DataFrame:
+    """
+    Load the calendar days in [start_date, end_date] from dim_date.
+    dim_date is contiguous, so this is an indexed range scan on full_date.
+    """
+    with get_connection() as db:
+        calendar = db.query(SQL_CALENDAR, params=[start_date, end_date])
+
+    calendar["date"] = pd.to_datetime(calendar["date"])
+    return calendar
+
 # -------------------------------------------------
 # Data Preparation Utilities
 # -------------------------------------------------
 
-def fill_missing_dates(df: pd.DataFrame) -> pd.DataFrame:
+def fill_missing_dates(df: pd.DataFrame, calendar: pd.DataFrame = None) -> pd.DataFrame:
     """
     Fill missing dates with zeros for product-region combinations.
+    Days come from the calendar dimension (load_calendar) when given, otherwise
+    from the range of dates present in df.
     Create a readable 'identifier' column for charting.
     """
     if df.empty:
         return df
 
-    all_dates = pd.date_range(start=df["date"].min(), end=df["date"].max(), freq="D")
-    combos = df[["product_id", "region_name"]].drop_duplicates().assign(key=1)
-    date_df = pd.DataFrame({"date": all_dates}).assign(key=1)
-    full_index = date_df.merge(combos, on="key").drop("key", axis=1)
+    if calendar is not None:
+        all_dates = calendar["date"]
+    else:
+        all_dates = pd.date_range(start=df["date"].min(), end=df["date"].max(), freq="D")
+    combos = df[["product_id", "region_name"]].drop_duplicates()
+    full_index = pd.DataFrame({"date": all_dates}).merge(combos, how="cross")
     base = full_index.merge(df, on=["date", "product_id", "region_name"], how="left")
     base[["revenue", "quantity", "profit"]] = base[["revenue", "quantity", "profit"]].fillna(0)
     base["identifier"] = base["product_id"].astype(str) + " (" + base["region_name"] + ")"
@@ -106,6 +144,16 @@ def compute_rolling_avg(df: pd.DataFrame, window: int) -> pd.DataFrame:
     )
     return df
 
+def compute_rolling_demand(demand_df: pd.DataFrame, window: int) -> pd.DataFrame:
+    """
+    Rolling average daily demand per product: the precomputed demand_mean_{window}d column
+    (no window is recomputed here).
+    """
+    df = demand_df.sort_values(["product_id", "date"])
+    df["rolling_demand"] = df[f"demand_mean_{window}d"]
+    df["identifier"] = df["product_id"].astype(str)
+    return df
+
 def compute_cumulative_revenue(df: pd.DataFrame) -> pd.DataFrame:
     """Compute cumulative revenue per product-region."""
     df = df.sort_values(["identifier", "date"])
@@ -147,12 +195,11 @@ def main():
     st.title("Week 12 – Dashboard Enhancement")
     st.caption("Date Intelligence & Growth Analysis")
 
-    # Load date range from dim_date
+    # Load date range and regions from the dimensions
     with st.spinner("Loading date boundaries..."):
-        with get_connection() as conn:
-            date_bounds = pd.read_sql_query(
-                "SELECT MIN(full_date) AS min_d, MAX(full_date) AS max_d FROM dim_date", conn
-            )
+        with get_connection() as db:
+            date_bounds = db.query(SQL_DATE_BOUNDS)
+            regions_df = db.query(SQL_REGIONS)
 
     min_date = pd.to_datetime(date_bounds["min_d"].iloc[0])
     max_date = pd.to_datetime(date_bounds["max_d"].iloc[0])
@@ -169,21 +216,24 @@ def main():
         st.error("Start date must be before end date.")
         return
 
+    # Sidebar filters (the region is applied in SQL)
+    st.sidebar.header("Filters")
+    region_ids = dict(zip(regions_df["region_name"], regions_df["region_id"]))
+    selected_region = st.sidebar.selectbox("Region", ["All"] + list(region_ids))
+
     # Load data
     with st.spinner("Loading sales data..."):
-        raw_df = load_sales_time_series(start_date.strftime("%Y-%m-%d"), end_date.strftime("%Y-%m-%d"))
+        raw_df = load_sales_time_series(
+            start_date.strftime("%Y-%m-%d"), end_date.strftime("%Y-%m-%d"), region_ids.get(selected_region)
+        )
+        calendar_df = load_calendar(start_date.strftime("%Y-%m-%d"), end_date.strftime("%Y-%m-%d"))
+        demand_df = load_demand_windows(start_date.strftime("%Y-%m-%d"), end_date.strftime("%Y-%m-%d"))
 
     if raw_df.empty:
         st.warning("No data for selected period.")
         return
 
-    base_df = fill_missing_dates(raw_df)
-
-    # Sidebar filters
-    st.sidebar.header("Filters")
-    regions = ["All"] + sorted(base_df["region_name"].unique().tolist())
-    selected_region = st.sidebar.selectbox("Region", regions)
-    df_filtered = base_df if selected_region == "All" else base_df[base_df["region_name"] == selected_region]
+    df_filtered = fill_missing_dates(raw_df, calendar_df)
 
     product_ids = sorted(df_filtered["product_id"].unique())
     selected_product_ids = st.sidebar.multiselect(
@@ -210,6 +260,21 @@ def main():
     )
     st.plotly_chart(fig_roll, use_container_width=True)
 
+    # Rolling Demand Chart (precomputed product-level demand windows, all regions)
+    st.subheader("Rolling Average – Demand Trend")
+    demand_window = st.selectbox("Demand window (days)", ROLLING_FEATURE_CONFIG["windows"])
+    if selected_region != "All":
+        st.caption("Rolling demand is precomputed per product across all regions.")
+    demand_for_charts = compute_rolling_demand(
+        demand_df[demand_df["product_id"].isin(selected_product_ids)], window=demand_window
+    )
+    fig_demand = px.line(
+        demand_for_charts, x="date", y="rolling_demand", color="identifier",
+        hover_data=["daily_quantity_sold"],
+        labels={"rolling_demand": f"{demand_window}-Day Avg Daily Demand (units)", "date": "Date", "identifier": "Product"}
+    )
+    st.plotly_chart(fig_demand, use_container_width=True)
+
     # Cumulative Revenue Chart
     st.subheader("Cumulative Revenue")
     fig_cum = px.bar(
@@ -2,8 +2,8 @@ import streamlit as st
 import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
-import sqlite3
 import os
+import sys
 from pathlib import Path
 
 # ================================
@@ -23,39 +23,58 @@ def get_project_root() -> str:
 ROOT = get_project_root()
 st.write(f"Project ROOT detected at: {ROOT}")
 
+# Project root on sys.path so shared modules resolve when run with streamlit
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from data_model.backends import get_backend, backend_name  # noqa: E402
+from data_model.parquet_export import export_available, read_star_table  # noqa: E402
+
+BACKEND = backend_name()
+DB_FILES = {"sqlite": "analytics.db", "duckdb": "analytics.duckdb"}
+# fact_sales columns the dashboard reads (projected when loading the Parquet export)
+FACT_COLUMNS = ["product_id", "date_id", "region_id", "product_key", "quantity", "revenue", "cost"]
+
 # ================================
 # Data Loading & Preprocessing
 # ================================
-@st.cache_data(ttl=3600, show_spinner="Loading and processing data from SQLite and CSVs...")
+@st.cache_data(ttl=3600, show_spinner="Loading and processing data from the analytics database and CSVs...")
 def fetch_and_preprocess_data() -> pd.DataFrame:
-    db_path = os.path.join(ROOT, "analysis", "analytics.db")
+    db_path = os.path.join(ROOT, "analysis", DB_FILES[BACKEND])
     kpis_path = os.path.join(ROOT, "analysis", "kpis", "product_kpis.csv")
     risk_path = os.path.join(ROOT, "analysis", "risk", "product_risk_scores.csv")
 
+    # The star schema comes from the columnar Parquet export when the builder wrote one
+    use_parquet = export_available()
     for path, name in [
-        (db_path, "SQLite database (analysis/analytics.db)"),
+        (None if use_parquet else db_path, f"{BACKEND} database (analysis/{DB_FILES[BACKEND]})"),
         (kpis_path, "product_kpis.csv"),
         (risk_path, "product_risk_scores.csv")
     ]:
-        if not os.path.exists(path):
+        if path is not None and not os.path.exists(path):
             st.error(f"{name} not found at expected path: {path}")
             st.stop()
 
     try:
-        conn = sqlite3.connect(db_path)
-        fact_sales = pd.read_sql_query("SELECT * FROM fact_sales", conn)
-        dim_product = pd.read_sql_query("SELECT * FROM dim_product", conn)
-        dim_date = pd.read_sql_query("SELECT * FROM dim_date", conn)
-        dim_region = pd.read_sql_query("SELECT * FROM dim_region", conn)
-        conn.close()
+        if use_parquet:
+            fact_sales = read_star_table("fact_sales", columns=FACT_COLUMNS)
+            dim_product = read_star_table("dim_product")
+            dim_date = read_star_table("dim_date")
+            dim_region = read_star_table("dim_region")
+        else:
+            with get_backend(BACKEND, path=db_path, read_only=True) as db:
+                fact_sales = db.query("SELECT * FROM fact_sales")
+                dim_product = db.query("SELECT * FROM dim_product")
+                dim_date = db.query("SELECT * FROM dim_date")
+                dim_region = db.query("SELECT * FROM dim_region")
 
         product_kpis = pd.read_csv(kpis_path)
         product_risk = pd.read_csv(risk_path)
 
         # Validation (updated to actual columns)
         validation_rules = [
-            ("fact_sales", fact_sales, ["product_id", "date_id", "region_id", "quantity", "revenue", "cost"]),
-            ("dim_product", dim_product, ["product_id", "unit_cost", "unit_price"]),
+            ("fact_sales", fact_sales, ["product_id", "date_id", "region_id", "product_key", "quantity", "revenue", "cost"]),
+            ("dim_product", dim_product, ["product_key", "product_id", "unit_cost", "unit_price"]),
             ("dim_date", dim_date, ["date_id", "full_date", "year", "month", "quarter"]),
             ("dim_region", dim_region, ["region_id", "region_name"]),
             ("product_kpis", product_kpis, ["product_id", "inventory_risk_score", "decision_flag", "demand_pressure_index", "profitability_margin"]),
@@ -67,9 +86,9 @@ def fetch_and_preprocess_data() -> pd.DataFrame:
                 st.error(f"Missing required columns in {source}: {missing}")
                 st.stop()
 
-        # Merge tables
+        # Merge tables (dim_product is SCD2: each sale joins the product version of its date)
         df = (fact_sales
-              .merge(dim_product, on="product_id", how="left")
+              .merge(dim_product.drop(columns="product_id"), on="product_key", how="left")
               .merge(dim_date, on="date_id", how="left")
               .merge(dim_region, on="region_id", how="left"))
 
@@ -0,0 +1,79 @@
+# dss_sales_inventory/tests/conftest.py
+"""
+Shared fixtures: a small synthetic raw dataset (the shape of data/raw) and a workspace that
+points the processed-data, database and export paths of the pipeline modules at tmp_path.
+"""
+import sys
+from functools import partial
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+# Project root on sys.path so the stage packages import as in pipeline.py
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from ingestion.ingestion import normalize_region  # noqa: E402
+import cleaning.cleaning as cleaning_module  # noqa: E402
+import features.features as features_module  # noqa: E402
+import data_model.build_star_schema as star_module  # noqa: E402
+import analysis.run_sql_layer as sql_layer_module  # noqa: E402
+
+PRODUCTS = 4
+DAYS = 91
+REGIONS = ["NORTH", "SOUTH"]
+
+
+@pytest.fixture
+def raw_data() -> dict:
+    """Ingested-shape sales and inventory: daily stock per product, sales on ~40% of days."""
+    rng = np.random.default_rng(7)
+    dates = pd.date_range("2024-01-01", periods=DAYS, freq="D")
+    product_ids = np.repeat(np.arange(1, PRODUCTS + 1), DAYS)
+    inventory = pd.DataFrame({
+        "product_id": product_ids,
+        "date": np.tile(dates, PRODUCTS),
+        "stock_on_hand": rng.integers(20, 150, PRODUCTS * DAYS),
+        "reorder_point": 40,
+        "lead_time_days": 5,
+        "unit_cost": 10.0 + product_ids,
+    })
+
+    sold = inventory[rng.random(len(inventory)) < 0.4]
+    quantity = rng.integers(1, 6, len(sold))
+    unit_price = (sold["unit_cost"] * 1.5).round(2).to_numpy()
+    sales = pd.DataFrame({
+        "sale_id": np.arange(1, len(sold) + 1),
+        "product_id": sold["product_id"].to_numpy(),
+        "date": sold["date"].to_numpy(),
+        "quantity": quantity,
+        "unit_price": unit_price,
+        "revenue": (quantity * unit_price).round(2),
+        "region": rng.choice(REGIONS, len(sold)),
+    })
+    return {"sales": normalize_region(sales), "inventory": inventory}
+
+
+@pytest.fixture
+def workspace(tmp_path, monkeypatch) -> Path:
+    """Redirects processed CSVs, analytics.db, the Parquet export and the ERD into tmp_path."""
+    processed = tmp_path / "processed"
+    monkeypatch.setattr(cleaning_module, "PROCESSED_DIR", str(processed))
+    monkeypatch.setattr(features_module, "PROCESSED_DIR", str(processed))
+    # Bound as defaults at import time, so the savers are re-pointed explicitly
+    monkeypatch.setattr(features_module, "save_features",
+                        partial(features_module.save_features, processed_dir=str(processed)))
+    monkeypatch.setattr(features_module, "save_stock_ratio_clip",
+                        partial(features_module.save_stock_ratio_clip, processed_dir=str(processed)))
+
+    db_path = tmp_path / "analytics.db"
+    monkeypatch.setattr(star_module, "DB_PATH", str(db_path))
+    monkeypatch.setattr(star_module, "ERD_OUTPUT_PATH", str(tmp_path / "erd_diagram"))
+    monkeypatch.setitem(star_module.PARQUET_EXPORT_CONFIG, "path", str(tmp_path / "star_parquet"))
+
+    monkeypatch.setattr(sql_layer_module, "DATA", processed)
+    monkeypatch.setattr(sql_layer_module, "DB_FILE", db_path)
+    return tmp_path
@@ -0,0 +1,68 @@
+# dss_sales_inventory/tests/test_cleaning.py
+"""Cleaning stage (cleaning.cleaning)."""
+import pandas as pd
+import pytest
+
+from cleaning.cleaning import run_cleaning
+
+
+def test_run_cleaning_leaves_input_unchanged(raw_data, workspace):
+    # Dirty rows exercise the type conversion, null and duplicate handling
+    raw_data["sales"] = pd.concat([raw_data["sales"], raw_data["sales"].tail(3)], ignore_index=True)
+    raw_data["sales"].loc[0, "revenue"] = None
+    before = {name: frame.copy(deep=True) for name, frame in raw_data.items()}
+
+    cleaned = run_cleaning(raw_data, "no-mutation")
+
+    assert len(cleaned["sales"]) == len(raw_data["sales"]) - 3
+    for name, frame in raw_data.items():
+        pd.testing.assert_frame_equal(frame, before[name])
+
+
+def test_incremental_batches_are_deduplicated_across_runs(raw_data, workspace):
+    processed = workspace / "processed"
+    sales, inventory = raw_data["sales"], raw_data["inventory"]
+    cutoff = pd.Timestamp("2024-03-01")
+    run_cleaning({"sales": sales[sales["date"] < cutoff], "inventory": inventory[inventory["date"] < cutoff]}, "base")
+
+    # The next batch overlaps the base by a week and arrives with its columns in another order
+    overlap = cutoff - pd.Timedelta(days=7)
+    batch = {
+        "sales": sales[sales["date"] >= overlap].iloc[:, ::-1],
+        "inventory": inventory[inventory["date"] >= overlap].iloc[:, ::-1],
+    }
+    delta = run_cleaning(batch, "delta", incremental=True)
+    assert len(delta["sales"]) == (sales["date"] >= cutoff).sum()
+    assert len(delta["inventory"]) == (inventory["date"] >= cutoff).sum()
+
+    # Replaying the same batch adds nothing
+    replay = run_cleaning(batch, "replay", incremental=True)
+    assert replay["sales"].empty and replay["inventory"].empty
+
+    stored = {name: pd.read_csv(processed / f"{name}_cleaned.csv", parse_dates=["date"]) for name in raw_data}
+    full = run_cleaning(raw_data, "full")
+    for name, key in [("sales", ["sale_id"]), ("inventory", ["product_id", "date"])]:
+        assert list(stored[name].columns) == list(full[name].columns)
+        pd.testing.assert_frame_equal(
+            stored[name].sort_values(key).reset_index(drop=True),
+            full[name].sort_values(key).reset_index(drop=True),
+            check_dtype=False,
+        )
+
+
+def test_incremental_append_refuses_a_changed_header(raw_data, workspace):
+    processed = workspace / "processed"
+    sales, inventory = raw_data["sales"], raw_data["inventory"]
+    cutoff = pd.Timestamp("2024-03-01")
+    run_cleaning({"sales": sales[sales["date"] < cutoff], "inventory": inventory[inventory["date"] < cutoff]}, "base")
+
+    # A cleaned sales file written before the region column existed
+    legacy = pd.read_csv(processed / "sales_cleaned.csv").drop(columns="region")
+    legacy.to_csv(processed / "sales_cleaned.csv", index=False)
+    before = {path.name: path.read_bytes() for path in processed.rglob("*") if path.is_file()}
+
+    batch = {"sales": sales[sales["date"] >= cutoff], "inventory": inventory[inventory["date"] >= cutoff]}
+    with pytest.raises(ValueError, match="do not match the file header"):
+        run_cleaning(batch, "delta", incremental=True)
+    # Neither CSV nor key index was touched
+    assert {path.name: path.read_bytes() for path in processed.rglob("*") if path.is_file()} == before
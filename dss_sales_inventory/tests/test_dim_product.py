@@ -0,0 +1,96 @@
+# dss_sales_inventory/tests/test_dim_product.py
+"""Type 2 dim_product versions and the as-of join of the facts onto them."""
+import logging
+import sqlite3
+from contextlib import closing
+
+import numpy as np
+import pandas as pd
+
+import data_model.build_star_schema as star_module
+import features.features as features_module
+from cleaning.cleaning import run_cleaning
+from data_model.build_star_schema import build_dim_product, date_to_key, resolve_product_versions
+
+logger = logging.getLogger("dss_logger")
+
+
+def daily_frames(prices) -> tuple:
+    """Product 1 sells every day of Jan-Mar 2024 at `prices`; its unit_cost moves on Feb 15."""
+    dates = pd.date_range("2024-01-01", "2024-03-31", freq="D")
+    inventory = pd.DataFrame({"product_id": 1, "date": dates, "unit_cost": np.where(dates < "2024-02-15", 10.0, 12.0)})
+    sales = pd.DataFrame({
+        "product_id": 1, "date": dates, "daily_quantity_sold": 2.0, "daily_revenue": 2.0 * np.asarray(prices),
+    })
+    return sales, inventory
+
+
+def test_versions_follow_unit_cost_not_price_noise(monkeypatch):
+    # Realized prices wander by up to 5% from day to day (monthly averages move by more than 2%)
+    rng = np.random.default_rng(11)
+    prices = 15.0 * (1 + rng.uniform(-0.05, 0.05, 91))
+    prices[31:60] *= 1.04
+    sales, inventory = daily_frames(prices)
+
+    dim_product = build_dim_product(sales, inventory, logger)
+    assert dim_product[["valid_from", "valid_to", "unit_cost", "is_current"]].values.tolist() == [
+        [20240101, 20240214, 10.0, 0], [20240215, 99991231, 12.0, 1],
+    ]
+    first_half = sales["date"] < "2024-02-15"
+    assert np.isclose(dim_product["unit_price"].iloc[0], prices[first_half.to_numpy()].mean())
+
+    # Price-drift versioning is opt-in
+    monkeypatch.setitem(star_module.PRODUCT_SCD2_CONFIG, "price_tolerance", 0.02)
+    drifting = build_dim_product(sales, inventory, logger)
+    assert set(dim_product["valid_from"]) < set(drifting["valid_from"])
+
+
+def test_resolve_product_versions_is_an_as_of_join():
+    dim_product = pd.DataFrame({
+        "product_key": [1, 2, 3], "product_id": [1, 1, 2],
+        "unit_cost": [10.0, 12.0, 5.0], "valid_from": [20240101, 20240215, 20240110],
+    })
+    rows = pd.DataFrame({
+        "product_id": [1, 2, 1, 1, 2, 3, 1],
+        "date_id": [20240214, 20240109, 20240215, 20240301, 20240110, 20240201, 20240101],
+        "quantity": np.arange(7),
+    })
+    resolved = resolve_product_versions(rows, dim_product, logger)
+
+    # Row order kept; the boundary day belongs to the new version; no version -> NaN
+    assert resolved["quantity"].tolist() == list(range(7))
+    assert resolved["product_key"].fillna(0).tolist() == [1, 0, 2, 2, 3, 0, 1]
+    assert resolved["unit_cost"].fillna(0).tolist() == [10.0, 0, 12.0, 12.0, 5.0, 0, 10.0]
+
+
+def test_facts_carry_the_version_in_effect_on_their_date(raw_data, workspace, monkeypatch):
+    monkeypatch.setitem(star_module.PARQUET_EXPORT_CONFIG, "enabled", False)
+    inventory = raw_data["inventory"].copy()
+    inventory.loc[(inventory["product_id"] == 3) & (inventory["date"] >= "2024-02-10"), "unit_cost"] = 15.0
+    inventory.loc[(inventory["product_id"] == 3) & (inventory["date"] >= "2024-03-05"), "unit_cost"] = 11.0
+    raw = {"sales": raw_data["sales"], "inventory": inventory}
+    star_module.main(features_module.run_features(run_cleaning(raw, "versions"), "versions"), "versions")
+
+    with closing(sqlite3.connect(workspace / "analytics.db")) as conn:
+        versions = pd.read_sql_query("SELECT * FROM dim_product ORDER BY product_id, valid_from", conn)
+        facts = {
+            table: pd.read_sql_query(
+                f"SELECT f.*, p.product_id AS version_product, p.valid_from, p.valid_to, p.unit_cost "
+                f"FROM {table} f JOIN dim_product p ON p.product_key = f.product_key", conn
+            )
+            for table in ("fact_sales", "fact_inventory_snapshot")
+        }
+
+    # One version per unit_cost, none from the (constant) prices
+    assert versions.groupby("product_id").size().to_dict() == {1: 1, 2: 1, 3: 3, 4: 1}
+    assert versions.loc[versions["product_id"] == 3, "valid_from"].tolist() == [20240101, 20240210, 20240305]
+
+    expected_cost = inventory.assign(date_id=date_to_key(inventory["date"])).set_index(["product_id", "date_id"])["unit_cost"]
+    for table, fact in facts.items():
+        assert len(fact) > 0
+        assert (fact["version_product"] == fact["product_id"]).all(), table
+        assert fact["date_id"].between(fact["valid_from"], fact["valid_to"]).all(), table
+        on_date = expected_cost.reindex(pd.MultiIndex.from_frame(fact[["product_id", "date_id"]])).to_numpy()
+        assert np.allclose(fact["unit_cost"], on_date), table
+    sales = facts["fact_sales"]
+    assert np.allclose(sales["cost"], sales["quantity"] * sales["unit_cost"])
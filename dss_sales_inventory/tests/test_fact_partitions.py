@@ -0,0 +1,66 @@
+# dss_sales_inventory/tests/test_fact_partitions.py
+"""Month-partitioned fact_sales and partition pruning (fact_source) against a plain build."""
+import pandas as pd
+
+import data_model.build_star_schema as star_module
+import features.features as features_module
+from cleaning.cleaning import run_cleaning
+from data_model.backends import get_backend
+from data_model.fact_partitions import date_key, fact_source
+
+# (date_from, date_to) ranges: open, one month, across a month boundary, open-ended, no partition
+RANGES = [
+    (None, None),
+    (date_key("2024-02-01"), date_key("2024-02-29")),
+    (date_key("2024-01-20"), date_key("2024-02-10")),
+    (date_key("2024-03-15"), None),
+    (date_key("2024-05-01"), date_key("2024-05-31")),
+]
+
+
+def read_ranges(db_path) -> dict:
+    """fact_sales rows of each range in RANGES through fact_source, with the source used."""
+    frames = {}
+    with get_backend("sqlite", path=db_path, read_only=True) as db:
+        for date_from, date_to in RANGES:
+            source = fact_source(db, date_from, date_to)
+            frame = db.query(
+                f"SELECT f.* FROM {source} f WHERE f.date_id BETWEEN ? AND ? "
+                "ORDER BY f.product_id, f.date_id, f.region_id",
+                [date_from or 0, date_to or 99991231],
+            )
+            frames[(date_from, date_to)] = (source, frame)
+    return frames
+
+
+def test_partitioned_build_serves_the_rows_of_a_plain_build(raw_data, workspace, monkeypatch):
+    monkeypatch.setitem(star_module.PARQUET_EXPORT_CONFIG, "enabled", False)
+    db_path = workspace / "analytics.db"
+    data = features_module.run_features(run_cleaning(raw_data, "plain"), "plain")
+
+    star_module.main(data, "plain")
+    plain = read_ranges(db_path)
+    monkeypatch.setitem(star_module.FACT_PARTITION_CONFIG, "enabled", True)
+    star_module.main(data, "partitioned")
+    partitioned = read_ranges(db_path)
+
+    for (date_from, date_to), (source, expected) in plain.items():
+        assert source == "fact_sales"
+        pruned, actual = partitioned[(date_from, date_to)]
+        pd.testing.assert_frame_equal(actual, expected, obj=f"{date_from}-{date_to}")
+
+        # Only the partitions of the months in range are read
+        named = {m for m in (202401, 202402, 202403) if f"fact_sales_p{m}" in pruned}
+        wanted = {m for m in (202401, 202402, 202403)
+                  if (date_from is None or m >= date_from // 100) and (date_to is None or m <= date_to // 100)}
+        assert named == (wanted or {202401}), pruned
+    assert len(plain[(None, None)][1]) > 0 and len(plain[RANGES[-1]][1]) == 0
+
+
+def test_fact_source_prunes_to_an_empty_source(tmp_path):
+    with get_backend("sqlite", path=tmp_path / "pruning.db") as db:
+        assert fact_source(db) == "fact_sales"
+        db.execute("CREATE TABLE fact_sales_p202401 (date_id INTEGER)")
+        db.execute("CREATE TABLE fact_sales_p202403 (date_id INTEGER)")
+        assert fact_source(db, date_key("2024-03-02")) == "fact_sales_p202403"
+        assert fact_source(db, date_key("2024-02-01"), date_key("2024-02-29")) == "(SELECT * FROM fact_sales_p202401 WHERE 0)"
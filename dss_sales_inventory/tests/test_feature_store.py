@@ -0,0 +1,76 @@
+# dss_sales_inventory/tests/test_feature_store.py
+"""Product offsets, lookups and versioned snapshots of features.feature_store."""
+import numpy as np
+import pandas as pd
+import pytest
+
+import features.feature_store as store_module
+from features.feature_store import FeatureStore, list_versions, current_version
+
+
+@pytest.fixture
+def features_frame() -> pd.DataFrame:
+    """Unsorted rows of products 7, 2 and 5 (product 5 has a single day)."""
+    return pd.DataFrame({
+        "product_id": [7, 2, 7, 5, 2, 7, 2],
+        "date": pd.to_datetime([
+            "2024-01-03", "2024-01-02", "2024-01-01", "2024-01-05", "2024-01-01", "2024-01-02", "2024-01-03",
+        ]),
+        "stock_on_hand": [70, 22, 71, 50, 21, 72, 23],
+    })
+
+
+def assert_lookups(store: FeatureStore, frame: pd.DataFrame):
+    expected = frame.sort_values(["product_id", "date"]).reset_index(drop=True)
+    assert store.product_ids.tolist() == [2, 5, 7]
+    assert store.offsets.tolist() == [0, 3, 4, 7]
+    assert len(store) == len(frame)
+
+    for product_id in (2, 5, 7):
+        rows = store.get_product(product_id)
+        wanted = expected[expected["product_id"] == product_id]
+        pd.testing.assert_frame_equal(rows, wanted, check_dtype=False)
+        assert rows["date"].is_monotonic_increasing
+        assert product_id in store
+
+    for missing in (1, 3, 8):
+        assert missing not in store
+        assert store.get_product(missing).empty
+        assert list(store.get_product(missing).columns) == list(frame.columns)
+
+    blocks = list(store.iter_products())
+    assert [product_id for product_id, _ in blocks] == [2, 5, 7]
+    pd.testing.assert_frame_equal(pd.concat([rows for _, rows in blocks]), expected, check_dtype=False)
+
+
+def test_offsets_and_lookups_on_multi_product_store(features_frame, tmp_path):
+    store = FeatureStore(features_frame, version="run-1")
+    assert_lookups(store, features_frame)
+
+    # A saved snapshot reads back with the same offsets, without re-sorting
+    store.save(str(tmp_path))
+    assert_lookups(FeatureStore.load(store_dir=str(tmp_path)), features_frame)
+
+
+def test_save_keeps_the_newest_versions(features_frame, tmp_path, monkeypatch):
+    monkeypatch.setitem(store_module.FEATURE_STORE_CONFIG, "keep_versions", 2)
+    for run in range(1, 5):
+        FeatureStore(features_frame, version=f"run-{run}").save(str(tmp_path))
+
+    assert list_versions(str(tmp_path)) == ["run-3", "run-4"]
+    assert sorted(path.name for path in tmp_path.iterdir() if path.is_dir()) == ["run-3", "run-4"]
+    assert current_version(str(tmp_path)) == "run-4"
+    assert FeatureStore.load(store_dir=str(tmp_path)).version == "run-4"
+    with pytest.raises(FileNotFoundError):
+        FeatureStore.load("run-1", store_dir=str(tmp_path))
+
+    # A current version rolled back to an older snapshot survives pruning
+    FeatureStore(features_frame, version="run-5").save(str(tmp_path))
+    (tmp_path / "CURRENT").write_text("run-4")
+    assert store_module.prune_versions(str(tmp_path), keep=1) == []
+    assert list_versions(str(tmp_path)) == ["run-4", "run-5"]
+
+    monkeypatch.setitem(store_module.FEATURE_STORE_CONFIG, "keep_versions", None)
+    FeatureStore(features_frame, version="run-6").save(str(tmp_path))
+    assert list_versions(str(tmp_path)) == ["run-4", "run-5", "run-6"]
+    assert np.array_equal(FeatureStore.load(store_dir=str(tmp_path)).offsets, [0, 3, 4, 7])
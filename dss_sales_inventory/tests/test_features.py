@@ -0,0 +1,206 @@
+# dss_sales_inventory/tests/test_features.py
+"""Feature computations of features.features."""
+import numpy as np
+import pandas as pd
+import pytest
+
+import features.features as features_module
+from cleaning.cleaning import run_cleaning
+from features.features import compute_sales_revenue, compute_stock_ratio
+
+
+# Row-wise definitions the vectorized functions replaced (DataFrame.apply, axis=1)
+def rowwise_sales_revenue(sales_df: pd.DataFrame) -> pd.Series:
+    return sales_df.apply(
+        lambda x: x['revenue'] if 'revenue' in x and pd.notnull(x['revenue']) else x['quantity'] * x['unit_price'],
+        axis=1
+    )
+
+
+def rowwise_stock_ratio(inventory_features: pd.DataFrame) -> pd.Series:
+    return inventory_features.apply(
+        lambda x: x['stock_on_hand'] / max(x['daily_quantity_sold'], 1), axis=1
+    )
+
+
+def naive_rolling_features(inventory_features: pd.DataFrame, config: dict) -> pd.DataFrame:
+    """Per-product groupby-rolling over a daily calendar from the product's first date (gaps = 0)."""
+    frames = []
+    for product_id, rows in inventory_features.groupby("product_id"):
+        rows = rows.set_index("date")
+        calendar = pd.date_range(rows.index.min(), rows.index.max(), freq="D")
+        demand = rows[config["measure"]].reindex(calendar, fill_value=0.0)
+        elapsed = pd.Series(np.arange(1, len(calendar) + 1), index=calendar)
+
+        daily = pd.DataFrame(index=calendar)
+        for window in sorted(set(config["windows"]) | {config["cover_window"]}):
+            window_sum = demand.rolling(window, min_periods=1).sum()
+            daily[f"demand_sum_{window}d"] = window_sum
+            daily[f"demand_mean_{window}d"] = window_sum / elapsed.clip(upper=window)
+        last_sale = pd.Series(calendar.where(demand > 0), index=calendar).ffill()
+        daily["days_since_last_sale"] = (calendar - last_sale).dt.days
+
+        daily = daily.loc[rows.index]
+        cover_mean = daily[f"demand_mean_{config['cover_window']}d"]
+        daily["days_of_cover"] = (rows["stock_on_hand"] / cover_mean).where(cover_mean > 0)
+        frames.append(daily.assign(product_id=product_id, date=rows.index, index=rows["index"]))
+    return pd.concat(frames).set_index("index").sort_index()
+
+
+def test_compute_sales_revenue_matches_rowwise():
+    sales = pd.DataFrame({
+        'quantity': [2, 3, 0, 1, 4],
+        'unit_price': [10.0, 2.5, 8.0, 4.0, 1.25],
+        'revenue': [20.0, np.nan, np.nan, 3.5, 0.0],
+    })
+    expected = rowwise_sales_revenue(sales)
+    pd.testing.assert_series_equal(compute_sales_revenue(sales), expected, check_names=False)
+    assert compute_sales_revenue(sales).tolist() == [20.0, 7.5, 0.0, 3.5, 0.0]
+
+    # Feeds without a revenue column fall back to quantity * unit_price on every row
+    no_revenue = sales.drop(columns='revenue')
+    pd.testing.assert_series_equal(
+        compute_sales_revenue(no_revenue), rowwise_sales_revenue(no_revenue), check_names=False
+    )
+
+
+def test_compute_stock_ratio_matches_rowwise():
+    inventory = pd.DataFrame({
+        'stock_on_hand': [120, 50, 0, 75, 9],
+        'daily_quantity_sold': [0.0, 0.5, 3.0, 1.0, 4.0],
+    })
+    expected = rowwise_stock_ratio(inventory)
+    pd.testing.assert_series_equal(compute_stock_ratio(inventory), expected, check_names=False)
+    # Zero and fractional sales divide by 1
+    assert compute_stock_ratio(inventory).tolist()[:2] == [120.0, 50.0]
+
+
+def test_run_features_leaves_input_unchanged(raw_data, workspace):
+    cleaned = run_cleaning(raw_data, "no-mutation")
+    before = {name: frame.copy(deep=True) for name, frame in cleaned.items()}
+
+    features = features_module.run_features(cleaned, "no-mutation")
+
+    assert 'stock_ratio' in features['inventory'].columns
+    for name, frame in cleaned.items():
+        pd.testing.assert_frame_equal(frame, before[name])
+
+
+def test_exact_clip_builds_no_sketch(raw_data, workspace, monkeypatch):
+    def no_sketch(*args, **kwargs):
+        raise AssertionError("sketch built in exact mode")
+
+    monkeypatch.setattr(features_module, "build_stock_ratio_sketch", no_sketch)
+    cleaned = run_cleaning(raw_data, "exact")
+    features_module.run_features(cleaned, "exact")
+
+    upper_limit, sketch = features_module.load_stock_ratio_clip(str(workspace / "processed"))
+    daily_sales = features_module.aggregate_daily_sales(cleaned["sales"])
+    stock_ratio = features_module.join_inventory_sales(cleaned["inventory"], daily_sales)["stock_ratio"]
+    q1, q3 = stock_ratio.quantile([0.25, 0.75])
+    assert sketch is None
+    assert np.isclose(upper_limit, q3 + 1.5 * (q3 - q1))
+
+
+@pytest.mark.parametrize("clip_method", ["exact", "sketch"])
+def test_incremental_refresh_matches_full_run(raw_data, workspace, monkeypatch, clip_method):
+    monkeypatch.setitem(features_module.STOCK_RATIO_CLIP_CONFIG, "method", clip_method)
+    processed = workspace / "processed"
+    sales, inventory = raw_data["sales"], raw_data["inventory"]
+
+    # Product 4 has no stock rows on Feb 1-12 and sells on Jan 5, Jan 20, Feb 11 (a day without
+    # a stock row), Mar 12 and Mar 25. Its refreshed rows from Mar 11 carry the Jan 20 sale,
+    # found in the January partition, which the refresh reads back but does not rewrite
+    sale_dates = pd.to_datetime(["2024-01-05", "2024-01-20", "2024-02-11", "2024-03-12", "2024-03-25"])
+    product_4 = pd.DataFrame({
+        "sale_id": sales["sale_id"].max() + np.arange(1, len(sale_dates) + 1), "product_id": 4, "date": sale_dates,
+        "quantity": 2, "unit_price": 21.0, "revenue": 42.0, "region": "NORTH",
+    })
+    sales = pd.concat([sales[sales["product_id"] != 4], product_4], ignore_index=True)
+    inventory = inventory[~((inventory["product_id"] == 4) & inventory["date"].between("2024-02-01", "2024-02-12"))]
+    raw_data = {"sales": sales, "inventory": inventory}
+    expected = features_module.run_features(run_cleaning(raw_data, "full"), "full")
+
+    # Base: everything before 2024-03-11, minus some March sales that arrive late with the delta
+    cutoff = pd.Timestamp("2024-03-11")
+    late = (sales["date"] >= pd.Timestamp("2024-03-01")) & (sales["date"] < cutoff) & (sales["sale_id"] % 3 == 0)
+    base = {"sales": sales[(sales["date"] < cutoff) & ~late], "inventory": inventory[inventory["date"] < cutoff]}
+    features_module.run_features(run_cleaning(base, "base"), "base")
+
+    january = processed / features_module.INVENTORY_FEATURES_DIR / "year=2024" / "month=01"
+    january_files = {path.name: path.stat().st_mtime_ns for path in january.iterdir()}
+
+    delta = run_cleaning(raw_data, "delta", incremental=True)
+    assert len(delta["sales"]) == (sales["date"] >= cutoff).sum() + late.sum()
+    refreshed = features_module.run_features_incremental(delta, "delta", processed_dir=str(processed))
+
+    stored = features_module.load_features(str(processed))
+    for name, keys in [("sales", features_module.SALES_FEATURE_KEYS), ("inventory", features_module.FEATURE_KEYS)]:
+        actual = stored[name].sort_values(keys).reset_index(drop=True)
+        wanted = expected[name].sort_values(keys).reset_index(drop=True)
+        pd.testing.assert_frame_equal(actual[wanted.columns], wanted, check_dtype=False)
+
+    # Only the months holding touched keys (March and the rows after it) were rewritten
+    assert {path.name: path.stat().st_mtime_ns for path in january.iterdir()} == january_files
+    assert refreshed["inventory_delta"]["date"].min() == pd.Timestamp("2024-03-01")
+    carried = expected["inventory"].set_index(["product_id", "date"]).loc[(4, pd.Timestamp("2024-03-11"))]
+    assert carried["days_since_last_sale"] == 51
+
+
+@pytest.mark.parametrize("drop", [[], ["revenue"], ["region"]], ids=["full-feed", "no-revenue", "no-region"])
+def test_sqlite_backend_matches_pandas(raw_data, workspace, drop):
+    raw = {"sales": raw_data["sales"].drop(columns=drop), "inventory": raw_data["inventory"]}
+    cleaned = run_cleaning(raw, "backends")
+
+    expected = features_module.run_features(cleaned, "backends")
+    pushed_down = features_module.run_features(cleaned, "backends", backend="sqlite")
+
+    for name, keys in [("sales", features_module.SALES_FEATURE_KEYS), ("inventory", features_module.FEATURE_KEYS)]:
+        actual = pushed_down[name].sort_values(keys).reset_index(drop=True)
+        wanted = expected[name].sort_values(keys).reset_index(drop=True)
+        pd.testing.assert_frame_equal(actual, wanted, check_dtype=False)
+
+
+@pytest.mark.parametrize("since", [None, "2024-02-20"], ids=["full-history", "carried-slice"])
+def test_rolling_features_match_naive_groupby_rolling(since):
+    rng = np.random.default_rng(3)
+    dates = pd.date_range("2024-01-01", "2024-03-31", freq="D")
+    frame = pd.DataFrame({
+        "product_id": np.repeat([907, 12, 45, 3], len(dates)),
+        "date": np.tile(dates, 4),
+        "stock_on_hand": rng.integers(0, 200, 4 * len(dates)),
+        "daily_quantity_sold": rng.integers(0, 6, 4 * len(dates)) * (rng.random(4 * len(dates)) < 0.3),
+    }).astype({"daily_quantity_sold": "float64"})
+    # Calendar gaps (count as zero demand), a product starting late, one that never sells,
+    # and a product whose only sale is long before the carried slice
+    frame = frame[rng.random(len(frame)) > 0.2]
+    frame = frame[~((frame["product_id"] == 12) & (frame["date"] < "2024-02-03"))]
+    frame.loc[frame["product_id"] == 45, "daily_quantity_sold"] = 0.0
+    frame.loc[(frame["product_id"] == 3) & (frame["date"] > "2024-01-10"), "daily_quantity_sold"] = 0.0
+    frame = frame.sample(frac=1, random_state=1).reset_index(drop=True)
+
+    config = features_module.ROLLING_FEATURE_CONFIG
+    expected = naive_rolling_features(frame.reset_index(), config)
+    columns = [f"demand_{agg}_{w}d" for w in config["windows"] for agg in config["aggregations"]]
+    columns += ["days_of_cover", "days_since_last_sale"]
+
+    if since is None:
+        actual = features_module.compute_rolling_features(frame)
+        rows = frame.index
+    else:
+        # Recompute only rows from `since` with cover_window - 1 days of context, carrying the
+        # first date and the last sale before the context (as run_features_incremental does)
+        since = pd.Timestamp(since)
+        context_start = since - pd.Timedelta(days=config["cover_window"] - 1)
+        head = frame[frame["date"] < context_start]
+        carry = pd.DataFrame({
+            "first_date": frame.groupby("product_id")["date"].min(),
+            "last_sale_date": head[head["daily_quantity_sold"] > 0].groupby("product_id")["date"].max(),
+        })
+        actual = features_module.compute_rolling_features(frame[frame["date"] >= context_start], carry=carry)
+        rows = frame.index[frame["date"] >= since]
+        assert expected.loc[rows[frame.loc[rows, "product_id"] == 3], "days_since_last_sale"].notna().all()
+
+    pd.testing.assert_frame_equal(
+        actual.loc[rows, columns], expected.loc[rows, columns], check_dtype=False, check_names=False
+    )
@@ -0,0 +1,167 @@
+# dss_sales_inventory/tests/test_incremental_star.py
+"""Incremental star-schema loads (upsert_to_sqlite) against a full rebuild of the same data."""
+import sqlite3
+from contextlib import closing
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import data_model.build_star_schema as star_module
+import features.features as features_module
+from cleaning.cleaning import run_cleaning
+from data_model.aggregate_navigator import AGGREGATES
+
+CUTOFF = pd.Timestamp("2024-03-11")
+
+# Star tables with their surrogate keys resolved to business values (region name, version start)
+RESOLVED_QUERIES = {
+    "dim_region": "SELECT region_name FROM dim_region ORDER BY region_name",
+    "dim_date": "SELECT * FROM dim_date ORDER BY date_id",
+    "dim_product": """
+        SELECT product_id, valid_from, valid_to, is_current, unit_cost, unit_price
+        FROM dim_product ORDER BY product_id, valid_from
+    """,
+    "fact_sales": """
+        SELECT f.product_id, f.date_id, r.region_name, p.valid_from, f.quantity, f.revenue, f.cost
+        FROM fact_sales f
+        JOIN dim_region r ON r.region_id = f.region_id
+        JOIN dim_product p ON p.product_key = f.product_key
+        ORDER BY f.product_id, f.date_id, r.region_name
+    """,
+    "fact_inventory_snapshot": """
+        SELECT p.valid_from, s.*
+        FROM fact_inventory_snapshot s
+        JOIN dim_product p ON p.product_key = s.product_key
+        ORDER BY s.product_id, s.date_id
+    """,
+}
+
+
+def read_resolved(db_path) -> dict:
+    with closing(sqlite3.connect(db_path)) as conn:
+        return {
+            name: pd.read_sql_query(sql, conn).drop(columns=["product_key"], errors="ignore")
+            for name, sql in RESOLVED_QUERIES.items()
+        }
+
+
+def read_aggregates(db_path) -> dict:
+    with closing(sqlite3.connect(db_path)) as conn:
+        return {
+            spec["table"]: pd.read_sql_query(
+                f"SELECT * FROM {spec['table']} ORDER BY {', '.join(spec['grain'])}", conn
+            )
+            for spec in AGGREGATES
+        }
+
+
+def read_keys(db_path) -> dict:
+    with closing(sqlite3.connect(db_path)) as conn:
+        regions = dict(conn.execute("SELECT region_name, region_id FROM dim_region").fetchall())
+        versions = {
+            (product_id, valid_from): key
+            for key, product_id, valid_from in conn.execute("SELECT product_key, product_id, valid_from FROM dim_product")
+        }
+    return {"regions": regions, "versions": versions}
+
+
+@pytest.fixture
+def evolving_data(raw_data) -> dict:
+    """
+    raw_data plus changes that only arrive after CUTOFF: a new region (EAST), a new product (5),
+    a unit_cost change of product 2 (new SCD2 version) and late March sales that update fact
+    rows loaded by the base run. Product 3 already changes its cost in February (base history).
+    """
+    sales, inventory = raw_data["sales"].copy(), raw_data["inventory"].copy()
+    inventory.loc[(inventory["product_id"] == 3) & (inventory["date"] >= "2024-02-10"), "unit_cost"] = 15.0
+    inventory.loc[(inventory["product_id"] == 2) & (inventory["date"] >= "2024-03-20"), "unit_cost"] = 14.0
+
+    new_dates = pd.date_range(CUTOFF, "2024-03-31", freq="D")
+    product_5 = pd.DataFrame({
+        "product_id": 5, "date": new_dates, "stock_on_hand": 80, "reorder_point": 40,
+        "lead_time_days": 5, "unit_cost": 20.0,
+    })
+    inventory = pd.concat([inventory, product_5], ignore_index=True)
+
+    next_id = sales["sale_id"].max() + 1
+    extra = pd.DataFrame({
+        "sale_id": np.arange(next_id, next_id + 6),
+        "product_id": [5, 5, 5, 1, 1, 2],
+        "date": pd.to_datetime(["2024-03-12", "2024-03-15", "2024-03-30", "2024-03-13", "2024-03-21", "2024-03-25"]),
+        "quantity": [3, 1, 2, 4, 2, 5],
+        "unit_price": [30.0, 30.0, 30.0, 16.5, 16.5, 18.0],
+        "region": ["NORTH", "SOUTH", "EAST", "EAST", "EAST", "SOUTH"],
+    })
+    extra["revenue"] = extra["quantity"] * extra["unit_price"]
+
+    # A second March sale on the grain (product, date, region) of a sale the base run loads;
+    # its sale_id is a multiple of 3, so it arrives late and the fact row is updated in place
+    on_time = sales[(sales["date"] >= "2024-03-01") & (sales["date"] < CUTOFF) & (sales["sale_id"] % 3 != 0)]
+    repeat_sale = on_time.iloc[[0]].assign(sale_id=(next_id + 6) // 3 * 3 + 3, quantity=7)
+    repeat_sale["revenue"] = repeat_sale["quantity"] * repeat_sale["unit_price"]
+    sales = pd.concat([sales, extra[sales.columns], repeat_sale], ignore_index=True)
+    return {"sales": sales, "inventory": inventory}
+
+
+def load_incrementally(evolving_data, workspace) -> dict:
+    """Base run on the rows before CUTOFF (minus late March sales), then one incremental run."""
+    sales, inventory = evolving_data["sales"], evolving_data["inventory"]
+    late = (sales["date"] >= pd.Timestamp("2024-03-01")) & (sales["date"] < CUTOFF) & (sales["sale_id"] % 3 == 0)
+    base = {"sales": sales[(sales["date"] < CUTOFF) & ~late], "inventory": inventory[inventory["date"] < CUTOFF]}
+    star_module.main(features_module.run_features(run_cleaning(base, "base"), "base"), "base")
+    base_keys = read_keys(workspace / "analytics.db")
+
+    processed = str(workspace / "processed")
+    delta = features_module.run_features_incremental(
+        run_cleaning(evolving_data, "delta", incremental=True), "delta", processed_dir=processed
+    )
+    star_module.main({**features_module.load_features(processed), **delta}, "delta", incremental=True)
+    return base_keys
+
+
+def rebuild(evolving_data, workspace):
+    for path in (workspace / "processed").rglob("*"):
+        if path.is_file():
+            path.unlink()
+    star_module.main(features_module.run_features(run_cleaning(evolving_data, "full"), "full"), "full")
+
+
+def test_delta_upsert_matches_full_rebuild(evolving_data, workspace, monkeypatch):
+    monkeypatch.setitem(star_module.PARQUET_EXPORT_CONFIG, "enabled", False)
+    db_path = workspace / "analytics.db"
+
+    base_keys = load_incrementally(evolving_data, workspace)
+    incremental = read_resolved(db_path)
+    keys = read_keys(db_path)
+
+    # Stored region ids and product keys survive the delta; new ones are numbered after them
+    assert {name: keys["regions"][name] for name in base_keys["regions"]} == base_keys["regions"]
+    assert keys["regions"]["EAST"] == max(base_keys["regions"].values()) + 1
+    assert {version: keys["versions"][version] for version in base_keys["versions"]} == base_keys["versions"]
+    appended = sorted(version for version in keys["versions"] if version not in base_keys["versions"])
+    assert appended == [(2, 20240320), (5, 20240311)]
+    assert min(keys["versions"][v] for v in appended) == max(base_keys["versions"].values()) + 1
+
+    rebuild(evolving_data, workspace)
+    full = read_resolved(db_path)
+    for name, expected in full.items():
+        pd.testing.assert_frame_equal(incremental[name], expected, check_dtype=False, obj=name)
+
+
+@pytest.mark.parametrize("partitioned", [False, True])
+def test_aggregates_refreshed_by_the_delta_match_full_rebuild(evolving_data, workspace, monkeypatch, partitioned):
+    monkeypatch.setitem(star_module.PARQUET_EXPORT_CONFIG, "enabled", False)
+    monkeypatch.setitem(star_module.FACT_PARTITION_CONFIG, "enabled", partitioned)
+    db_path = workspace / "analytics.db"
+
+    load_incrementally(evolving_data, workspace)
+    incremental = read_aggregates(db_path)
+    with closing(sqlite3.connect(db_path)) as conn:
+        assert (conn.execute("SELECT type FROM sqlite_master WHERE name = 'fact_sales'").fetchone()[0] == "view") == partitioned
+
+    rebuild(evolving_data, workspace)
+    full = read_aggregates(db_path)
+    for name, expected in full.items():
+        assert len(expected) > 0, name
+        pd.testing.assert_frame_equal(incremental[name], expected, check_dtype=False, obj=name)
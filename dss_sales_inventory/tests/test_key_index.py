@@ -0,0 +1,66 @@
+# dss_sales_inventory/tests/test_key_index.py
+"""Persistent dedup key index of the cleaning stage (cleaning.key_index)."""
+import numpy as np
+import pandas as pd
+
+import cleaning.key_index as key_index_module
+from cleaning.key_index import (
+    append_keys,
+    encode_inventory_keys,
+    encode_sales_keys,
+    find_indexed_products,
+    find_seen_keys,
+    load_key_index,
+    rebuild_key_index,
+)
+
+
+def test_inventory_keys_sort_by_product_then_date_at_the_boundaries():
+    # Dates before 1970 and far in the future, and product ids up to the 31-bit limit
+    frame = pd.DataFrame({
+        "product_id": [2, 1, 2, 2**31 - 1, 1, 0],
+        "date": pd.to_datetime(["1900-01-01", "2200-12-31", "1969-12-31", "2024-02-29", "1970-01-01", "2024-01-01"]),
+    })
+    keys = encode_inventory_keys(frame)
+
+    assert keys.dtype == np.int64
+    assert len(np.unique(keys)) == len(frame)
+    expected_order = frame.sort_values(["product_id", "date"]).index.to_numpy()
+    assert np.array_equal(np.argsort(keys, kind="stable"), expected_order)
+    # The product is the high 32 bits, whatever the date
+    assert np.array_equal(keys >> 32, frame["product_id"].to_numpy())
+
+    index = np.sort(keys)
+    found = find_indexed_products([0, 1, 2, 3, 2**31 - 1, 2**31 - 2], index)
+    assert found.tolist() == [True, True, True, False, True, False]
+    assert encode_sales_keys(pd.DataFrame({"sale_id": [5, 3]})).tolist() == [5, 3]
+
+
+def test_append_keys_merges_block_by_block(tmp_path, monkeypatch):
+    monkeypatch.setattr(key_index_module, "MERGE_BLOCK_SIZE", 3)
+    path = str(tmp_path / "key_index" / "keys.npy")
+    existing = np.array([10, 20, 30, 40, 50, 60, 70], dtype="int64")
+    assert rebuild_key_index(path, existing[::-1]) == len(existing)
+
+    # New keys before, between and after the stored ones, unsorted and repeated
+    new_keys = np.array([75, 5, 35, 36, 5, 65, 11], dtype="int64")
+    assert append_keys(path, new_keys) == len(existing) + 6
+
+    merged = load_key_index(path)
+    assert isinstance(merged, np.memmap)
+    assert np.array_equal(merged, np.union1d(existing, new_keys))
+    assert not (tmp_path / "key_index" / "keys.npy.tmp").exists()
+
+    # Nothing new leaves the index as it is; a missing index is created from the batch
+    assert append_keys(path, np.empty(0, dtype="int64")) == 13
+    assert append_keys(str(tmp_path / "key_index" / "new.npy"), np.array([3, 1, 3])) == 2
+    assert load_key_index(str(tmp_path / "key_index" / "new.npy")).tolist() == [1, 3]
+
+
+def test_find_seen_keys_against_the_stored_index(tmp_path):
+    path = str(tmp_path / "keys.npy")
+    assert find_seen_keys(np.array([1, 2]), load_key_index(path)).tolist() == [False, False]
+
+    rebuild_key_index(path, np.array([4, 8, 15, 16, 23, 42]))
+    probes = np.array([1, 4, 5, 42, 43, 16])
+    assert find_seen_keys(probes, load_key_index(path)).tolist() == [False, True, False, True, False, True]
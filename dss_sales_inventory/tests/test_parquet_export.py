@@ -0,0 +1,59 @@
+# dss_sales_inventory/tests/test_parquet_export.py
+"""Parquet export of the star schema (PARQUET_EXPORT_CONFIG, on by default) against analytics.db."""
+import os
+import sqlite3
+from contextlib import closing
+
+import pandas as pd
+import pytest
+
+import data_model.build_star_schema as star_module
+import features.features as features_module
+from cleaning.cleaning import run_cleaning
+from data_model.aggregate_navigator import AGGREGATES
+from data_model.fact_partitions import date_key
+
+pytest.importorskip("pyarrow")
+from data_model.parquet_export import month_partition_path, read_star_table  # noqa: E402
+
+TABLES = star_module.LOAD_ORDER + [spec["table"] for spec in AGGREGATES]
+CUTOFF = pd.Timestamp("2024-03-11")
+
+
+def sorted_rows(frame) -> pd.DataFrame:
+    return frame.sort_values(list(frame.columns), ignore_index=True)
+
+
+def assert_export_matches_db(workspace):
+    export_dir = str(workspace / "star_parquet")
+    with closing(sqlite3.connect(workspace / "analytics.db")) as conn:
+        for table in TABLES:
+            expected = sorted_rows(pd.read_sql_query(f"SELECT * FROM {table}", conn))
+            actual = sorted_rows(read_star_table(table, export_dir=export_dir))
+            assert len(expected) > 0, table
+            pd.testing.assert_frame_equal(actual, expected, check_dtype=False, obj=table)
+
+
+def test_export_follows_full_and_incremental_loads(raw_data, workspace):
+    assert star_module.PARQUET_EXPORT_CONFIG["enabled"]
+    export_dir = str(workspace / "star_parquet")
+    sales, inventory = raw_data["sales"], raw_data["inventory"]
+    base = {"sales": sales[sales["date"] < CUTOFF], "inventory": inventory[inventory["date"] < CUTOFF]}
+    star_module.main(features_module.run_features(run_cleaning(base, "base"), "base"), "base")
+    assert_export_matches_db(workspace)
+    january = month_partition_path(export_dir, "fact_sales", 202401)
+    january_written = os.stat(january).st_mtime_ns
+
+    # The delta rewrites the months it touches (March) and leaves the others as exported
+    processed = str(workspace / "processed")
+    delta = features_module.run_features_incremental(
+        run_cleaning(raw_data, "delta", incremental=True), "delta", processed_dir=processed
+    )
+    star_module.main({**features_module.load_features(processed), **delta}, "delta", incremental=True)
+    assert_export_matches_db(workspace)
+    assert os.stat(january).st_mtime_ns == january_written
+
+    # Date-range reads prune to the requested days
+    march = read_star_table("fact_sales", ["date_id", "quantity"], date_from=date_key(CUTOFF),
+                            date_to=date_key("2024-03-31"), export_dir=export_dir)
+    assert len(march) > 0 and march["date_id"].between(date_key(CUTOFF), date_key("2024-03-31")).all()
@@ -0,0 +1,114 @@
+# dss_sales_inventory/tests/test_partitioned_cleaning.py
+"""Out-of-core cleaning by month partition (run_partitioned_cleaning) against run_cleaning."""
+import pandas as pd
+import pytest
+
+from cleaning.cleaning import _check_partition_gaps, run_cleaning, run_partitioned_cleaning
+from cleaning.partitions import prune_partitions, read_partitions
+
+KEYS = {"sales": ["sale_id"], "inventory": ["product_id", "date"]}
+
+
+@pytest.fixture
+def dirty_data(raw_data) -> dict:
+    """raw_data with a duplicate sale in the same month and one repeated in a later month."""
+    sales = raw_data["sales"]
+    january = sales[sales["date"] < "2024-02-01"].iloc[[0, 1]]
+    repeated = january.assign(date=pd.Timestamp("2024-03-05"), quantity=99)
+    return {"sales": pd.concat([sales, january, repeated], ignore_index=True), "inventory": raw_data["inventory"]}
+
+
+@pytest.mark.parametrize("source", ["frame", "csv"])
+def test_partitions_match_run_cleaning(dirty_data, workspace, tmp_path, source):
+    expected = run_cleaning(dirty_data, "plain")
+
+    data = dirty_data
+    if source == "csv":
+        # CSV sources are streamed in small chunks and staged per month
+        data = {}
+        for name, frame in dirty_data.items():
+            path = tmp_path / f"raw_{name}.csv"
+            frame.to_csv(path, index=False)
+            data[name] = str(path)
+    result = run_partitioned_cleaning(data, "partitioned", chunksize=97)
+
+    for name, keys in KEYS.items():
+        stats = result[f"{name}_partitions"]
+        wanted = expected[name].sort_values(keys).reset_index(drop=True)
+        actual = read_partitions(result[name]).sort_values(keys).reset_index(drop=True)
+        pd.testing.assert_frame_equal(actual[wanted.columns], wanted, check_dtype=False)
+
+        # One statistics entry per month, consistent with the cleaned rows
+        months = wanted.groupby(wanted["date"].dt.to_period("M"))
+        assert [entry["partition"] for entry in stats] == [
+            f"year={period.year}/month={period.month:02d}" for period in months.groups
+        ]
+        for entry, (_, rows) in zip(stats, months):
+            assert entry["rows"] == len(rows)
+            assert entry["min_date"] == rows["date"].min().strftime("%Y-%m-%d")
+            assert entry["max_date"] == rows["date"].max().strftime("%Y-%m-%d")
+            assert entry["columns"]["product_id"]["max"] == rows["product_id"].max()
+        assert sum(entry["rows"] for entry in stats) == len(wanted)
+
+    # The repeated sale keeps its first (January) occurrence
+    sales = read_partitions(result["sales"])
+    assert not (sales["quantity"] == 99).any()
+
+
+def test_prune_partitions_by_date_range(raw_data, workspace):
+    dataset_dir = run_partitioned_cleaning(raw_data, "prune")["inventory"]
+
+    def months(start=None, end=None):
+        return [entry["partition"] for entry in prune_partitions(dataset_dir, start, end)]
+
+    assert months() == ["year=2024/month=01", "year=2024/month=02", "year=2024/month=03"]
+    assert months("2024-02-10", "2024-02-20") == ["year=2024/month=02"]
+    assert months("2024-01-31", "2024-02-01") == ["year=2024/month=01", "year=2024/month=02"]
+    assert months(start="2024-03-01") == ["year=2024/month=03"]
+    assert months(end="2023-12-31") == [] and months(start="2024-04-01") == []
+
+    trimmed = read_partitions(dataset_dir, "2024-02-10", "2024-02-20")
+    assert trimmed["date"].min() == pd.Timestamp("2024-02-10")
+    assert trimmed["date"].max() == pd.Timestamp("2024-02-20")
+
+
+def test_gap_across_partition_boundary_is_rejected(raw_data, workspace):
+    inventory = raw_data["inventory"]
+    # Product 2 has no stock rows from Jan 20 to Feb 24: no month holds a 31-day gap on its own
+    gapped = inventory[~((inventory["product_id"] == 2) & inventory["date"].between("2024-01-20", "2024-02-24"))]
+    data = {"sales": raw_data["sales"][raw_data["sales"]["product_id"] != 2], "inventory": gapped}
+
+    with pytest.raises(ValueError, match="Gap >30 days for product_id 2 in inventory"):
+        run_cleaning(data, "plain")
+    with pytest.raises(ValueError, match="Gap >30 days for product_id 2 in inventory"):
+        run_partitioned_cleaning(data, "partitioned")
+
+
+def test_check_partition_gaps_carries_the_last_date():
+    last_dates = pd.Series(pd.to_datetime(["2024-01-31", "2024-01-10"]), index=[1, 2])
+    february = pd.DataFrame({
+        "product_id": [1, 1, 3],
+        "date": pd.to_datetime(["2024-02-02", "2024-02-20", "2024-02-05"]),
+    })
+    updated = _check_partition_gaps(february, "inventory", last_dates)
+    assert updated.sort_index().to_dict() == {
+        1: pd.Timestamp("2024-02-20"), 2: pd.Timestamp("2024-01-10"), 3: pd.Timestamp("2024-02-05")
+    }
+
+    march = pd.DataFrame({"product_id": [2], "date": pd.to_datetime(["2024-03-01"])})
+    with pytest.raises(ValueError, match="product_id 2"):
+        _check_partition_gaps(march, "inventory", updated)
+
+
+def test_replaces_only_a_partitioned_dataset(raw_data, workspace):
+    run_partitioned_cleaning(raw_data, "first")
+    run_partitioned_cleaning(raw_data, "second")
+
+    foreign = workspace / "processed" / "inventory_cleaned"
+    for path in sorted(foreign.rglob("*"), reverse=True):
+        path.unlink() if path.is_file() else path.rmdir()
+    (foreign / "notes.txt").write_text("not a partition")
+    with pytest.raises(ValueError, match="not a partitioned dataset"):
+        run_partitioned_cleaning(raw_data, "third")
+    assert (foreign / "notes.txt").exists()
+    assert (workspace / "processed" / "sales_cleaned" / "_partition_stats.json").exists()
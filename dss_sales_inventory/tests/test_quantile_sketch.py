@@ -0,0 +1,57 @@
+# dss_sales_inventory/tests/test_quantile_sketch.py
+"""Rank-error bound and merging of the KLL quantile sketch (features.quantile_sketch)."""
+import numpy as np
+
+from features.quantile_sketch import KLLSketch
+
+RANK_ERROR = 0.01
+PROBABILITIES = np.linspace(0.01, 0.99, 99)
+
+
+def rank_errors(sketch: KLLSketch, values: np.ndarray) -> np.ndarray:
+    """|normalized rank of each sketch quantile - its probability| over PROBABILITIES."""
+    ordered = np.sort(values)
+    estimates = sketch.quantiles(PROBABILITIES)
+    low = np.searchsorted(ordered, estimates, side='left') / len(ordered)
+    high = np.searchsorted(ordered, estimates, side='right') / len(ordered)
+    # Ties: any rank the estimate occupies counts
+    return np.maximum(0, np.maximum(low - PROBABILITIES, PROBABILITIES - high))
+
+
+def test_sketch_quantiles_within_rank_error():
+    rng = np.random.default_rng(11)
+    values = np.concatenate([rng.lognormal(3, 1, 150_000), rng.integers(0, 50, 50_000).astype(float)])
+    rng.shuffle(values)
+
+    sketch = KLLSketch.from_error(RANK_ERROR, seed=42)
+    for start in range(0, len(values), 20_000):
+        sketch.update(values[start:start + 20_000])
+
+    assert sketch.n == len(values)
+    assert sketch.retained < len(values) / 50
+    assert rank_errors(sketch, values).max() <= RANK_ERROR
+    # Quartiles close to the exact ones; extremes are exact
+    exact = np.quantile(values, [0.25, 0.75])
+    assert np.allclose(sketch.quantiles([0.25, 0.75]), exact, rtol=0.05)
+    assert sketch.quantiles([0, 1]).tolist() == [values.min(), values.max()]
+
+
+def test_merged_sketches_match_one_pass():
+    rng = np.random.default_rng(5)
+    parts = [rng.normal(loc, 10, 40_000) for loc in (0, 25, 50, 75, 100)]
+    values = np.concatenate(parts)
+
+    merged = KLLSketch.from_error(RANK_ERROR, seed=1)
+    for seed, part in enumerate(parts, start=2):
+        merged.merge(KLLSketch.from_error(RANK_ERROR, seed=seed).update(part))
+
+    assert merged.n == len(values)
+    assert (merged.min, merged.max) == (values.min(), values.max())
+    assert rank_errors(merged, values).max() <= RANK_ERROR
+
+    # Persisted and restored (as run_features_incremental does), then merged further
+    restored = KLLSketch.from_dict(merged.to_dict(), seed=1)
+    assert np.array_equal(restored.quantiles(PROBABILITIES), merged.quantiles(PROBABILITIES))
+    extra = rng.normal(200, 10, 50_000)
+    restored.merge(KLLSketch.from_error(RANK_ERROR, seed=9).update(extra))
+    assert rank_errors(restored, np.concatenate([values, extra])).max() <= RANK_ERROR
@@ -0,0 +1,55 @@
+# dss_sales_inventory/tests/test_region_parallel.py
+"""Per-region fact builds and staging in worker processes (REGION_PARALLEL_CONFIG)."""
+import logging
+import sqlite3
+from contextlib import closing
+
+import pandas as pd
+import pytest
+
+import data_model.build_star_schema as star_module
+import features.features as features_module
+from cleaning.cleaning import run_cleaning
+from data_model.build_star_schema import region_groups
+
+
+def read_star(db_path) -> dict:
+    with closing(sqlite3.connect(db_path)) as conn:
+        return {
+            table: pd.read_sql_query(f"SELECT * FROM {table}", conn)
+            for table in star_module.LOAD_ORDER
+        }
+
+
+def test_region_groups_are_contiguous_and_balanced():
+    sizes = pd.Series([50, 10, 10, 30, 100], index=["A", "B", "C", "D", "E"])
+    assert region_groups(sizes, 1) == [["A", "B", "C", "D", "E"]]
+    assert region_groups(sizes, 2) == [["A", "B", "C", "D"], ["E"]]
+    assert region_groups(sizes, 3) == [["A", "B", "C"], ["D"], ["E"]]
+    # A first region above half the rows still leaves the second one its own worker
+    assert region_groups(pd.Series([72, 70], index=[1, 2]), 2) == [[1], [2]]
+    assert sum(region_groups(sizes, 8), []) == list(sizes.index)
+
+
+@pytest.mark.parametrize("partitioned", [False, True])
+def test_worker_processes_load_the_in_process_schema(raw_data, workspace, monkeypatch, caplog, partitioned):
+    monkeypatch.setitem(star_module.PARQUET_EXPORT_CONFIG, "enabled", False)
+    monkeypatch.setitem(star_module.FACT_PARTITION_CONFIG, "enabled", partitioned)
+    monkeypatch.setitem(star_module.REGION_PARALLEL_CONFIG, "min_rows", 0)
+    db_path = workspace / "analytics.db"
+    data = features_module.run_features(run_cleaning(raw_data, "regions"), "regions")
+
+    monkeypatch.setitem(star_module.REGION_PARALLEL_CONFIG, "workers", 1)
+    star_module.main(data, "in-process")
+    expected = read_star(db_path)
+
+    monkeypatch.setitem(star_module.REGION_PARALLEL_CONFIG, "workers", 2)
+    with caplog.at_level(logging.INFO):
+        star_module.main(data, "workers")
+    assert "Building Fact_Sales for 2 regions in 2 worker processes" in caplog.text
+    assert "regions in 2 worker processes" in caplog.text.split("Staged fact_sales", 1)[1]
+
+    actual = read_star(db_path)
+    for table, frame in expected.items():
+        assert len(frame) > 0, table
+        pd.testing.assert_frame_equal(actual[table], frame, obj=table)
@@ -0,0 +1,67 @@
+# dss_sales_inventory/tests/test_shadow_swap.py
+"""Publishing a full rebuild's shadow database into analytics.db (swap_shadow_into_place)."""
+import sqlite3
+from contextlib import closing
+
+import pandas as pd
+import pytest
+
+import data_model.build_star_schema as star_module
+import features.features as features_module
+from cleaning.cleaning import run_cleaning
+
+
+def table_names(conn) -> set:
+    return {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+
+
+@pytest.mark.parametrize("location", ["memory", "file"])
+def test_swap_replaces_star_objects_and_keeps_the_rest(raw_data, workspace, monkeypatch, location):
+    monkeypatch.setitem(star_module.SHADOW_BUILD_CONFIG, "location", location)
+    # The open reader defers the WAL checkpoint: do not wait the full timeout for it
+    monkeypatch.setitem(star_module.SHADOW_BUILD_CONFIG, "swap_timeout_s", 0.5)
+    monkeypatch.setitem(star_module.PARQUET_EXPORT_CONFIG, "enabled", False)
+    db_path = workspace / "analytics.db"
+
+    # First build: month-partitioned fact_sales, plus SQL-layer objects outside the star schema
+    monkeypatch.setitem(star_module.FACT_PARTITION_CONFIG, "enabled", True)
+    star_module.main(features_module.run_features(run_cleaning(raw_data, "first"), "first"), "first")
+    with closing(sqlite3.connect(db_path)) as conn:
+        conn.execute("CREATE TABLE sales_clean (sale_id INTEGER, region TEXT)")
+        conn.executemany("INSERT INTO sales_clean VALUES (?, ?)", [(1, "NORTH"), (2, "SOUTH")])
+        conn.execute("CREATE INDEX idx_sales_clean_region ON sales_clean (region)")
+        conn.execute("CREATE VIEW v_fact_rows AS SELECT COUNT(*) AS n FROM fact_sales")
+        conn.commit()
+        old_rows = conn.execute("SELECT COUNT(*) FROM fact_sales").fetchone()[0]
+        assert any(name.startswith("fact_sales_p") for name in table_names(conn))
+
+    # Second build: plain fact_sales from fewer sales, while a dashboard holds a read transaction
+    sales = raw_data["sales"]
+    second = {"sales": sales[sales["date"] < pd.Timestamp("2024-03-01")], "inventory": raw_data["inventory"]}
+    data = features_module.run_features(run_cleaning(second, "second"), "second")
+    monkeypatch.setitem(star_module.FACT_PARTITION_CONFIG, "enabled", False)
+    with closing(sqlite3.connect(db_path, isolation_level=None)) as reader:
+        reader.execute("BEGIN")
+        assert reader.execute("SELECT COUNT(*) FROM fact_sales").fetchone()[0] == old_rows
+        star_module.main(data, "second")
+        # The open snapshot still sees the previous schema; the next one sees the new build
+        assert reader.execute("SELECT COUNT(*) FROM fact_sales").fetchone()[0] == old_rows
+        reader.execute("COMMIT")
+        new_rows = reader.execute("SELECT COUNT(*) FROM fact_sales").fetchone()[0]
+
+    assert 0 < new_rows < old_rows
+    with closing(sqlite3.connect(db_path)) as conn:
+        tables = table_names(conn)
+        assert "fact_sales" in tables and not any(name.startswith("fact_sales_p") for name in tables)
+        assert conn.execute("SELECT type FROM sqlite_master WHERE name = 'fact_sales'").fetchone()[0] == "table"
+        assert conn.execute("SELECT sale_id, region FROM sales_clean ORDER BY sale_id").fetchall() == [
+            (1, "NORTH"), (2, "SOUTH")
+        ]
+        assert conn.execute("SELECT n FROM v_fact_rows").fetchone()[0] == new_rows
+        indexes = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+        assert {"idx_sales_clean_region", "idx_fact_date_cover"} <= indexes
+        assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+        assert conn.execute("PRAGMA integrity_check").fetchone()[0] == "ok"
+        assert conn.execute("PRAGMA foreign_key_check").fetchall() == []
+        assert conn.execute("SELECT MAX(date_id) FROM fact_sales").fetchone()[0] < 20240301
+    assert not list(workspace.glob("*.shadow.db"))
@@ -0,0 +1,46 @@
+# dss_sales_inventory/tests/test_sparse_features.py
+"""Pipeline stages from cleaning to the star schema with SPARSE_FEATURES_CONFIG enabled."""
+import sqlite3
+from contextlib import closing
+
+import numpy as np
+import pandas as pd
+
+import features.features as features_module
+import data_model.build_star_schema as star_module
+from cleaning.cleaning import run_cleaning
+from features.features import SPARSE_FEATURES_CONFIG, densify_measures, load_inventory_features
+from features.feature_store import FeatureStore, build_feature_store
+
+
+def test_pipeline_with_sparse_features(raw_data, workspace, monkeypatch):
+    monkeypatch.setitem(SPARSE_FEATURES_CONFIG, "enabled", True)
+
+    data = features_module.run_features(run_cleaning(raw_data, "sparse"), "sparse")
+    inventory = data["inventory"]
+    for col in SPARSE_FEATURES_CONFIG["columns"]:
+        assert isinstance(inventory[col].dtype, pd.SparseDtype)
+    dense = densify_measures(inventory)
+
+    # The versioned snapshot is written dense and reads back equal
+    store_dir = workspace / "feature_store"
+    build_feature_store(data, "sparse", store_dir=str(store_dir))
+    stored = FeatureStore.load(store_dir=str(store_dir)).frame
+    for col in SPARSE_FEATURES_CONFIG["columns"]:
+        assert not isinstance(stored[col].dtype, pd.SparseDtype)
+    expected = dense.sort_values(["product_id", "date"]).reset_index(drop=True)
+    pd.testing.assert_frame_equal(stored[expected.columns], expected, check_dtype=False)
+
+    # The feature partitions keep the zero runs out and restore them on load
+    restored = load_inventory_features(str(workspace / "processed" / features_module.INVENTORY_FEATURES_DIR))
+    restored = restored.sort_values(["product_id", "date"]).reset_index(drop=True)
+    assert np.allclose(densify_measures(restored)["daily_quantity_sold"], expected["daily_quantity_sold"])
+
+    star_module.main(data, "sparse")
+    with closing(sqlite3.connect(workspace / "analytics.db")) as conn:
+        loaded = conn.execute(
+            "SELECT COUNT(*), SUM(daily_quantity_sold), SUM(daily_revenue) FROM fact_inventory_snapshot"
+        ).fetchone()
+    assert loaded[0] == len(dense)
+    assert np.isclose(loaded[1], dense["daily_quantity_sold"].sum())
+    assert np.isclose(loaded[2], dense["daily_revenue"].sum())
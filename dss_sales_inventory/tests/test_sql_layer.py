@@ -0,0 +1,87 @@
+# dss_sales_inventory/tests/test_sql_layer.py
+"""SQL-layer reload skipping (_sql_layer_meta) across star schema rebuilds."""
+import pandas as pd
+import pytest
+
+import analysis.run_sql_layer as sql_layer_module
+import data_model.build_star_schema as star_module
+import features.features as features_module
+from cleaning.cleaning import run_cleaning
+from data_model.backends import get_backend
+
+VIEWS_SQL_FILE = sql_layer_module.PROJECT_ROOT / "analysis" / "sql" / "views.sql"
+
+
+def test_unchanged_sources_skip_reload_after_star_rebuild(raw_data, workspace):
+    data = features_module.run_features(run_cleaning(raw_data, "run-1"), "run-1")
+    star_module.main(data, "run-1")
+
+    db = get_backend("sqlite", path=workspace / "analytics.db")
+    try:
+        assert set(sql_layer_module.load_tables(db).values()) == {"replaced"}
+        sql_layer_module.run_sql_file(db, VIEWS_SQL_FILE)
+        views = set(db.query("SELECT name FROM sqlite_master WHERE type = 'view'")["name"])
+    finally:
+        db.close()
+
+    # The next run rebuilds the star schema from the same processed files
+    star_module.main(data, "run-2")
+
+    db = get_backend("sqlite", path=workspace / "analytics.db")
+    try:
+        actions = sql_layer_module.load_tables(db)
+        remaining = set(db.query("SELECT name FROM sqlite_master WHERE type = 'view'")["name"])
+    finally:
+        db.close()
+    assert actions == {table: "unchanged" for table in sql_layer_module.SQL_LAYER_SOURCES}
+    assert views and views <= remaining
+
+
+def stored_sales(db) -> pd.DataFrame:
+    return db.query("SELECT * FROM sales_clean ORDER BY sale_id").reset_index(drop=True)
+
+
+def csv_sales(workspace) -> pd.DataFrame:
+    return pd.read_csv(workspace / "processed" / "sales_cleaned.csv").sort_values("sale_id").reset_index(drop=True)
+
+
+@pytest.mark.parametrize("backend", ["sqlite", "duckdb"])
+def test_grown_csv_is_appended_and_rewritten_csv_replaced(raw_data, workspace, monkeypatch, backend):
+    if backend == "duckdb":
+        pytest.importorskip("duckdb")
+    sales, inventory = raw_data["sales"], raw_data["inventory"]
+    cutoff = pd.Timestamp("2024-03-01")
+    base = {"sales": sales[sales["date"] < cutoff], "inventory": inventory[inventory["date"] < cutoff]}
+    features_module.run_features(run_cleaning(base, "base"), "base")
+
+    db = get_backend(backend, path=workspace / f"analytics.{backend}")
+    try:
+        assert set(sql_layer_module.load_tables(db).values()) == {"replaced"}
+
+        # Incremental cleaning appends the new rows to sales_cleaned.csv
+        run_cleaning(raw_data, "delta", incremental=True)
+        actions = sql_layer_module.load_tables(db)
+        assert actions == {"sales_clean": "appended", "sales_features": "unchanged", "inventory_features": "unchanged"}
+        pd.testing.assert_frame_equal(stored_sales(db), csv_sales(workspace), check_dtype=False)
+
+        # A full run rewrites the CSV (other row order, one more sale): it grew, but not by appending
+        extra = sales.tail(1).assign(sale_id=sales["sale_id"].max() + 1)
+        run_cleaning({"sales": pd.concat([sales, extra]), "inventory": inventory}, "full")
+        assert sql_layer_module.load_tables(db)["sales_clean"] == "replaced"
+        pd.testing.assert_frame_equal(stored_sales(db), csv_sales(workspace), check_dtype=False)
+        loaded = stored_sales(db)
+        meta = sql_layer_module.read_meta(db)
+
+        # A replace is atomic with its fingerprint: a failure keeps the previous table and meta
+        run_cleaning(raw_data, "shrunk")
+
+        def failing_write_meta(*args):
+            raise RuntimeError("meta write failed")
+
+        monkeypatch.setattr(sql_layer_module, "write_meta", failing_write_meta)
+        with pytest.raises(RuntimeError, match="meta write failed"):
+            sql_layer_module.load_tables(db)
+        pd.testing.assert_frame_equal(stored_sales(db), loaded)
+        assert sql_layer_module.read_meta(db) == meta
+    finally:
+        db.close()
@@ -0,0 +1,65 @@
+# dss_sales_inventory/tests/test_sql_validation.py
+"""Set-based schema validation inside the load transaction (VALIDATION_CONFIG["mode"] = "sql")."""
+import logging
+import sqlite3
+from contextlib import closing
+
+import pandas as pd
+import pytest
+
+import data_model.build_star_schema as star_module
+import features.features as features_module
+from cleaning.cleaning import run_cleaning
+
+CUTOFF = pd.Timestamp("2024-03-01")
+
+
+def read_tables(db_path) -> dict:
+    with closing(sqlite3.connect(db_path)) as conn:
+        names = [row[0] for row in conn.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'table' AND name NOT LIKE 'sqlite_%' ORDER BY name"
+        )]
+        frames = {name: pd.read_sql_query(f"SELECT * FROM {name}", conn) for name in names}
+    return {name: frame.sort_values(list(frame.columns), ignore_index=True) for name, frame in frames.items()}
+
+
+@pytest.fixture
+def sql_validated_base(raw_data, workspace, monkeypatch):
+    """Full build in SQL validation mode of the rows before CUTOFF; returns the incremental input."""
+    monkeypatch.setitem(star_module.PARQUET_EXPORT_CONFIG, "enabled", False)
+    monkeypatch.setitem(star_module.VALIDATION_CONFIG, "mode", "sql")
+    base = {name: frame[frame["date"] < CUTOFF] for name, frame in raw_data.items()}
+    star_module.main(features_module.run_features(run_cleaning(base, "base"), "base"), "base")
+
+    processed = str(workspace / "processed")
+    delta = features_module.run_features_incremental(
+        run_cleaning(raw_data, "delta", incremental=True), "delta", processed_dir=processed
+    )
+    return {**features_module.load_features(processed), **delta}
+
+
+def test_grain_violation_rolls_back_the_incremental_load(sql_validated_base, workspace, monkeypatch, caplog):
+    db_path = workspace / "analytics.db"
+    before = read_tables(db_path)
+    build_fact_sales = star_module.build_fact_sales_by_region
+
+    def with_duplicate_grain(*args):
+        # Two delta rows on one (product, date, region): the upsert would merge them silently
+        fact = build_fact_sales(*args)
+        return pd.concat([fact, fact.tail(1).assign(quantity=fact["quantity"].iloc[-1] + 1)], ignore_index=True)
+
+    monkeypatch.setattr(star_module, "build_fact_sales_by_region", with_duplicate_grain)
+    with caplog.at_level(logging.ERROR), pytest.raises(SystemExit):
+        star_module.main(sql_validated_base, "duplicate", incremental=True)
+    assert "GRAIN VIOLATION: Found 1 duplicate rows" in caplog.text
+
+    # Nothing of the delta (facts, new dates, aggregates) was kept
+    after = read_tables(db_path)
+    assert after.keys() == before.keys()
+    for name, expected in before.items():
+        pd.testing.assert_frame_equal(after[name], expected, obj=name)
+
+    # The same delta without the duplicate loads
+    monkeypatch.setattr(star_module, "build_fact_sales_by_region", build_fact_sales)
+    star_module.main(sql_validated_base, "delta", incremental=True)
+    assert len(read_tables(db_path)["fact_sales"]) > len(before["fact_sales"])
@@ -0,0 +1,51 @@
+# dss_sales_inventory/tests/test_workload_queries.py
+"""EXPLAIN QUERY PLAN checks of the reporting workload on a freshly built star schema."""
+import sqlite3
+from contextlib import closing
+
+import pytest
+
+import data_model.build_star_schema as star_module
+import features.features as features_module
+from cleaning.cleaning import run_cleaning
+from data_model.workload_queries import verify_query_plans, workload
+
+COVERING_INDEXES = {
+    "sales_time_series": "idx_fact_date_cover",
+    "sales_time_series_region": "idx_fact_region_cover",
+    "demand_windows": "idx_snapshot_date",
+}
+
+
+@pytest.fixture(params=[False, True], ids=["plain", "partitioned"])
+def star_db(request, raw_data, workspace, monkeypatch):
+    """analytics.db built by the star schema builder, with fact_sales plain or month-partitioned."""
+    monkeypatch.setitem(star_module.FACT_PARTITION_CONFIG, "enabled", request.param)
+    monkeypatch.setitem(star_module.PARQUET_EXPORT_CONFIG, "enabled", False)
+    data = features_module.run_features(run_cleaning(raw_data, "plans"), "plans")
+    star_module.main(data, "plans")
+    return workspace / "analytics.db"
+
+
+def test_workload_queries_use_covering_indexes(star_db):
+    with closing(sqlite3.connect(star_db)) as conn:
+        queries = workload(conn)
+        report = verify_query_plans(conn)
+
+    assert {name: result["problems"] for name, result in report.items()} == {name: [] for name in queries}
+    for name, index in COVERING_INDEXES.items():
+        assert any(index in line for line in report[name]["plan"]), report[name]["plan"]
+
+
+def test_missing_covering_index_is_reported(star_db):
+    with closing(sqlite3.connect(star_db)) as conn:
+        dropped = [row[0] for row in conn.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'index' AND name LIKE 'idx_fact_date_cover%'"
+        )]
+        for name in dropped:
+            conn.execute(f"DROP INDEX {name}")
+        report = verify_query_plans(conn)
+
+    assert dropped
+    assert "idx_fact_date_cover not used" in report["sales_time_series"]["problems"]
+    assert not report["sales_time_series_region"]["problems"]